@@ -0,0 +1,15 @@
+"""
+Benchmarks for CommandWallet's core hot paths.
+
+Times the data manager and the command executor against synthetic wallets
+(1k to 100k commands), fake ``conda``/``docker`` binaries and a fake
+high-volume output emitter, so they run offline and without touching the
+user's data. Run them from the repository root:
+
+    python -m benchmarks                          # all benchmarks, JSON on stdout
+    python -m benchmarks --quick -o results.json  # smaller sizes, JSON to a file
+    python -m benchmarks --compare results.json   # run again and compare
+
+Every benchmark yields JSON-serializable results with the same keys, so
+two result files can be compared benchmark by benchmark.
+"""
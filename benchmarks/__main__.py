@@ -0,0 +1,134 @@
+"""
+Command line entry point of the benchmarks: ``python -m benchmarks``.
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+from . import bench_executor, bench_storage
+from .fixtures import benchmark_home
+from .timing import result_key
+
+
+# Wallet sizes of a full run and of a quick run
+FULL_SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 10000)
+
+# Lines printed by the output emitter in a full run and in a quick run
+FULL_OUTPUT_LINES = 1000000
+QUICK_OUTPUT_LINES = 100000
+
+# Benchmark groups that can be selected with --only
+GROUPS = ('storage', 'executor')
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark CommandWallet's core hot paths"
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help="use smaller wallets and less output"
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help="timed repeats per benchmark (default: 5)"
+    )
+    parser.add_argument(
+        '--only',
+        choices=GROUPS,
+        action='append',
+        help="run only this group (may be repeated)"
+    )
+    parser.add_argument(
+        '-o', '--output',
+        metavar='PATH',
+        help="write the results to a JSON file instead of stdout"
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='PATH',
+        help="compare with the results in a JSON file from an earlier run"
+    )
+    return parser.parse_args(argv)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """
+    Compare two result files benchmark by benchmark.
+
+    Args:
+        old: Earlier results.
+        new: Current results.
+
+    Returns:
+        One line per benchmark present in both, with the change of its
+        minimum time (negative is faster).
+    """
+    old_results = {result_key(entry): entry for entry in old['results']}
+    lines = []
+    for entry in new['results']:
+        key = result_key(entry)
+        previous = old_results.get(key)
+        if previous is None or not previous['min']:
+            continue
+        change = (entry['min'] - previous['min']) / previous['min'] * 100
+        lines.append(f"{key:<70} {previous['min'] * 1000:>10.2f} ms -> "
+                     f"{entry['min'] * 1000:>10.2f} ms  {change:+6.1f}%")
+    return lines
+
+
+def main(argv=None) -> int:
+    """Run the benchmarks and report the results."""
+    args = parse_args(argv)
+    groups = args.only or GROUPS
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    output_lines = QUICK_OUTPUT_LINES if args.quick else FULL_OUTPUT_LINES
+
+    results = []
+    with benchmark_home() as home:
+        if 'storage' in groups:
+            for entry in bench_storage.run(sizes, args.repeat):
+                print(f"{result_key(entry)}: {entry['min'] * 1000:.2f} ms", file=sys.stderr)
+                results.append(entry)
+        if 'executor' in groups:
+            for entry in bench_executor.run(sizes, args.repeat, output_lines, home):
+                print(f"{result_key(entry)}: {entry['min'] * 1000:.2f} ms", file=sys.stderr)
+                results.append(entry)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                old = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args.compare}: {e}", file=sys.stderr)
+            return 1
+        print("\n".join(compare(old, report)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
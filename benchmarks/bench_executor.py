@@ -0,0 +1,89 @@
+"""
+Benchmarks of the command executor: environment discovery, command
+preparation and output throughput.
+"""
+
+import os
+from typing import Any, Dict, Iterator, Sequence
+
+from command_wallet.core.command_executor import CommandExecutor
+from command_wallet.core.output_spool import OutputSpool, TIMES_SUFFIX
+
+from .fixtures import emitter_command, make_wallet, path_heavy_command
+from .timing import measure, result
+
+
+# Numbers of paths in the commands given to infer_docker_mounts()
+MOUNT_PATH_COUNTS = (10, 100, 1000)
+
+# Length of the emitted output lines, without the newline
+EMITTED_LINE_WIDTH = 80
+
+# Bytes of the progress redraws printed before each line in progress mode
+PROGRESS_REDRAW_BYTES = 50
+
+
+def _discard_output(text: str, partial: str = '') -> None:
+    """Output callback ignoring the output, like a tab that is not shown."""
+
+
+def _remove_spool(path: str) -> None:
+    """Delete a spool file and its line times, so the next run starts empty."""
+    for name in (path, path + TIMES_SUFFIX):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def run(sizes: Sequence[int], repeat: int, output_lines: int,
+        home: str) -> Iterator[Dict[str, Any]]:
+    """
+    Time the executor's hot paths.
+
+    Args:
+        sizes: Numbers of commands prepared in a batch.
+        repeat: Number of timed repeats.
+        output_lines: Number of lines printed by the fake emitter.
+        home: Temporary home directory, for the spool files.
+
+    Yields:
+        One result per operation and parameter set.
+    """
+    # The fake conda and docker binaries are first on PATH
+    executor = CommandExecutor()
+    durations = measure(executor.refresh_environments, repeat)
+    yield result('executor.refresh_environments', durations, {
+        'conda_environments': len(executor.conda_environments),
+        'docker_images': len(executor.docker_images),
+    })
+
+    for count in MOUNT_PATH_COUNTS:
+        command = path_heavy_command(count)
+        durations = measure(lambda: executor.infer_docker_mounts(command), repeat)
+        yield result('executor.infer_docker_mounts', durations, {'paths': count}, items=count)
+
+    config = {'fixed_docker_mounts': ['-v /data:/data']}
+    for size in sizes:
+        commands = list(make_wallet(size).values())
+
+        def prepare_all():
+            for command_data in commands:
+                executor._prepare_command(command_data, config, 'command-wallet-bench')
+
+        durations = measure(prepare_all, repeat)
+        yield result('executor.prepare_command', durations, {'commands': size}, items=size)
+
+    for progress in (False, True):
+        command = emitter_command(output_lines, EMITTED_LINE_WIDTH, progress)
+        line_bytes = EMITTED_LINE_WIDTH + 1 + (PROGRESS_REDRAW_BYTES if progress else 0)
+        spool_path = os.path.join(home, 'bench-run.log')
+
+        def execute():
+            executor._execute_command(command, spool=OutputSpool(spool_path),
+                                      output_callback=_discard_output)
+
+        durations = measure(execute, repeat, setup=lambda: _remove_spool(spool_path))
+        _remove_spool(spool_path)
+        yield result('executor.output_throughput', durations, {
+            'lines': output_lines,
+            'progress': progress,
+        }, items=output_lines, nbytes=output_lines * line_bytes)
@@ -0,0 +1,34 @@
+"""
+Benchmarks of the data manager: saving and loading synthetic wallets.
+"""
+
+from typing import Any, Dict, Iterator, Sequence
+
+from command_wallet.core.data_manager import DataManager
+
+from .fixtures import make_wallet
+from .timing import measure, result
+
+
+def run(sizes: Sequence[int], repeat: int) -> Iterator[Dict[str, Any]]:
+    """
+    Time save_commands() and load_commands() for each wallet size.
+
+    load_commands() includes rebuilding the search index and the
+    frecency order, as the application does on startup.
+
+    Args:
+        sizes: Numbers of commands in the wallets.
+        repeat: Number of timed repeats.
+
+    Yields:
+        One result per operation and size.
+    """
+    data_manager = DataManager()
+    for size in sizes:
+        commands = make_wallet(size)
+        params = {'commands': size}
+        durations = measure(lambda: data_manager.save_commands(commands), repeat)
+        yield result('storage.save_commands', durations, params, items=size)
+        durations = measure(data_manager.load_commands, repeat)
+        yield result('storage.load_commands', durations, params, items=size)
@@ -0,0 +1,200 @@
+"""
+Synthetic data and fake tools for the benchmarks.
+
+Builds wallets of generated commands, ``conda`` and ``docker`` scripts
+printing canned environment lists, and a command printing output as fast
+as it can. Everything lives in a temporary home directory, which also
+keeps the data manager away from the user's real wallet.
+"""
+
+import os
+import random
+import shlex
+import shutil
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from command_wallet.core.frecency import new_counter
+
+
+# Words command names and arguments are made of
+WORDS = (
+    "backup", "sync", "deploy", "build", "test", "lint", "train", "export",
+    "photos", "database", "cluster", "reports", "logs", "models", "assets", "docs",
+)
+
+# Docker images the fake docker binary lists
+FAKE_DOCKER_IMAGES = 500
+
+# Conda environments the fake conda binary lists
+FAKE_CONDA_ENVIRONMENTS = 200
+
+
+def make_command(index: int, rng: random.Random) -> Dict[str, Any]:
+    """
+    Generate one command, shaped like those the data manager creates.
+
+    Args:
+        index: Number of the command, used in its name.
+        rng: Random source.
+
+    Returns:
+        The command data.
+    """
+    words = rng.sample(WORDS, 3)
+    paths = ' '.join(
+        f"/data/{rng.choice(WORDS)}/{rng.choice(WORDS)}_{rng.randrange(1000)}.dat"
+        for _ in range(rng.randrange(1, 4))
+    )
+    use_docker = rng.random() < 0.3
+    use_conda = not use_docker and rng.random() < 0.3
+    return {
+        'name': f"{' '.join(words).title()} {index}",
+        'command': f"{words[0]} --{words[1]} {paths} > ~/out/{words[2]}_{index}.log",
+        'use_conda': use_conda,
+        'conda_env': f"env{rng.randrange(FAKE_CONDA_ENVIRONMENTS)}" if use_conda else '',
+        'use_docker': use_docker,
+        'docker_image': f"repo{rng.randrange(FAKE_DOCKER_IMAGES)}/app:latest" if use_docker else '',
+        'volume_mounts': '',
+        'last_execution': f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 12:00:00",
+        'execution_count': rng.randrange(100),
+        'frecency': new_counter(),
+        'schedule': None,
+        'on_interrupt': 'fail',
+        'resource_class': 'light',
+        'timeout': None,
+        'watch_globs': '',
+    }
+
+
+def make_wallet(count: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a wallet of commands.
+
+    Args:
+        count: Number of commands.
+        seed: Seed of the random source, so runs are comparable.
+
+    Returns:
+        Dictionary of command ID -> command data.
+    """
+    rng = random.Random(seed)
+    return {f"cmd_{index + 1}": make_command(index + 1, rng) for index in range(count)}
+
+
+def path_heavy_command(paths: int, seed: int = 0) -> str:
+    """
+    Generate a command line mentioning many paths.
+
+    Args:
+        paths: Number of paths in the command.
+        seed: Seed of the random source.
+
+    Returns:
+        The command line, mixing absolute, ``~`` and ``$VAR`` paths.
+    """
+    rng = random.Random(seed)
+    parts = ["rsync", "-av"]
+    for index in range(paths):
+        kind = index % 3
+        if kind == 0:
+            parts.append(f"/srv/{rng.choice(WORDS)}/{rng.choice(WORDS)}/{index}.bin")
+        elif kind == 1:
+            parts.append(f"~/{rng.choice(WORDS)}/{index}")
+        else:
+            parts.append(f"$HOME/{rng.choice(WORDS)}/{index}.txt")
+    return ' '.join(parts)
+
+
+def _write_script(path: str, text: str) -> None:
+    """Write an executable shell script."""
+    with open(path, 'w') as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def install_fake_tools(bin_dir: str) -> None:
+    """
+    Write fake ``conda`` and ``docker`` binaries printing canned lists.
+
+    Args:
+        bin_dir: Directory the scripts are written to (put it first on PATH).
+    """
+    environments = ''.join(
+        f"env{index}                  /opt/conda/envs/env{index}\n"
+        for index in range(FAKE_CONDA_ENVIRONMENTS)
+    )
+    images = ''.join(f"repo{index}/app:latest\n" for index in range(FAKE_DOCKER_IMAGES))
+    _write_script(os.path.join(bin_dir, 'conda'), (
+        "#!/bin/sh\n"
+        "cat <<'EOF'\n"
+        "# conda environments:\n#\n"
+        "base                  *  /opt/conda\n"
+        f"{environments}"
+        "EOF\n"
+    ))
+    _write_script(os.path.join(bin_dir, 'docker'), (
+        "#!/bin/sh\n"
+        "cat <<'EOF'\n"
+        f"{images}"
+        "<none>:<none>\n"
+        "EOF\n"
+    ))
+
+
+def emitter_command(lines: int, width: int = 80, progress: bool = False) -> str:
+    """
+    Build a command printing a large amount of output quickly.
+
+    Args:
+        lines: Number of lines printed.
+        width: Length of each line, without its newline.
+        progress: Print carriage-return progress redraws before every
+            line, like a progress bar.
+
+    Returns:
+        Shell command line running the emitter with this Python.
+    """
+    script = (
+        "import sys\n"
+        f"line = b'x' * {width - 8}\n"
+        f"redraw = b''.join(b'\\r%3d%%' % p for p in range(0, 100, 10)) if {progress} else b''\n"
+        "out = sys.stdout.buffer\n"
+        "block = []\n"
+        f"for i in range({lines}):\n"
+        "    block.append(redraw + b'%07d ' % i + line + b'\\n')\n"
+        "    if len(block) == 1000:\n"
+        "        out.write(b''.join(block))\n"
+        "        block = []\n"
+        "out.write(b''.join(block))\n"
+    )
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+
+
+@contextmanager
+def benchmark_home() -> Iterator[str]:
+    """
+    Run code with a temporary home directory and the fake tools on PATH.
+
+    Yields:
+        The temporary home directory.
+    """
+    saved = {key: os.environ.get(key) for key in ('HOME', 'PATH')}
+    home = tempfile.mkdtemp(prefix="command-wallet-bench-")
+    bin_dir = os.path.join(home, 'bin')
+    os.makedirs(bin_dir)
+    install_fake_tools(bin_dir)
+    os.environ['HOME'] = home
+    os.environ['PATH'] = bin_dir + os.pathsep + (saved['PATH'] or '')
+    try:
+        yield home
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(home, ignore_errors=True)
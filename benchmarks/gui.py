@@ -0,0 +1,404 @@
+"""
+Headless GUI benchmarks: ``python -m benchmarks.gui``.
+
+Builds the real CommandWalletWindow on a virtual X server (Xvfb), with a
+data manager holding a synthetic wallet and an executor that streams
+generated output instead of running commands. It then scripts the GUI hot
+paths and reports their wall time and the event-loop (frame) lag measured
+by the Tk instrumentation heartbeat:
+
+- rebuilding the command list of a 5k-command wallet in every sort order
+- loading commands into the editor form
+- typing into the name field, one key event at a time
+- streaming 1M output lines into a run tab
+
+Requires customtkinter, plus Xvfb unless a display is available. Results
+have the same shape as those of ``python -m benchmarks``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from command_wallet.core.command_executor import CommandExecutor
+from command_wallet.core.data_manager import DataManager
+from command_wallet.core.histogram import HistogramRegistry
+
+from .fixtures import FAKE_CONDA_ENVIRONMENTS, FAKE_DOCKER_IMAGES, benchmark_home, make_wallet
+from .timing import result, result_key
+
+
+# Commands in the synthetic wallet
+WALLET_SIZE = 5000
+
+# Output lines streamed into a run tab
+OUTPUT_LINES = 1000000
+
+# Lines handed to the output callback at once by the stub executor
+OUTPUT_BLOCK_LINES = 1000
+
+# Length of the streamed output lines, without the newline
+OUTPUT_LINE_WIDTH = 80
+
+# Commands loaded into the form in the load_command scenario
+LOADED_COMMANDS = 200
+
+# Characters typed into the name field
+TYPED_TEXT = "nightly backup of the photo library " * 4
+
+# Screen of the virtual X server
+XVFB_SCREEN = "1920x1080x24"
+
+# Longest time a scenario may wait for the GUI, in seconds
+SCENARIO_TIMEOUT = 600.0
+
+
+class StubDataManager(DataManager):
+    """Data manager over a synthetic wallet; saving is a no-op."""
+
+    def __init__(self, wallet_size: int):
+        """
+        Initialize the data manager and write the synthetic wallet.
+
+        Run it inside fixtures.benchmark_home(), which points the home
+        directory (and so the data directory) at a temporary one.
+
+        Args:
+            wallet_size: Number of commands in the wallet.
+        """
+        super().__init__()
+        with open(self.data_file, 'w') as f:
+            json.dump(make_wallet(wallet_size), f)
+        self.saves = 0
+
+    def save_commands(self, commands: Dict[str, Any]) -> bool:
+        """Count the save without writing, so the GUI cost is measured alone."""
+        self.saves += 1
+        return True
+
+    def save_config(self, config: Dict[str, Any]) -> bool:
+        """Count the save without writing."""
+        self.saves += 1
+        return True
+
+
+class StubCommandExecutor(CommandExecutor):
+    """Executor streaming generated output instead of running commands."""
+
+    def __init__(self, output_lines: int = OUTPUT_LINES):
+        """
+        Initialize the executor with canned environments (nothing is run).
+
+        Args:
+            output_lines: Lines of output every run produces.
+        """
+        self.output_lines = output_lines
+        self.output_callback = None
+        self.admission = None
+        self.metrics = None
+        self.conda_environments = ['base'] + [f"env{index}" for index in range(FAKE_CONDA_ENVIRONMENTS)]
+        self.docker_images = [f"repo{index}/app:latest" for index in range(FAKE_DOCKER_IMAGES)]
+        self._build_catalogs()
+
+    def refresh_environments(self) -> None:
+        """Keep the canned environments."""
+
+    def _execute_command(self, command: str, completion_callback=None, spool=None,
+                         output_callback=None, started_callback=None, **kwargs) -> None:
+        """Stream the generated output as fast as the callbacks take it."""
+        if started_callback:
+            started_callback()
+        padding = 'x' * (OUTPUT_LINE_WIDTH - 8)
+        for start in range(0, self.output_lines, OUTPUT_BLOCK_LINES):
+            end = min(start + OUTPUT_BLOCK_LINES, self.output_lines)
+            text = ''.join(f"{index:07d} {padding}\n" for index in range(start, end))
+            if spool is not None:
+                spool.append(text)
+            if output_callback is not None:
+                output_callback(text, '')
+        if spool is not None:
+            spool.close()
+        if completion_callback:
+            completion_callback(0)
+
+
+@contextmanager
+def virtual_display(force: bool = False) -> Iterator[Optional[str]]:
+    """
+    Run code with an X display, starting Xvfb if there is none.
+
+    Args:
+        force: Start Xvfb even if DISPLAY is set.
+
+    Yields:
+        The display name, or None if no display could be provided.
+    """
+    if os.environ.get('DISPLAY') and not force:
+        yield os.environ['DISPLAY']
+        return
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        yield None
+        return
+
+    # Xvfb picks a free display number and writes it to the pipe
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(
+        [xvfb, '-displayfd', str(write_fd), '-screen', '0', XVFB_SCREEN, '-nolisten', 'tcp'],
+        pass_fds=(write_fd,),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        number = pipe.readline().strip()
+    saved = os.environ.get('DISPLAY')
+    display = f":{number}" if number else None
+    if display:
+        os.environ['DISPLAY'] = display
+    try:
+        yield display
+    finally:
+        if saved is None:
+            os.environ.pop('DISPLAY', None)
+        else:
+            os.environ['DISPLAY'] = saved
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class GuiBenchmark:
+    """Scripts scenarios against a CommandWalletWindow and measures them."""
+
+    def __init__(self, wallet_size: int, output_lines: int, repeat: int):
+        """
+        Build the window (instrumented) with the stub data manager and executor.
+
+        Args:
+            wallet_size: Number of commands in the synthetic wallet.
+            output_lines: Lines streamed by every run.
+            repeat: Number of timed repeats of the short scenarios.
+        """
+        # Imported here so the module can be imported without customtkinter
+        from command_wallet.gui.instrumentation import TkInstrumentation, LOOP_LAG_METRIC
+        from command_wallet.gui.main_window import CommandWalletWindow
+
+        self.loop_lag_metric = LOOP_LAG_METRIC
+        self.wallet_size = wallet_size
+        self.output_lines = output_lines
+        self.repeat = repeat
+        self.instrumentation = TkInstrumentation(slow_handler_ms=float('inf'))
+        self.instrumentation.install()
+        self.data_manager = StubDataManager(wallet_size)
+        self.app = CommandWalletWindow(
+            self.instrumentation,
+            data_manager=self.data_manager,
+            command_executor=StubCommandExecutor(output_lines)
+        )
+        self.root = self.app.root
+        self.pump(0.5)
+
+    def close(self) -> None:
+        """Destroy the window."""
+        self.app._on_closing()
+        self.instrumentation.uninstall()
+
+    def pump(self, duration: float = 0.0) -> None:
+        """Process pending events, for at least `duration` seconds."""
+        deadline = time.perf_counter() + duration
+        while True:
+            self.root.update()
+            if time.perf_counter() >= deadline:
+                return
+            time.sleep(0.001)
+
+    def wait_until(self, condition: Callable[[], bool]) -> None:
+        """Process events until a condition holds."""
+        deadline = time.perf_counter() + SCENARIO_TIMEOUT
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("scenario did not finish in time")
+            self.root.update()
+            time.sleep(0.001)
+
+    def frame_lag(self) -> Dict[str, Any]:
+        """Return the event-loop lag statistics since the last reset."""
+        lag = self.instrumentation.registry.find(self.loop_lag_metric)
+        if lag is None or not lag.count:
+            return {'beats': 0}
+        return {
+            'beats': lag.count,
+            'p50': lag.quantile(0.5),
+            'p95': lag.quantile(0.95),
+            'p99': lag.quantile(0.99),
+            'max': lag.max,
+        }
+
+    def reset_lag(self) -> None:
+        """Start measuring lag afresh for the next scenario."""
+        self.instrumentation.registry = HistogramRegistry()
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """
+        Run all scenarios.
+
+        Yields:
+            One result per scenario, with its frame lag.
+        """
+        for scenario in (self.list_rebuild, self.load_commands, self.typing, self.output_stream):
+            self.reset_lag()
+            entry = scenario()
+            entry['frame_lag'] = self.frame_lag()
+            yield entry
+
+    def list_rebuild(self) -> Dict[str, Any]:
+        """Rebuild the command list in every sort order, rendering each."""
+        def rebuild():
+            for sort_mode in ('name', 'date', 'frecency'):
+                self.app._update_commands_list(sort_by=sort_mode)
+                self.root.update()
+
+        durations = [duration / 3 for duration in self._time(rebuild, self.repeat)]
+        return result('gui.update_commands_list', durations, {'commands': self.wallet_size},
+                      items=self.wallet_size)
+
+    def load_commands(self) -> Dict[str, Any]:
+        """Load a series of commands into the editor form."""
+        command_ids = list(self.app.commands)[:LOADED_COMMANDS]
+
+        def load_all():
+            for command_id in command_ids:
+                self.app.load_command(command_id)
+                self.root.update()
+
+        durations = [duration / len(command_ids) for duration in self._time(load_all, self.repeat)]
+        return result('gui.load_command', durations, {'commands': self.wallet_size})
+
+    def typing(self) -> Dict[str, Any]:
+        """Type into the name field; each duration is one keystroke until rendered."""
+        self.app.load_command(next(iter(self.app.commands)))
+        entry = self.app.name_entry._entry
+        entry.focus_force()
+        entry.icursor("end")
+        self.pump(0.2)
+
+        before = entry.get()
+        durations = []
+        for char in TYPED_TEXT:
+            keysym = 'space' if char == ' ' else char
+            started = time.perf_counter()
+            entry.event_generate('<KeyPress>', keysym=keysym)
+            entry.event_generate('<KeyRelease>', keysym=keysym)
+            self.root.update()
+            durations.append(time.perf_counter() - started)
+        typed = entry.get()[len(before):]
+        entry_result = result('gui.typing', durations, {'keystrokes': len(TYPED_TEXT)})
+        entry_result['typed_ok'] = typed == TYPED_TEXT
+        return entry_result
+
+    def output_stream(self) -> Dict[str, Any]:
+        """Stream the output of one run into a new tab until it is shown."""
+        command_id = next(iter(self.app.commands))
+        started = time.perf_counter()
+        tab = self.app._start_run(command_id)
+        self.wait_until(lambda: not tab.running)
+        self.root.update()
+        duration = time.perf_counter() - started
+        return result('gui.output_stream', [duration], {'lines': self.output_lines},
+                      items=self.output_lines, nbytes=self.output_lines * (OUTPUT_LINE_WIDTH + 1))
+
+    def _time(self, func: Callable[[], None], repeat: int) -> List[float]:
+        """Time a scenario step several times, letting the GUI settle in between."""
+        durations = []
+        for _ in range(repeat):
+            self.pump(0.1)
+            started = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - started)
+        return durations
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.gui",
+        description="Benchmark CommandWallet's GUI hot paths on a virtual display"
+    )
+    parser.add_argument(
+        '--commands',
+        type=int,
+        default=WALLET_SIZE,
+        help=f"commands in the synthetic wallet (default: {WALLET_SIZE})"
+    )
+    parser.add_argument(
+        '--lines',
+        type=int,
+        default=OUTPUT_LINES,
+        help=f"output lines streamed into a run tab (default: {OUTPUT_LINES})"
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help="timed repeats of the short scenarios (default: 5)"
+    )
+    parser.add_argument(
+        '--xvfb',
+        action='store_true',
+        help="start Xvfb even if DISPLAY is set"
+    )
+    parser.add_argument(
+        '-o', '--output',
+        metavar='PATH',
+        help="write the results to a JSON file instead of stdout"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the GUI benchmarks and report the results."""
+    args = parse_args(argv)
+    results = []
+    with virtual_display(args.xvfb) as display, benchmark_home():
+        if display is None:
+            print("Error: no display and Xvfb is not installed", file=sys.stderr)
+            return 2
+        benchmark = GuiBenchmark(args.commands, args.lines, args.repeat)
+        try:
+            for entry in benchmark.run():
+                lag = entry['frame_lag']
+                lag_text = f", frame lag p95 {lag['p95'] * 1000:.1f} ms" if lag['beats'] else ""
+                print(f"{result_key(entry)}: {entry['min'] * 1000:.2f} ms{lag_text}", file=sys.stderr)
+                results.append(entry)
+        finally:
+            benchmark.close()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'display': display,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Timing helpers for the benchmarks.
+
+Every benchmark produces results of the same shape, so result files can
+be compared: a name, the parameters it ran with, and timing statistics
+over several repeats (the minimum is the most stable figure).
+"""
+
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def measure(func: Callable[[], Any], repeat: int = 5,
+            setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """
+    Time a function several times.
+
+    Args:
+        func: Function to time, called without arguments.
+        repeat: Number of timed calls.
+        setup: Optional function called, untimed, before each call.
+
+    Returns:
+        The duration of each call, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def result(name: str, durations: List[float], params: Optional[Dict[str, Any]] = None,
+           items: Optional[int] = None, nbytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build the result of a benchmark.
+
+    Args:
+        name: Name of the benchmark, e.g. ``storage.load_commands``.
+        durations: Durations of the repeats, in seconds.
+        params: Parameters it ran with, e.g. the wallet size.
+        items: Items processed per repeat, to report a rate.
+        nbytes: Bytes processed per repeat, to report a throughput.
+
+    Returns:
+        JSON-serializable result.
+    """
+    best = min(durations)
+    entry = {
+        'name': name,
+        'params': params or {},
+        'repeat': len(durations),
+        'min': best,
+        'median': statistics.median(durations),
+        'mean': statistics.mean(durations),
+        'max': max(durations),
+    }
+    if items is not None:
+        entry['items_per_second'] = items / best if best else None
+    if nbytes is not None:
+        entry['mb_per_second'] = nbytes / best / 1e6 if best else None
+    return entry
+
+
+def result_key(entry: Dict[str, Any]) -> str:
+    """Return the key identifying a result across runs (name and parameters)."""
+    params = ','.join(f"{key}={value}" for key, value in sorted(entry['params'].items()))
+    return f"{entry['name']}[{params}]" if params else entry['name']
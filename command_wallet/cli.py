@@ -0,0 +1,266 @@
+"""
+Command line interface for CommandWallet.
+
+Starts the runner daemon and submits, lists and attaches to its jobs:
+
+    python -m command_wallet.cli daemon
+    python -m command_wallet.cli submit "Backup photos"
+    python -m command_wallet.cli list
+    python -m command_wallet.cli attach job_1700000000_1
+    python -m command_wallet.cli cancel job_1700000000_1
+    python -m command_wallet.cli --profile daemon.prof daemon
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from .core.admission import AdmissionController
+from .core.data_manager import DataManager
+from .core.job_journal import JobJournal
+from .core.metrics import Metrics, MetricsExporter
+from .core.profiling import Profiler
+from .core.runner_daemon import RunnerDaemon, get_socket_path, get_journal_path
+from .core.runner_client import RunnerClient, RunnerError
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m command_wallet.cli",
+        description="CommandWallet runner daemon and its clients"
+    )
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help="daemon socket (default: ~/.command-wallet/runner.sock)"
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='PATH',
+        help="profile the action with cProfile and write it to a .prof file"
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help="trace allocations and print the top allocation sites when the action ends"
+    )
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    subparsers.add_parser('daemon', help="run the runner daemon in the foreground")
+
+    submit_parser = subparsers.add_parser('submit', help="run a saved command through the daemon")
+    submit_parser.add_argument('command', help="name or ID of the saved command")
+    submit_parser.add_argument(
+        '--detach',
+        action='store_true',
+        help="print the job ID and return instead of streaming the output"
+    )
+
+    subparsers.add_parser('list', help="list the daemon's jobs")
+
+    cancel_parser = subparsers.add_parser('cancel', help="stop a pending or running job")
+    cancel_parser.add_argument('job_id', help="ID of the job")
+
+    attach_parser = subparsers.add_parser('attach', help="stream the output of a job")
+    attach_parser.add_argument('job_id', help="ID of the job")
+    attach_parser.add_argument(
+        '--tail',
+        action='store_true',
+        help="only show output produced from now on"
+    )
+    return parser.parse_args(argv)
+
+
+def find_command(commands: Dict[str, Any], key: str) -> Optional[str]:
+    """
+    Find a saved command by ID or by name.
+
+    Args:
+        commands: Dictionary of all commands.
+        key: Command ID or exact command name.
+
+    Returns:
+        The command ID, or None if there is no such command.
+    """
+    if key in commands:
+        return key
+    for command_id, command_data in commands.items():
+        if command_data.get('name') == key:
+            return command_id
+    return None
+
+
+def write_output(text: str, partial: str = '') -> None:
+    """Print streamed output; partial lines are shown once committed."""
+    if text:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+def submit_command(client: RunnerClient, key: str, detach: bool) -> int:
+    """
+    Submit a saved command to the daemon.
+
+    Args:
+        client: Daemon client.
+        key: Name or ID of the saved command.
+        detach: Whether to return without streaming the output.
+
+    Returns:
+        Process exit status for the CLI.
+    """
+    # Imported here so the other actions do not scan conda/docker
+    from .core.command_executor import CommandExecutor
+
+    data_manager = DataManager()
+    commands = data_manager.load_commands()
+    command_id = find_command(commands, key)
+    if command_id is None:
+        print(f"Error: no saved command named '{key}'", file=sys.stderr)
+        return 2
+    command_data = commands[command_id]
+    if not command_data['command'].strip():
+        print(f"Error: command '{key}' is empty", file=sys.stderr)
+        return 2
+
+    config = data_manager.load_config()
+    executor = CommandExecutor()
+    handle = executor.create_run_handle(command_data)
+    final_command = executor._prepare_command(command_data, config, handle.container_name)
+    timestamp_str = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
+
+    job_id = client.submit(
+        final_command,
+        name=command_data.get('name', ''),
+        command_id=command_id,
+        log_path=data_manager.create_run_log_path(command_id),
+        header=f"Started command '{final_command}' at {timestamp_str}\n\n",
+        on_interrupt=command_data.get('on_interrupt'),
+        resource_class=command_data.get('resource_class'),
+        timeout=command_data.get('timeout'),
+        container_name=handle.container_name
+    )
+    # The GUI owns the commands file and merges the run on its next save
+    data_manager.record_runs([command_id])
+
+    if detach:
+        print(job_id)
+        return 0
+    exit_code = client.attach(job_id, write_output)
+    return 1 if exit_code is None else exit_code
+
+
+def list_jobs(client: RunnerClient) -> int:
+    """Print the daemon's jobs, one per line."""
+    for job in client.list_jobs():
+        submitted = datetime.fromtimestamp(job['submitted']).strftime("%Y-%m-%d %H:%M:%S")
+        if job['state'] == 'finished' and job.get('cancel_reason'):
+            status = job['cancel_reason']
+        elif job['state'] == 'finished':
+            status = f"exit {job['exit_code']}"
+        else:
+            status = job['state']
+        print(f"{job['job_id']}\t{status}\t{submitted}\t{job['name'] or job['command']}")
+    return 0
+
+
+def main(argv=None) -> int:
+    """Entry point of the command line interface."""
+    args = parse_args(argv)
+    if not (args.profile or args.trace_memory):
+        return run_action(args)
+
+    profiler = Profiler()
+    if args.trace_memory:
+        profiler.start_memory_trace()
+    if args.profile:
+        profiler.start_profile(args.action)
+    try:
+        return run_action(args)
+    finally:
+        if profiler.tracing_memory:
+            print(profiler.memory_report(), file=sys.stderr)
+            profiler.stop_memory_trace()
+        if args.profile and profiler.stop_profile(args.profile):
+            print(f"Profile written to {args.profile}", file=sys.stderr)
+
+
+def run_action(args: argparse.Namespace) -> int:
+    """
+    Run the action chosen on the command line.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        Process exit status for the CLI.
+    """
+    data_manager = DataManager()
+    socket_path = args.socket or get_socket_path(data_manager.config_dir)
+
+    if args.action == 'daemon':
+        from .core.command_executor import CommandExecutor
+        executor = CommandExecutor()
+        config = data_manager.load_config()
+        executor.admission = AdmissionController.from_config(config)
+        exporter = None
+        if config.get('metrics_enabled'):
+            metrics = Metrics('daemon')
+            metrics.watch_admission(executor.admission)
+            executor.metrics = metrics
+            data_manager.metrics = metrics
+            exporter = MetricsExporter.from_config(
+                metrics, config, os.path.join(data_manager.config_dir, "metrics"),
+                port_key='daemon_metrics_port'
+            )
+            exporter.start()
+        journal = JobJournal(get_journal_path(data_manager.config_dir))
+        daemon = RunnerDaemon(socket_path, executor, journal, data_manager)
+        print(f"Runner daemon listening on {socket_path}")
+
+        def stop(signum, frame):
+            # shutdown() waits for serve_forever(), which runs in this thread
+            def stop_daemon():
+                daemon.stop_jobs()
+                daemon.shutdown()
+            threading.Thread(target=stop_daemon, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            daemon.stop_jobs()
+        finally:
+            if exporter is not None:
+                exporter.stop()
+        return 0
+
+    client = RunnerClient(socket_path)
+    try:
+        if args.action == 'submit':
+            if not client.spawn_daemon():
+                print("Error: could not start the runner daemon", file=sys.stderr)
+                return 1
+            return submit_command(client, args.command, args.detach)
+        if args.action == 'list':
+            return list_jobs(client)
+        if args.action == 'cancel':
+            client.cancel(args.job_id)
+            return 0
+        exit_code = client.attach(args.job_id, write_output, args.tail)
+        return 1 if exit_code is None else exit_code
+    except RunnerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        # Detaching leaves the job running in the daemon
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+Admission control module for CommandWallet.
+
+Decides when a run may start, so launching several heavy commands at once
+does not overload the machine. Every command has a resource class with a
+weight; a run is admitted only while the summed weight of the admitted
+runs, the load average from ``/proc/loadavg`` and the available memory
+from ``/proc/meminfo`` stay within the configured limits. Runs that do not
+fit wait in first-come, first-served order and their wait times are
+recorded in a histogram per resource class.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Deque, Optional, Tuple
+
+from .histogram import HistogramRegistry
+
+
+# Resource classes and their default weights; weight 0 runs are never held back
+RESOURCE_CLASSES = ('light', 'io-heavy', 'cpu-heavy')
+DEFAULT_RESOURCE_CLASS = 'light'
+DEFAULT_RESOURCE_WEIGHTS = {'light': 0, 'io-heavy': 1, 'cpu-heavy': 2}
+
+# How often waiting runs re-check the load average and memory, in seconds
+ADMISSION_POLL_INTERVAL = 2.0
+
+# Upper bounds of the wait time buckets, in seconds
+WAIT_BUCKETS: Tuple[float, ...] = (
+    0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0,
+)
+
+# Prefix of the wait time histogram names; the resource class is appended
+WAIT_METRIC = "admission_wait"
+
+
+def read_load_average(path: str = '/proc/loadavg') -> Optional[float]:
+    """
+    Read the 1-minute load average.
+
+    Args:
+        path: Load average file.
+
+    Returns:
+        The load average, or None where it is not available.
+    """
+    try:
+        with open(path, 'r') as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_available_memory(path: str = '/proc/meminfo') -> Optional[int]:
+    """
+    Read the memory available for new processes.
+
+    Args:
+        path: Memory information file.
+
+    Returns:
+        Available memory in bytes, or None where it is not available.
+    """
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def get_cpu_count() -> int:
+    """Return the number of CPUs usable by this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+class AdmissionTicket:
+    """Admission of one run; give it back with release()."""
+
+    def __init__(self, resource_class: str, weight: float):
+        """
+        Initialize the ticket.
+
+        Args:
+            resource_class: Resource class of the run.
+            weight: Weight the run adds to the running load.
+        """
+        self.resource_class = resource_class
+        self.weight = weight
+        self.waited = 0.0
+        self.admitted = False
+
+
+class AdmissionController:
+    """Admits runs while the machine has room for them."""
+
+    def __init__(self, max_weight: Optional[float] = None,
+                 max_load: Optional[float] = None,
+                 min_available_mb: Optional[float] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 registry: Optional[HistogramRegistry] = None,
+                 read_load: Callable[[], Optional[float]] = read_load_average,
+                 read_memory: Callable[[], Optional[int]] = read_available_memory):
+        """
+        Initialize the controller.
+
+        Args:
+            max_weight: Maximum summed weight of admitted runs (None for no
+                limit). A run heavier than the limit is admitted alone.
+            max_load: Maximum 1-minute load average for admitting a run.
+            min_available_mb: Minimum available memory for admitting a run.
+            weights: Weight of each resource class; defaults to
+                DEFAULT_RESOURCE_WEIGHTS.
+            registry: Registry receiving the wait time histograms.
+            read_load: Function returning the load average (for testing).
+            read_memory: Function returning the available memory in bytes
+                (for testing).
+        """
+        self.max_weight = max_weight
+        self.max_load = max_load
+        self.min_available_mb = min_available_mb
+        self.weights = dict(DEFAULT_RESOURCE_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.registry = registry or HistogramRegistry(WAIT_BUCKETS)
+        self._read_load = read_load
+        self._read_memory = read_memory
+        self._condition = threading.Condition()
+        self._waiting: Deque[AdmissionTicket] = deque()
+        self.running_weight = 0.0
+        self.running_count = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    registry: Optional[HistogramRegistry] = None) -> 'AdmissionController':
+        """
+        Create a controller from the application configuration.
+
+        Args:
+            config: Configuration with the optional keys 'max_running_weight'
+                (defaults to the number of CPUs), 'max_load_average',
+                'min_available_memory_mb' and 'resource_weights'.
+            registry: Registry receiving the wait time histograms.
+
+        Returns:
+            The controller.
+        """
+        controller = cls(registry=registry)
+        controller.configure(config)
+        return controller
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        Apply new limits from the configuration; waiting runs are re-checked.
+
+        Args:
+            config: Configuration (see from_config()).
+        """
+        with self._condition:
+            self.max_weight = config.get('max_running_weight') or get_cpu_count()
+            self.max_load = config.get('max_load_average')
+            self.min_available_mb = config.get('min_available_memory_mb')
+            self.weights = dict(DEFAULT_RESOURCE_WEIGHTS)
+            self.weights.update(config.get('resource_weights') or {})
+            self._condition.notify_all()
+
+    def acquire(self, resource_class: Optional[str] = None,
+                on_wait: Optional[Callable[[str], None]] = None,
+                cancel_event: Optional[threading.Event] = None) -> Optional[AdmissionTicket]:
+        """
+        Wait until a run may start.
+
+        Args:
+            resource_class: Resource class of the run; unknown classes
+                count as the default class.
+            on_wait: Optional function called once, with the reason, if the
+                run has to wait.
+            cancel_event: Optional event that abandons the wait when set.
+
+        Returns:
+            The ticket to release when the run ends, or None if the wait
+            was cancelled.
+        """
+        if resource_class not in self.weights:
+            resource_class = DEFAULT_RESOURCE_CLASS
+        ticket = AdmissionTicket(resource_class, self.weights[resource_class])
+        started = time.monotonic()
+
+        with self._condition:
+            self._waiting.append(ticket)
+            notified = False
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    reason = self._blocking_reason(ticket)
+                    if reason is None:
+                        break
+                    if on_wait is not None and not notified:
+                        notified = True
+                        on_wait(reason)
+                    self._condition.wait(ADMISSION_POLL_INTERVAL)
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+            ticket.admitted = True
+            self.running_weight += ticket.weight
+            self.running_count += 1
+
+        ticket.waited = time.monotonic() - started
+        self.registry.observe(f"{WAIT_METRIC}.{resource_class}", ticket.waited)
+        return ticket
+
+    def release(self, ticket: Optional[AdmissionTicket]) -> None:
+        """
+        Give back the admission of a run that ended.
+
+        Args:
+            ticket: Ticket returned by acquire() (None is ignored).
+        """
+        if ticket is None or not ticket.admitted:
+            return
+        with self._condition:
+            ticket.admitted = False
+            self.running_weight -= ticket.weight
+            self.running_count -= 1
+            self._condition.notify_all()
+
+    def waiting_count(self) -> int:
+        """Return the number of runs waiting to be admitted."""
+        with self._condition:
+            return len(self._waiting)
+
+    def wake(self) -> None:
+        """Make waiting runs re-check now (e.g. after setting a cancel event)."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current load and the recorded wait times."""
+        with self._condition:
+            waiting = len(self._waiting)
+            running_weight = self.running_weight
+            running_count = self.running_count
+        return {
+            'running': running_count,
+            'running_weight': running_weight,
+            'waiting': waiting,
+            'load_average': self._read_load(),
+            'available_memory': self._read_memory(),
+            'wait_times': self.registry.to_dict(),
+        }
+
+    def _blocking_reason(self, ticket: AdmissionTicket) -> Optional[str]:
+        """
+        Check whether a waiting run can be admitted now (condition held).
+
+        Returns:
+            None if it can, otherwise why it has to wait.
+        """
+        if ticket.weight <= 0:
+            return None
+
+        # First come, first served among the runs that can be held back
+        for waiting in self._waiting:
+            if waiting is ticket:
+                break
+            if waiting.weight > 0:
+                return "earlier runs are waiting"
+
+        if (self.max_weight is not None and self.running_weight > 0
+                and self.running_weight + ticket.weight > self.max_weight):
+            return f"running load {self.running_weight:g} of {self.max_weight:g}"
+
+        if self.max_load is not None:
+            load = self._read_load()
+            if load is not None and load >= self.max_load:
+                return f"load average {load:.2f} of {self.max_load:g}"
+
+        if self.min_available_mb is not None:
+            available = self._read_memory()
+            if available is not None and available < self.min_available_mb * 1024 * 1024:
+                return (
+                    f"available memory {available // (1024 * 1024)} MB, "
+                    f"needs {self.min_available_mb:g} MB"
+                )
+        return None
+
@@ -0,0 +1,275 @@
+"""
+ANSI color module for CommandWallet.
+
+Parses SGR (color and style) escape sequences in command output into runs
+of plain text and display tags, so colored output can be shown without the
+raw escape codes. The parser is incremental: the current colors carry over
+from one chunk of output to the next, and a sequence cut in half at the end
+of a chunk is completed by the following one. Every color maps to one of a
+small fixed set of tags (the 16 standard terminal colors); 256-color and
+24-bit colors use the nearest of them.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# The 16 terminal colors (normal 0-7, bright 8-15), tuned for a dark background
+ANSI_PALETTE = (
+    "#3b3b3b", "#cd3131", "#0dbc79", "#e5e510", "#2472c8", "#bc3fbc", "#11a8cd", "#e5e5e5",
+    "#666666", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff",
+)
+
+# Names of the display tags; every run of text gets at most one of each kind
+FOREGROUND_TAGS = tuple(f"ansi_fg{index}" for index in range(16))
+BACKGROUND_TAGS = tuple(f"ansi_bg{index}" for index in range(16))
+UNDERLINE_TAG = "ansi_underline"
+
+# Escape sequences in output text: CSI sequences (SGR ones end in 'm') and OSC strings
+_ESCAPE = re.compile(r'\x1b\[([0-9;:?]*)[ -/]*([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b')
+
+# An escape sequence cut in half at the end of a chunk
+_INCOMPLETE_ESCAPE = re.compile(r'\x1b(\[[0-9;:?]*[ -/]*|\][^\x07\x1b]*)?$')
+
+# Runs of text with the tags to display them with
+Runs = List[Tuple[str, Tuple[str, ...]]]
+
+# Color state: (foreground, background, bold, underline); colors are palette indexes
+State = Tuple[Optional[int], Optional[int], bool, bool]
+DEFAULT_STATE: State = (None, None, False, False)
+
+# Maximum number of cached (state, SGR parameters) transitions
+MAX_CACHED_TRANSITIONS = 4096
+
+# Cached results of apply_sgr() and the tags of the resulting state
+_TRANSITIONS: Dict[Tuple[State, str], Tuple[State, Tuple[str, ...]]] = {}
+
+
+def _palette_rgb(index: int) -> Tuple[int, int, int]:
+    """Return the RGB components of a palette color."""
+    value = ANSI_PALETTE[index]
+    return int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16)
+
+
+# RGB components of the palette colors
+_PALETTE_RGB = [_palette_rgb(index) for index in range(16)]
+
+# Nearest palette color of each RGB color seen so far
+_NEAREST: Dict[Tuple[int, int, int], int] = {}
+
+
+def nearest_color(red: int, green: int, blue: int) -> int:
+    """
+    Find the palette color closest to an RGB color.
+
+    Args:
+        red: Red component (0-255).
+        green: Green component (0-255).
+        blue: Blue component (0-255).
+
+    Returns:
+        Index of the nearest of the 16 palette colors.
+    """
+    key = (red, green, blue)
+    index = _NEAREST.get(key)
+    if index is None:
+        index = min(
+            range(16),
+            key=lambda i: (_PALETTE_RGB[i][0] - red) ** 2
+            + (_PALETTE_RGB[i][1] - green) ** 2
+            + (_PALETTE_RGB[i][2] - blue) ** 2
+        )
+        if len(_NEAREST) < 4096:
+            _NEAREST[key] = index
+    return index
+
+
+def xterm_color(number: int) -> int:
+    """
+    Map a 256-color palette index to the nearest of the 16 colors.
+
+    Args:
+        number: Color number (0-255).
+
+    Returns:
+        Index of the palette color.
+    """
+    if number < 16:
+        return number
+    if number < 232:
+        number -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return nearest_color(levels[number // 36], levels[number // 6 % 6], levels[number % 6])
+    gray = 8 + (number - 232) * 10
+    return nearest_color(gray, gray, gray)
+
+
+def strip_ansi(text: str) -> str:
+    """Remove all escape sequences from text."""
+    return _ESCAPE.sub('', text)
+
+
+def apply_sgr(state: State, params: str) -> State:
+    """
+    Apply the parameters of one SGR sequence to a color state.
+
+    Args:
+        state: Current (foreground, background, bold, underline) state.
+        params: Parameters of the sequence, e.g. ``1;31``.
+
+    Returns:
+        The new state.
+    """
+    foreground, background, bold, underline = state
+    codes = [int(code) if code.isdigit() else 0 for code in re.split('[;:]', params)]
+    index = 0
+    while index < len(codes):
+        code = codes[index]
+        index += 1
+        if code == 0:
+            foreground, background, bold, underline = DEFAULT_STATE
+        elif code == 1:
+            bold = True
+        elif code == 22:
+            bold = False
+        elif code == 4:
+            underline = True
+        elif code == 24:
+            underline = False
+        elif 30 <= code <= 37:
+            foreground = code - 30
+        elif 90 <= code <= 97:
+            foreground = code - 90 + 8
+        elif code == 39:
+            foreground = None
+        elif 40 <= code <= 47:
+            background = code - 40
+        elif 100 <= code <= 107:
+            background = code - 100 + 8
+        elif code == 49:
+            background = None
+        elif code in (38, 48) and index < len(codes):
+            # Extended colors: 5;n (256 colors) or 2;r;g;b (24-bit)
+            color = None
+            if codes[index] == 5 and index + 1 < len(codes):
+                color = xterm_color(min(codes[index + 1], 255))
+                index += 2
+            elif codes[index] == 2 and index + 3 < len(codes):
+                red, green, blue = (min(value, 255) for value in codes[index + 1:index + 4])
+                color = nearest_color(red, green, blue)
+                index += 4
+            else:
+                index = len(codes)
+            if code == 38:
+                foreground = color
+            else:
+                background = color
+    return foreground, background, bold, underline
+
+
+def state_tags(state: State) -> Tuple[str, ...]:
+    """
+    Return the display tags of a color state.
+
+    Args:
+        state: (foreground, background, bold, underline) state.
+
+    Returns:
+        The tags, at most one of each kind.
+    """
+    foreground, background, bold, underline = state
+    if bold:
+        # Bold is shown as the bright variant of the color
+        foreground = 15 if foreground is None else foreground | 8
+    tags = []
+    if foreground is not None:
+        tags.append(FOREGROUND_TAGS[foreground])
+    if background is not None:
+        tags.append(BACKGROUND_TAGS[background])
+    if underline:
+        tags.append(UNDERLINE_TAG)
+    return tuple(tags)
+
+
+class AnsiParser:
+    """Incremental parser turning output text into runs of tagged text."""
+
+    def __init__(self):
+        """Initialize the parser with the default colors."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the current colors and any incomplete escape sequence."""
+        self._pending = ''
+        self._state = DEFAULT_STATE
+        self._tags: Tuple[str, ...] = ()
+
+    def feed(self, text: str) -> Runs:
+        """
+        Parse the next chunk of output.
+
+        Args:
+            text: Output text, possibly cut at any position.
+
+        Returns:
+            Runs of (text, tags) without the escape sequences. The colors at
+            the end of the chunk apply to the next one.
+        """
+        if self._pending:
+            text = self._pending + text
+            self._pending = ''
+
+        # Fast path: no escapes, the whole chunk is one run
+        if '\x1b' not in text:
+            return [(text, self._tags)] if text else []
+
+        incomplete = _INCOMPLETE_ESCAPE.search(text)
+        if incomplete:
+            self._pending = text[incomplete.start():]
+            text = text[:incomplete.start()]
+        return self._parse(text)
+
+    def preview(self, text: str) -> Runs:
+        """
+        Parse text without changing the parser state.
+
+        Used for the unfinished last line, which is redrawn from scratch
+        with every update.
+
+        Args:
+            text: Output text following what was fed so far.
+
+        Returns:
+            Runs of (text, tags); an incomplete trailing escape is dropped.
+        """
+        saved = self._pending, self._state, self._tags
+        try:
+            return self.feed(text)
+        finally:
+            self._pending, self._state, self._tags = saved
+
+    def _parse(self, text: str) -> Runs:
+        """Split text at its escape sequences, applying the SGR ones."""
+        runs: Runs = []
+        state = self._state
+        tags = self._tags
+        # Text, then (CSI parameters, CSI final byte, text) per escape sequence
+        parts = _ESCAPE.split(text)
+        if parts[0]:
+            runs.append((parts[0], tags))
+        for index in range(1, len(parts), 3):
+            if parts[index + 1] == 'm':
+                # Output repeats a handful of sequences, so transitions are cached
+                key = (state, parts[index])
+                transition = _TRANSITIONS.get(key)
+                if transition is None:
+                    new_state = apply_sgr(state, parts[index])
+                    transition = (new_state, state_tags(new_state))
+                    if len(_TRANSITIONS) < MAX_CACHED_TRANSITIONS:
+                        _TRANSITIONS[key] = transition
+                state, tags = transition
+            if parts[index + 2]:
+                runs.append((parts[index + 2], tags))
+        self._state = state
+        self._tags = tags
+        return runs
@@ -5,26 +5,206 @@ Handles the execution of commands with support for Conda environments
 and Docker containers, providing callbacks for GUI updates.
 """
 
+import codecs
+import locale
+import signal
 import subprocess
 import threading
+import time
 import os
 import re
+import uuid
 from typing import Dict, Any, Callable, List, Optional
 
+from .environment_catalog import EnvironmentCatalog
+from .output_stream import TerminalLineBuffer
+from .output_spool import OutputSpool
+from .admission import AdmissionController
+from .metrics import Metrics, run_status
+
+
+# Maximum number of bytes read from a command's output at once
+READ_CHUNK_SIZE = 65536
+
+# Time a cancelled command gets to exit after SIGTERM before SIGKILL, in seconds
+CANCEL_GRACE_PERIOD = 10.0
+
+# Prefix of the names given to the docker containers of runs
+CONTAINER_NAME_PREFIX = "command-wallet-"
+
+
+def _signal_process_group(process: subprocess.Popen, sig: int) -> None:
+    """Send a signal to the process group of a run (or to the process on Windows)."""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        # Already gone
+        pass
+
+
+def _stop_container(container_name: str, grace_period: float) -> None:
+    """Stop the docker container of a run, giving it the grace period to exit."""
+    try:
+        subprocess.run(
+            ['docker', 'stop', '-t', str(int(grace_period)), container_name],
+            capture_output=True,
+            timeout=grace_period + 10
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error stopping docker container {container_name}: {e}")
+
+
+def process_group_alive(pgid: int) -> bool:
+    """
+    Check whether a process group still has processes (POSIX only).
+    
+    Args:
+        pgid: ID of the process group.
+    
+    Returns:
+        True if a process of the group can be signalled.
+    """
+    if os.name != 'posix':
+        return False
+    try:
+        os.killpg(pgid, 0)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def stop_process_group(pgid: int, container_name: Optional[str] = None,
+                       grace_period: float = CANCEL_GRACE_PERIOD) -> None:
+    """
+    Stop a process group left behind by an earlier process (POSIX only).
+    
+    Like cancelling a run, but without its Popen object: the docker
+    container is stopped, then the group gets SIGTERM and SIGKILL if it
+    is still alive after the grace period. Returns once the group is gone.
+    
+    Args:
+        pgid: ID of the process group (the PID of the run's shell).
+        container_name: Name of the run's docker container, if any.
+        grace_period: Time between SIGTERM and SIGKILL, in seconds.
+    """
+    if container_name:
+        _stop_container(container_name, grace_period)
+    if not process_group_alive(pgid):
+        return
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    deadline = time.monotonic() + grace_period
+    while process_group_alive(pgid):
+        if time.monotonic() >= deadline:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            return
+        time.sleep(0.1)
+
+
+class RunHandle:
+    """Controls a run: cancellation, timeout and cleanup of its processes."""
+    
+    def __init__(self, container_name: Optional[str] = None,
+                 grace_period: float = CANCEL_GRACE_PERIOD):
+        """
+        Initialize the run handle.
+        
+        Args:
+            container_name: Name of the run's docker container, stopped on
+                cancel; None for runs outside docker.
+            grace_period: Time between SIGTERM and SIGKILL, in seconds.
+        """
+        self.container_name = container_name
+        self.grace_period = grace_period
+        self.cancel_event = threading.Event()
+        self.cancel_reason: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.admission: Optional[AdmissionController] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run was cancelled (or timed out)."""
+        return self.cancel_event.is_set()
+    
+    def cancel(self, reason: str = 'cancelled') -> None:
+        """
+        Stop the run.
+        
+        A run still waiting for admission never starts. A started run gets
+        its docker container stopped, then SIGTERM to its process group and
+        SIGKILL if it is still alive after the grace period. Returns at once;
+        the stopping happens in a background thread.
+        
+        Args:
+            reason: Why the run is stopped ('cancelled', 'timeout' or
+                'shutdown').
+        """
+        with self._lock:
+            if self.cancel_event.is_set():
+                return
+            self.cancel_reason = reason
+            self.cancel_event.set()
+            process = self.process
+        
+        if self.admission is not None:
+            self.admission.wake()
+        if process is not None:
+            threading.Thread(target=self._terminate, args=(process,), daemon=True).start()
+    
+    def _attach(self, process: subprocess.Popen) -> None:
+        """Record the started process; stop it if the run was cancelled meanwhile."""
+        with self._lock:
+            self.process = process
+            cancelled = self.cancel_event.is_set()
+        if cancelled:
+            threading.Thread(target=self._terminate, args=(process,), daemon=True).start()
+    
+    def _terminate(self, process: subprocess.Popen) -> None:
+        """Stop the run's container and process group."""
+        if self.container_name:
+            _stop_container(self.container_name, self.grace_period)
+        
+        if process.poll() is not None:
+            return
+        _signal_process_group(process, signal.SIGTERM)
+        try:
+            process.wait(self.grace_period)
+        except subprocess.TimeoutExpired:
+            _signal_process_group(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+
 
 class CommandExecutor:
     """Handles command execution with GUI callback support."""
     
-    def __init__(self, output_callback: Callable[[str], None]):
+    def __init__(self, output_callback: Optional[Callable[..., None]] = None):
         """
         Initialize the command executor.
         
         Args:
-            output_callback: Function to call with output text for GUI updates.
+            output_callback: Default function to call with output text for
+                GUI updates. It receives the committed text and, optionally,
+                the current state of the unfinished last line, which replaces
+                the previously reported one.
         """
         self.output_callback = output_callback
+        # Optional admission control; runs start right away without it
+        self.admission: Optional[AdmissionController] = None
+        # Optional run metrics; nothing is counted without them
+        self.metrics: Optional[Metrics] = None
         self.conda_environments = self._get_conda_environments()
         self.docker_images = self._get_docker_images()
+        self._build_catalogs()
     
     def get_conda_environments(self) -> List[str]:
         """Get list of available conda environments."""
@@ -38,40 +218,121 @@ class CommandExecutor:
         """Refresh the lists of conda environments and docker images."""
         self.conda_environments = self._get_conda_environments()
         self.docker_images = self._get_docker_images()
+        self._build_catalogs()
+    
+    def search_conda_environments(self, query: str, limit: int = 50) -> List[str]:
+        """
+        Find conda environments matching a query.
+        
+        Args:
+            query: Text typed by the user.
+            limit: Maximum number of results.
+            
+        Returns:
+            Matching environment names, best match first.
+        """
+        return self.conda_catalog.search(query, limit)
+    
+    def search_docker_images(self, query: str, limit: int = 50) -> List[str]:
+        """
+        Find docker images matching a query.
+        
+        A query like ``repo:tag`` matches repository and tag separately.
+        
+        Args:
+            query: Text typed by the user.
+            limit: Maximum number of results.
+            
+        Returns:
+            Matching image references, best match first.
+        """
+        return self.docker_catalog.search(query, limit)
+    
+    def has_conda_environment(self, name: str) -> bool:
+        """Check whether a conda environment exists."""
+        return name in self.conda_catalog
+    
+    def has_docker_image(self, name: str) -> bool:
+        """Check whether a docker image exists locally."""
+        return name in self.docker_catalog
+    
+    def create_run_handle(self, command_data: Dict[str, Any]) -> RunHandle:
+        """
+        Create the handle of a new run of a command.
+        
+        Docker runs get a unique container name, so they can be stopped.
+        Pass the handle's container name to _prepare_command().
+        
+        Args:
+            command_data: Dictionary containing command information.
+            
+        Returns:
+            The run handle.
+        """
+        container_name = None
+        if command_data['use_docker'] and command_data['docker_image']:
+            container_name = f"{CONTAINER_NAME_PREFIX}{uuid.uuid4().hex[:12]}"
+        return RunHandle(container_name)
     
     def execute_command_async(self, command_data: Dict[str, Any], 
                             config: Dict[str, Any],
-                            completion_callback: Optional[Callable[[], None]] = None) -> None:
+                            completion_callback: Optional[Callable[[Optional[int]], None]] = None,
+                            spool: Optional[OutputSpool] = None,
+                            output_callback: Optional[Callable[..., None]] = None,
+                            handle: Optional[RunHandle] = None) -> RunHandle:
         """
         Execute a command asynchronously.
         
+        Several commands can run at the same time; give each run its own
+        output callback to keep their outputs apart. The command is stopped
+        after its 'timeout' (in seconds), if it has one.
+        
         Args:
             command_data: Dictionary containing command information.
             config: Application configuration.
             completion_callback: Optional callback to run when command completes.
+                It receives the exit code, or None if the command could not run.
+            spool: Optional spool receiving the committed output of the run.
+            output_callback: Output callback of this run; defaults to the
+                executor's output callback.
+            handle: Handle of the run, from create_run_handle(); a new one
+                by default.
+            
+        Returns:
+            The run handle, for cancelling the run.
         """
-        final_command = self._prepare_command(command_data, config)
+        if handle is None:
+            handle = self.create_run_handle(command_data)
+        final_command = self._prepare_command(command_data, config, handle.container_name)
         
         # Run command in separate thread
         thread = threading.Thread(
             target=self._execute_command,
-            args=(final_command, completion_callback)
+            args=(final_command, completion_callback, spool, output_callback or self.output_callback),
+            kwargs={
+                'resource_class': command_data.get('resource_class'),
+                'handle': handle,
+                'timeout': command_data.get('timeout'),
+                'command_name': command_data.get('name'),
+            }
         )
         thread.daemon = True
         thread.start()
+        return handle
     
-    def infer_docker_mounts(self, command: str) -> str:
+    def infer_command_paths(self, command: str) -> List[str]:
         """
-        Infer Docker mounts from command paths.
+        Find the paths mentioned in a command.
         
         Args:
             command: The command string to analyze.
             
         Returns:
-            String containing inferred Docker mount arguments.
+            Absolute, ``~`` and environment variable paths, with ``~``
+            expanded.
         """
         if not command:
-            return ""
+            return []
         
         # Find absolute paths in the command
         path_patterns = [
@@ -90,7 +351,37 @@ class CommandExecutor:
                 # Skip if it's likely a flag or option
                 if not match.startswith('-') and '=' not in match:
                     paths.append(match)
+        return paths
+    
+    def infer_watch_paths(self, command: str) -> List[str]:
+        """
+        Infer the files and directories to watch for rerunning a command.
+        
+        Args:
+            command: The command string to analyze.
+            
+        Returns:
+            Paths mentioned in the command, with environment variables
+            expanded; the filesystem root is left out.
+        """
+        watch_paths = []
+        for path in self.infer_command_paths(command):
+            path = os.path.normpath(os.path.expandvars(path))
+            if path != os.sep and path not in watch_paths:
+                watch_paths.append(path)
+        return watch_paths
+    
+    def infer_docker_mounts(self, command: str) -> str:
+        """
+        Infer Docker mounts from command paths.
         
+        Args:
+            command: The command string to analyze.
+            
+        Returns:
+            String containing inferred Docker mount arguments.
+        """
+        paths = self.infer_command_paths(command)
         if not paths:
             return ""
         
@@ -114,6 +405,11 @@ class CommandExecutor:
         
         return " ".join(mounts)
     
+    def _build_catalogs(self) -> None:
+        """Build the sorted search catalogs for environments and images."""
+        self.conda_catalog = EnvironmentCatalog(self.conda_environments)
+        self.docker_catalog = EnvironmentCatalog(self.docker_images, split_tags=True)
+    
     def _get_conda_environments(self) -> List[str]:
         """Get list of available conda environments."""
         try:
@@ -147,13 +443,15 @@ class CommandExecutor:
         except FileNotFoundError:
             return []
     
-    def _prepare_command(self, command_data: Dict[str, Any], config: Dict[str, Any]) -> str:
+    def _prepare_command(self, command_data: Dict[str, Any], config: Dict[str, Any],
+                         container_name: Optional[str] = None) -> str:
         """
         Prepare the final command based on execution options.
         
         Args:
             command_data: Command configuration.
             config: Application configuration.
+            container_name: Optional name for the docker container.
             
         Returns:
             The final command string to execute.
@@ -183,46 +481,159 @@ class CommandExecutor:
                 
                 volume_mounts = ' '.join(all_mounts)
             
-            return f"docker run --rm -it {volume_mounts} {command_data['docker_image']} {command}"
+            name_option = f"--name {container_name} " if container_name else ''
+            return f"docker run --rm -it {name_option}{volume_mounts} {command_data['docker_image']} {command}"
         else:
             # Run directly
             return command
     
-    def _execute_command(self, command: str, completion_callback: Optional[Callable[[], None]] = None) -> None:
+    def _execute_command(self, command: str,
+                         completion_callback: Optional[Callable[[Optional[int]], None]] = None,
+                         spool: Optional[OutputSpool] = None,
+                         output_callback: Optional[Callable[..., None]] = None,
+                         resource_class: Optional[str] = None,
+                         started_callback: Optional[Callable[[], None]] = None,
+                         handle: Optional[RunHandle] = None,
+                         timeout: Optional[float] = None,
+                         command_name: Optional[str] = None,
+                         process_callback: Optional[Callable[[int], None]] = None) -> None:
         """
         Execute command and update output via callback.
         
+        Output is read in chunks and passed through a TerminalLineBuffer, so
+        carriage-return redraws (progress bars) collapse into the latest
+        state of the line. The output callback receives committed text and
+        the current partial line; partial-line redraws are rate limited.
+        Committed text is also appended to the spool, if one is given.
+        With admission control, the command first waits until it is
+        admitted for its resource class. The command runs in its own process
+        group, so cancelling it through the handle (or the timeout) stops
+        all the processes it started.
+        
         Args:
             command: The command to execute.
             completion_callback: Optional callback to run when command completes.
+            spool: Optional spool receiving the committed output.
+            output_callback: Function receiving the output of this run.
+            resource_class: Resource class of the command, for admission control.
+            started_callback: Optional callback to run once the command is
+                admitted and about to start.
+            handle: Optional handle used to cancel the run.
+            timeout: Optional wall-clock limit of the run, in seconds.
+            command_name: Name of the command, for the run metrics.
+            process_callback: Optional callback receiving the PID of the
+                started shell, which is also the ID of its process group
+                on POSIX.
         """
+        def emit(text: str, partial: str = '') -> None:
+            if spool is not None:
+                spool.append(text)
+            if output_callback is not None:
+                output_callback(text, partial)
+        
+        if handle is None:
+            handle = RunHandle()
+        handle.admission = self.admission
+        
+        exit_code = None
+        ticket = None
+        timer = None
+        metrics = self.metrics
+        started = None
         try:
-            # Start process
+            if self.admission is not None:
+                waited = []
+                
+                def on_wait(reason: str) -> None:
+                    waited.append(reason)
+                    emit(f"Waiting for resources ({reason})...\n")
+                
+                ticket = self.admission.acquire(resource_class, on_wait, handle.cancel_event)
+                if ticket is None:
+                    emit("\n--- Command cancelled before it started ---\n")
+                    return
+                if waited:
+                    emit(f"Admitted after waiting {ticket.waited:.1f} s\n\n")
+            if handle.cancelled:
+                emit("\n--- Command cancelled before it started ---\n")
+                return
+            if started_callback:
+                started_callback()
+            if metrics is not None:
+                metrics.run_started()
+            started = time.monotonic()
+            
+            # Start process in its own process group
+            if os.name == 'posix':
+                group_options = {'start_new_session': True}
+            else:
+                group_options = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
             process = subprocess.Popen(
                 command,
                 shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                bufsize=0,
+                **group_options
             )
+            handle._attach(process)
+            if process_callback:
+                process_callback(process.pid)
+            if timeout:
+                timer = threading.Timer(timeout, handle.cancel, args=('timeout',))
+                timer.daemon = True
+                timer.start()
+            
+            decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors='replace')
+            line_buffer = TerminalLineBuffer()
+            
+            # Read output in chunks as it becomes available
+            fd = process.stdout.fileno()
+            while True:
+                chunk = os.read(fd, READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if metrics is not None:
+                    metrics.inc('output_bytes_total', len(chunk))
+                update = line_buffer.feed(decoder.decode(chunk))
+                if update:
+                    emit(*update)
             
-            # Read output line by line
-            for line in iter(process.stdout.readline, ''):
-                self.output_callback(line)
+            update = line_buffer.feed(decoder.decode(b'', final=True))
+            if update:
+                emit(*update)
+            tail = line_buffer.finish()
+            if tail:
+                emit(tail)
             
-            process.wait()
+            process.stdout.close()
+            exit_code = process.wait()
             
             # Show completion message
-            if process.returncode == 0:
-                self.output_callback(f"\n--- Command completed successfully (exit code: {process.returncode}) ---\n")
+            if handle.cancel_reason == 'timeout':
+                emit(f"\n--- Command timed out after {timeout:g} s (exit code: {process.returncode}) ---\n")
+            elif handle.cancelled:
+                emit(f"\n--- Command cancelled (exit code: {process.returncode}) ---\n")
+            elif process.returncode == 0:
+                emit(f"\n--- Command completed successfully (exit code: {process.returncode}) ---\n")
             else:
-                self.output_callback(f"\n--- Command failed (exit code: {process.returncode}) ---\n")
+                emit(f"\n--- Command failed (exit code: {process.returncode}) ---\n")
                 
         except Exception as e:
-            self.output_callback(f"\nError executing command: {str(e)}\n")
+            emit(f"\nError executing command: {str(e)}\n")
         finally:
+            if timer is not None:
+                timer.cancel()
+            if self.admission is not None:
+                self.admission.release(ticket)
+            if metrics is not None and started is not None:
+                metrics.run_finished(
+                    command_name or "unnamed",
+                    run_status(exit_code, handle.cancel_reason),
+                    time.monotonic() - started
+                )
+            if spool is not None:
+                spool.close()
             # Run completion callback if provided
             if completion_callback:
-                completion_callback()
+                completion_callback(exit_code)
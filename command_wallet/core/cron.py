@@ -0,0 +1,256 @@
+"""
+Cron module for CommandWallet.
+
+Compiles cron expressions into one bitset per field and computes when a
+schedule fires next. Fields accept ``*``, values, ranges, steps, lists and
+month/weekday names; ``@daily``-style macros are expanded. Errors name the
+offending field. Finding the next fire time skips whole months, days and
+hours that cannot match instead of testing every minute.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+
+# Name, minimum and maximum of each field, in expression order
+CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+
+# Names accepted in the month and weekday fields
+MONTH_NAMES = {
+    name: number for number, name in enumerate(
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+         'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1
+    )
+}
+WEEKDAY_NAMES = {
+    name: number for number, name in enumerate(
+        ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+    )
+}
+FIELD_NAMES = {'month': MONTH_NAMES, 'weekday': WEEKDAY_NAMES}
+
+# Shorthand expressions
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+# How far ahead to look for a fire time before giving up (e.g. "0 0 30 2 *")
+MAX_SEARCH_YEARS = 5
+
+
+class CronError(ValueError):
+    """Invalid cron expression."""
+
+    def __init__(self, message: str, field: Optional[str] = None):
+        """
+        Initialize the error.
+
+        Args:
+            message: Description of the problem.
+            field: Name of the offending field, if the problem is in one.
+        """
+        super().__init__(f"{field}: {message}" if field else message)
+        self.field = field
+        self.message = message
+
+
+def _parse_value(text: str, field: str, names: Dict[str, int]) -> int:
+    """Parse a number or a name in a field."""
+    if text.isdigit():
+        return int(text)
+    number = names.get(text.lower())
+    if number is None:
+        raise CronError(f"'{text}' is not a valid value", field)
+    return number
+
+
+def _parse_field(text: str, field: str, minimum: int, maximum: int) -> int:
+    """
+    Parse one cron field into a bitset of allowed values.
+
+    Args:
+        text: Field text (``*``, ``5``, ``1-5``, ``*/15``, ``mon-fri``, ``1,15``...).
+        field: Name of the field, for error messages.
+        minimum: Smallest allowed value.
+        maximum: Largest allowed value.
+
+    Returns:
+        Bitset with bit N set if value N is allowed.
+
+    Raises:
+        CronError: If the field is invalid.
+    """
+    names = FIELD_NAMES.get(field, {})
+    bits = 0
+    for part in text.split(','):
+        if not part:
+            raise CronError("empty list item", field)
+
+        range_text, slash, step_text = part.partition('/')
+        if slash:
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise CronError(f"invalid step '{step_text}' in '{part}'", field)
+            step = int(step_text)
+        else:
+            step = 1
+
+        if range_text == '*':
+            start, end = minimum, maximum
+        elif '-' in range_text:
+            start_text, _, end_text = range_text.partition('-')
+            start = _parse_value(start_text, field, names)
+            end = _parse_value(end_text, field, names)
+            if start > end:
+                raise CronError(f"range '{range_text}' is reversed", field)
+        else:
+            start = _parse_value(range_text, field, names)
+            end = maximum if slash else start
+
+        for value in (start, end):
+            if not minimum <= value <= maximum:
+                raise CronError(f"{value} is outside {minimum}-{maximum}", field)
+
+        for value in range(start, end + 1, step):
+            bits |= 1 << value
+    return bits
+
+
+def _next_bit(bits: int, start: int) -> Optional[int]:
+    """Return the smallest set bit at or after `start`, or None."""
+    remaining = bits >> start
+    if not remaining:
+        return None
+    return start + (remaining & -remaining).bit_length() - 1
+
+
+class CronSchedule:
+    """A compiled cron expression."""
+
+    def __init__(self, expression: str):
+        """
+        Compile a cron expression.
+
+        Args:
+            expression: Five whitespace-separated fields (minute, hour, day
+                of month, month and day of week) or a macro like ``@daily``.
+
+        Raises:
+            CronError: If the expression is invalid.
+        """
+        text = expression.strip()
+        if text.startswith('@'):
+            if text.lower() not in MACROS:
+                raise CronError(f"unknown macro '{text}'")
+            text = MACROS[text.lower()]
+
+        fields = text.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise CronError(f"expected {len(CRON_FIELDS)} fields, got {len(fields)}")
+
+        self.expression = ' '.join(fields)
+        bitsets = [
+            _parse_field(field_text, name, minimum, maximum)
+            for field_text, (name, minimum, maximum) in zip(fields, CRON_FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = bitsets
+
+        # 7 is an alias for Sunday
+        if weekdays & (1 << 7):
+            weekdays = (weekdays | 1) & ~(1 << 7)
+        self.weekdays = weekdays
+
+        # When both day fields are restricted, cron fires if either matches;
+        # like Vixie cron, a field starting with '*' counts as unrestricted
+        self.day_restricted = not fields[2].startswith('*')
+        self.weekday_restricted = not fields[4].startswith('*')
+
+    def matches_day(self, moment: datetime) -> bool:
+        """
+        Check whether a date matches the day-of-month and weekday fields.
+
+        Args:
+            moment: Date to check.
+
+        Returns:
+            True if the schedule can fire on that date.
+        """
+        # datetime.weekday() counts from Monday; cron counts from Sunday
+        day_match = bool(self.days >> moment.day & 1)
+        weekday_match = bool(self.weekdays >> ((moment.weekday() + 1) % 7) & 1)
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_fire(self, after: datetime) -> Optional[datetime]:
+        """
+        Compute the first fire time strictly after a moment.
+
+        Args:
+            after: Moment to start from (naive local time).
+
+        Returns:
+            The next fire time, or None if the schedule never fires.
+        """
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after.year + MAX_SEARCH_YEARS
+
+        while moment.year <= limit:
+            if not self.months >> moment.month & 1:
+                month = _next_bit(self.months, moment.month + 1)
+                if month is None:
+                    moment = datetime(moment.year + 1, 1, 1)
+                else:
+                    moment = datetime(moment.year, month, 1)
+                continue
+
+            if not self.matches_day(moment):
+                moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+                continue
+
+            hour = _next_bit(self.hours, moment.hour)
+            if hour is None:
+                moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+                continue
+            if hour != moment.hour:
+                moment = moment.replace(hour=hour, minute=0)
+
+            minute = _next_bit(self.minutes, moment.minute)
+            if minute is None:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=minute)
+
+        return None
+
+    def next_fire_times(self, after: datetime, count: int) -> List[datetime]:
+        """
+        Compute the next fire times after a moment.
+
+        Args:
+            after: Moment to start from (naive local time).
+            count: Maximum number of fire times.
+
+        Returns:
+            Up to `count` fire times in order; fewer if the schedule stops
+            firing within the search window.
+        """
+        times = []
+        moment = after
+        while len(times) < count:
+            moment = self.next_fire(moment)
+            if moment is None:
+                break
+            times.append(moment)
+        return times
@@ -0,0 +1,268 @@
+"""
+Crontab module for CommandWallet.
+
+Installs the schedules of all commands marked for the system crontab as
+one managed block of the user's crontab. Every entry is preceded by a
+marker comment holding the command ID, so re-exporting only changes the
+entries whose schedule or command changed, leaves lines outside the block
+alone, and writes the crontab once (or not at all if nothing changed).
+"""
+
+import subprocess
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .cron import CronSchedule, CronError
+
+
+BLOCK_BEGIN = "# BEGIN command-wallet (managed block, edits will be overwritten)"
+BLOCK_END = "# END command-wallet"
+ENTRY_MARKER = "# command-wallet:"
+
+
+def get_crontab_expression(command_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the cron expression of a command exported to the system crontab.
+
+    Args:
+        command_data: Command record.
+
+    Returns:
+        The expression, or None if the command is not exported.
+    """
+    schedule = command_data.get('schedule')
+    if not schedule or not schedule.get('crontab') or not schedule.get('expression'):
+        return None
+    return schedule['expression']
+
+
+def render_entry(command_id: str, command_data: Dict[str, Any], final_command: str) -> List[str]:
+    """
+    Render the crontab lines of one command.
+
+    Args:
+        command_id: ID of the command.
+        command_data: Command record.
+        final_command: Command line as prepared by the executor.
+
+    Returns:
+        The marker line and the schedule line.
+
+    Raises:
+        CronError: If the schedule or the command cannot go in a crontab.
+    """
+    expression = CronSchedule(get_crontab_expression(command_data) or '').expression
+    if '\n' in final_command:
+        raise CronError("command spans several lines")
+    # '%' means newline in crontab command fields
+    command = final_command.replace('%', '\\%')
+    name = ' '.join(command_data.get('name', '').split())
+    return [f"{ENTRY_MARKER}{command_id} {name}".rstrip(), f"{expression} {command}"]
+
+
+def _split_entries(lines: List[str], strict: bool) -> Tuple[Dict[str, List[str]], List[str], List[str]]:
+    """
+    Group the lines of a managed block into entries.
+
+    Args:
+        lines: Lines between the block markers.
+        strict: Whether an entry is only its marker and schedule line; other
+            lines are then returned as not managed.
+
+    Returns:
+        Tuple of (entries by command ID, IDs in block order, lines not part
+        of an entry).
+    """
+    entries: Dict[str, List[str]] = {}
+    order: List[str] = []
+    loose: List[str] = []
+    current = None
+    for line in lines:
+        if line.startswith(ENTRY_MARKER):
+            current = line[len(ENTRY_MARKER):].split(' ', 1)[0]
+            entries[current] = [line]
+            order.append(current)
+        elif current is not None and (not strict or len(entries[current]) < 2):
+            entries[current].append(line)
+        else:
+            loose.append(line)
+    return entries, order, loose
+
+
+def split_crontab(text: str) -> Tuple[List[str], List[str], Dict[str, List[str]], List[str]]:
+    """
+    Split a crontab into the managed block and the surrounding lines.
+
+    A block whose end marker was removed by hand keeps only its entries
+    (marker and schedule line); the other lines after the begin marker are
+    the user's and count as lines after the block.
+
+    Args:
+        text: Crontab content.
+
+    Returns:
+        Tuple of (lines before the block, lines after the block, entries of
+        the block by command ID in block order, IDs in block order).
+    """
+    before: List[str] = []
+    block: List[str] = []
+    after: List[str] = []
+
+    state = 'before'
+    for line in text.splitlines():
+        if state == 'before':
+            if line == BLOCK_BEGIN:
+                state = 'block'
+            else:
+                before.append(line)
+        elif state == 'block':
+            if line == BLOCK_END:
+                state = 'after'
+            else:
+                block.append(line)
+        else:
+            after.append(line)
+
+    if state == 'block':
+        print("Error: the command-wallet block of the crontab has no end marker, "
+              "keeping the lines that are not its entries")
+        entries, order, loose = _split_entries(block, strict=True)
+        return before, loose, entries, order
+
+    entries, order, _ = _split_entries(block, strict=False)
+    return before, after, entries, order
+
+
+class CrontabManager:
+    """Reads and writes the user's crontab through the crontab binary."""
+
+    def __init__(self, binary: str = 'crontab'):
+        """
+        Initialize the crontab manager.
+
+        Args:
+            binary: Path or name of the crontab executable (a fake one can
+                be given for testing).
+        """
+        self.binary = binary
+
+    def read(self) -> str:
+        """
+        Read the current crontab.
+
+        Returns:
+            The crontab content; empty if the user has no crontab.
+
+        Raises:
+            OSError: If the crontab binary cannot be run or fails.
+        """
+        result = subprocess.run([self.binary, '-l'], capture_output=True, text=True)
+        if result.returncode != 0:
+            if 'no crontab' in result.stderr.lower():
+                return ''
+            raise OSError(f"{self.binary} -l failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def write(self, text: str) -> None:
+        """
+        Replace the crontab.
+
+        Args:
+            text: New crontab content.
+
+        Raises:
+            OSError: If the crontab binary cannot be run or fails.
+        """
+        result = subprocess.run([self.binary, '-'], input=text, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise OSError(f"{self.binary} - failed: {result.stderr.strip()}")
+
+    def plan(self, commands: Dict[str, Any],
+             prepare_command: Callable[[Dict[str, Any]], str]) -> Dict[str, Any]:
+        """
+        Compute the crontab that exports all marked commands.
+
+        Entries already in the managed block keep their position; new ones
+        are appended and entries of commands no longer exported are removed.
+
+        Args:
+            commands: Dictionary of all commands.
+            prepare_command: Function building the final command line.
+
+        Returns:
+            Dict with the new crontab 'text', the 'added', 'changed',
+            'removed' and 'unchanged' command IDs, and 'errors' mapping
+            command IDs of skipped commands to messages.
+
+        Raises:
+            OSError: If the current crontab cannot be read.
+        """
+        before, after, old_entries, old_order = split_crontab(self.read())
+
+        new_entries: Dict[str, List[str]] = {}
+        errors: Dict[str, str] = {}
+        for command_id, command_data in commands.items():
+            if get_crontab_expression(command_data) is None:
+                continue
+            try:
+                new_entries[command_id] = render_entry(
+                    command_id, command_data, prepare_command(command_data)
+                )
+            except CronError as e:
+                errors[command_id] = str(e)
+                # Keep the previous entry of a command that became invalid
+                if command_id in old_entries:
+                    new_entries[command_id] = old_entries[command_id]
+
+        order = [command_id for command_id in old_order if command_id in new_entries]
+        order += [command_id for command_id in new_entries if command_id not in old_entries]
+
+        added = [command_id for command_id in order if command_id not in old_entries]
+        changed = [
+            command_id for command_id in order
+            if command_id in old_entries and old_entries[command_id] != new_entries[command_id]
+        ]
+        unchanged = [
+            command_id for command_id in order
+            if old_entries.get(command_id) == new_entries[command_id]
+        ]
+        removed = [command_id for command_id in old_order if command_id not in new_entries]
+
+        lines = list(before)
+        if order:
+            if lines and lines[-1].strip():
+                lines.append('')
+            lines.append(BLOCK_BEGIN)
+            for command_id in order:
+                lines.extend(new_entries[command_id])
+            lines.append(BLOCK_END)
+        lines.extend(after)
+
+        return {
+            'text': '\n'.join(lines) + '\n' if lines else '',
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'unchanged': unchanged,
+            'errors': errors,
+        }
+
+    def install(self, commands: Dict[str, Any],
+                prepare_command: Callable[[Dict[str, Any]], str]) -> Dict[str, Any]:
+        """
+        Export all marked commands, writing the crontab only if it changed.
+
+        Args:
+            commands: Dictionary of all commands.
+            prepare_command: Function building the final command line.
+
+        Returns:
+            The plan (see plan()) with a 'written' flag added.
+
+        Raises:
+            OSError: If the crontab cannot be read or written.
+        """
+        plan = self.plan(commands, prepare_command)
+        plan['written'] = bool(plan['added'] or plan['changed'] or plan['removed'])
+        if plan['written']:
+            self.write(plan['text'])
+        return plan
@@ -6,22 +6,51 @@ Handles loading and saving of commands and configuration data to JSON files.
 
 import json
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from .search_index import CommandSearchIndex
+from .frecency import FrecencyOrder, new_counter, record_run
+from .log_archive import list_runs
+from .metrics import Metrics
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows, where the runner daemon does not run either
+    fcntl = None
+
+
+def _lock_file(f) -> None:
+    """Lock an open file exclusively until it is closed (no-op without fcntl)."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
 
 class DataManager:
     """Manages data persistence for commands and configuration."""
     
     def __init__(self):
         """Initialize the data manager."""
-        # Create config directory in user home
+        # Create config directory in user home, private since it holds
+        # the runner daemon's socket and the run logs
         self.config_dir = os.path.join(os.path.expanduser("~"), ".command-wallet")
         if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
+            os.makedirs(self.config_dir, mode=0o700)
         
         self.data_file = os.path.join(self.config_dir, "commands.json")
         self.config_file = os.path.join(self.config_dir, "config.json")
+        self.runs_dir = os.path.join(self.config_dir, "runs")
+        # Runs recorded by other processes (runner daemon, command line),
+        # merged into the commands by the process saving them
+        self.pending_runs_file = os.path.join(self.config_dir, "pending_runs.jsonl")
+        
+        # In-memory search index, kept in sync by the mutation methods below
+        self.search_index = CommandSearchIndex()
+        self.frecency_order = FrecencyOrder()
+        # Optional metrics receiving the save latencies
+        self.metrics: Optional[Metrics] = None
     
     def load_commands(self) -> Dict[str, Any]:
         """
@@ -35,7 +64,11 @@ class DataManager:
                 with open(self.data_file, 'r') as f:
                     commands = json.load(f)
                 self._ensure_command_data_schema(commands)
+                self.search_index.rebuild(commands)
+                self.frecency_order.rebuild(commands)
                 return commands
+            self.search_index.rebuild({})
+            self.frecency_order.rebuild({})
             return {}
         except Exception as e:
             print(f"Error loading commands: {e}")
@@ -45,15 +78,22 @@ class DataManager:
         """
         Save commands to JSON file.
         
+        Runs recorded by other processes since the last load or save are
+        merged into the commands first.
+        
         Args:
             commands: Dictionary of commands to save.
             
         Returns:
             True if successful, False otherwise.
         """
+        started = time.perf_counter()
+        self.merge_pending_runs(commands)
         try:
             with open(self.data_file, 'w') as f:
                 json.dump(commands, f, indent=2)
+            if self.metrics is not None:
+                self.metrics.save_latency.observe('commands', time.perf_counter() - started)
             return True
         except Exception as e:
             print(f"Error saving commands: {e}")
@@ -67,7 +107,26 @@ class DataManager:
             Dict containing configuration data.
         """
         default_config = {
-            'fixed_docker_mounts': []
+            'fixed_docker_mounts': [],
+            'crontab_binary': 'crontab',
+            'max_scheduled_jobs': 4,
+            'use_runner_daemon': False,
+            'max_running_weight': None,
+            'max_load_average': None,
+            'min_available_memory_mb': None,
+            'resource_weights': {},
+            'stall_threshold_seconds': 30,
+            'diff_mask_volatile': True,
+            'diff_masks': [],
+            'log_compression': True,
+            'log_keep_runs': 50,
+            'log_max_age_days': 90,
+            'log_max_total_mb': 1024,
+            'metrics_enabled': False,
+            'metrics_dir': None,
+            'metrics_interval_seconds': 15,
+            'metrics_port': None,
+            'daemon_metrics_port': None
         }
         
         try:
@@ -91,9 +150,12 @@ class DataManager:
         Returns:
             True if successful, False otherwise.
         """
+        started = time.perf_counter()
         try:
             with open(self.config_file, 'w') as f:
                 json.dump(config, f, indent=2)
+            if self.metrics is not None:
+                self.metrics.save_latency.observe('config', time.perf_counter() - started)
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
@@ -121,22 +183,173 @@ class DataManager:
             'use_docker': False,
             'docker_image': '',
             'volume_mounts': '',
-            'last_execution': None
+            'last_execution': None,
+            'execution_count': 0,
+            'frecency': new_counter(),
+            'schedule': None,
+            'on_interrupt': 'fail',
+            'resource_class': 'light',
+            'timeout': None,
+            'watch_globs': ''
         }
+        self.search_index.add(command_id, commands[command_id])
+        self.frecency_order.update(command_id, commands[command_id])
         
         return command_id
     
-    def update_command_execution_time(self, commands: Dict[str, Any], command_id: str) -> None:
+    def update_command(self, commands: Dict[str, Any], command_id: str, fields: Dict[str, Any]) -> None:
         """
-        Update the last execution time for a command.
+        Update fields of an existing command.
         
         Args:
             commands: Commands dictionary.
             command_id: ID of the command to update.
+            fields: Fields to set on the command.
         """
         if command_id in commands:
-            execution_time = datetime.now()
+            commands[command_id].update(fields)
+            self.search_index.update(command_id, commands[command_id])
+    
+    def delete_command(self, commands: Dict[str, Any], command_id: str) -> None:
+        """
+        Delete a command.
+        
+        Args:
+            commands: Commands dictionary.
+            command_id: ID of the command to delete.
+        """
+        if command_id in commands:
+            del commands[command_id]
+            self.search_index.remove(command_id)
+            self.frecency_order.remove(command_id)
+    
+    def search_commands(self, query: str, limit: int = 100) -> List[str]:
+        """
+        Search commands by name and command text.
+        
+        Args:
+            query: Search text.
+            limit: Maximum number of results.
+            
+        Returns:
+            Matching command IDs ranked by match quality and usage.
+        """
+        return self.search_index.search(query, limit)
+    
+    def get_commands_by_frecency(self) -> List[str]:
+        """
+        Get command IDs ordered by frecency (run frequency and recency).
+        
+        Returns:
+            Command IDs, highest frecency first.
+        """
+        return self.frecency_order.ids()
+    
+    def create_run_log_path(self, command_id: str) -> str:
+        """
+        Get a new file path for the output log of a command run.
+        
+        Args:
+            command_id: ID of the command being run.
+            
+        Returns:
+            Path of the log file, inside a per-command runs directory.
+        """
+        command_dir = os.path.join(self.runs_dir, command_id)
+        os.makedirs(command_dir, exist_ok=True)
+        run_name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return os.path.join(command_dir, f"{run_name}.log")
+    
+    def list_run_logs(self, command_id: str) -> List[str]:
+        """
+        List the output logs of a command's finished runs.
+        
+        Runs still writing their log are left out.
+        
+        Args:
+            command_id: ID of the command.
+            
+        Returns:
+            Paths of the log files (archived ones compressed), oldest run first.
+        """
+        runs = list_runs(os.path.join(self.runs_dir, command_id))
+        return [run.path for run in runs if run.path and run.finished]
+    
+    def update_command_execution_time(self, commands: Dict[str, Any], command_id: str,
+                                      execution_time: Optional[datetime] = None) -> None:
+        """
+        Update the last execution time and run counters for a command.
+        
+        Args:
+            commands: Commands dictionary.
+            command_id: ID of the command to update.
+            execution_time: When the command ran; defaults to now.
+        """
+        if command_id in commands:
+            execution_time = execution_time or datetime.now()
             commands[command_id]['last_execution'] = execution_time.strftime("%Y-%m-%d %H:%M:%S")
+            commands[command_id]['execution_count'] = commands[command_id].get('execution_count', 0) + 1
+            commands[command_id]['frecency'] = record_run(
+                commands[command_id].get('frecency'), execution_time.timestamp()
+            )
+            self.search_index.update(command_id, commands[command_id])
+            self.frecency_order.update(command_id, commands[command_id])
+    
+    def record_runs(self, command_ids: List[str]) -> None:
+        """
+        Record runs started by a process that does not own the commands file.
+        
+        The runs are appended to a side file instead of saving the commands,
+        which would overwrite unsaved edits of a running GUI; the GUI merges
+        them on startup and on every save_commands().
+        
+        Args:
+            command_ids: IDs of the commands that ran.
+        """
+        now = time.time()
+        lines = ''.join(json.dumps({'command_id': command_id, 'time': now}) + '\n'
+                        for command_id in command_ids)
+        try:
+            with open(self.pending_runs_file, 'a') as f:
+                _lock_file(f)
+                f.write(lines)
+        except OSError as e:
+            print(f"Error recording runs: {e}")
+    
+    def merge_pending_runs(self, commands: Dict[str, Any]) -> bool:
+        """
+        Merge the runs recorded by record_runs() into the commands.
+        
+        Args:
+            commands: Commands dictionary to update.
+            
+        Returns:
+            True if any run was merged.
+        """
+        if not os.path.exists(self.pending_runs_file):
+            return False
+        try:
+            with open(self.pending_runs_file, 'r+') as f:
+                _lock_file(f)
+                lines = f.readlines()
+                f.seek(0)
+                f.truncate()
+        except OSError as e:
+            print(f"Error reading recorded runs: {e}")
+            return False
+        
+        merged = False
+        for line in lines:
+            try:
+                run = json.loads(line)
+                command_id = run['command_id']
+                execution_time = datetime.fromtimestamp(run['time'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if command_id in commands:
+                self.update_command_execution_time(commands, command_id, execution_time)
+                merged = True
+        return merged
     
     def _ensure_command_data_schema(self, commands: Dict[str, Any]) -> None:
         """
@@ -150,3 +363,39 @@ class DataManager:
                 command_data['volume_mounts'] = ''
             if 'last_execution' not in command_data:
                 command_data['last_execution'] = None
+            if 'execution_count' not in command_data:
+                command_data['execution_count'] = 1 if command_data['last_execution'] else 0
+            if 'frecency' not in command_data:
+                command_data['frecency'] = self._seed_frecency(command_data)
+            if 'schedule' not in command_data:
+                command_data['schedule'] = None
+            if 'on_interrupt' not in command_data:
+                command_data['on_interrupt'] = 'fail'
+            if 'resource_class' not in command_data:
+                command_data['resource_class'] = 'light'
+            if 'timeout' not in command_data:
+                command_data['timeout'] = None
+            if 'watch_globs' not in command_data:
+                command_data['watch_globs'] = ''
+    
+    def _seed_frecency(self, command_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a frecency counter for a command saved before counters existed.
+        
+        All known runs are attributed to the last execution time.
+        
+        Args:
+            command_data: Command record.
+            
+        Returns:
+            The seeded frecency counter.
+        """
+        counter = new_counter()
+        last_exec = command_data.get('last_execution')
+        if last_exec:
+            try:
+                updated = datetime.strptime(last_exec, "%Y-%m-%d %H:%M:%S").timestamp()
+                counter = {'score': float(command_data.get('execution_count') or 1), 'updated': updated}
+            except ValueError:
+                pass
+        return counter
@@ -0,0 +1,169 @@
+"""
+Environment catalog module for CommandWallet.
+
+Provides a sorted, prefix-indexed catalog of Conda environments or Docker
+images that answers ranked, capped filter queries for the GUI combos.
+"""
+
+from bisect import bisect_left
+from typing import List, Tuple
+
+
+# Ranks for each kind of match, best first
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_BASENAME_PREFIX = 2
+RANK_SUBSTRING = 3
+RANK_TAG_ONLY = 4
+
+
+def split_image_name(image: str) -> Tuple[str, str]:
+    """
+    Split a Docker image reference into repository and tag.
+
+    Registry ports (``host:5000/repo``) are kept in the repository.
+
+    Args:
+        image: Image reference such as ``repo/name:tag``.
+
+    Returns:
+        Tuple of (repository, tag); tag is empty if the image has none.
+    """
+    repository, sep, tag = image.rpartition(':')
+    if not sep or '/' in tag:
+        return image, ''
+    return repository, tag
+
+
+class EnvironmentCatalog:
+    """Sorted catalog of names with prefix lookups and ranked filtering."""
+
+    def __init__(self, names: List[str], split_tags: bool = False):
+        """
+        Initialize the catalog.
+
+        Args:
+            names: Environment or image names.
+            split_tags: Whether names are Docker images whose repository and
+                tag should be matched separately.
+        """
+        self.split_tags = split_tags
+        # Exact names, for membership tests (keys differing only in case collide)
+        self._names = frozenset(names)
+
+        # Sorted lowercase keys for bisect prefix lookups on the full name
+        entries = sorted((name.lower(), name) for name in set(names))
+        self._keys = [key for key, _ in entries]
+        self._sorted = [name for _, name in entries]
+
+        # Repository and tag columns, aligned with the sorted names
+        self._repositories: List[str] = []
+        self._tags: List[str] = []
+        for key in self._keys:
+            repository, tag = split_image_name(key) if split_tags else (key, '')
+            self._repositories.append(repository)
+            self._tags.append(tag)
+
+        # Sorted index of repository basenames (``library/ubuntu`` -> ``ubuntu``)
+        self._basenames = sorted(
+            (repository.rsplit('/', 1)[-1], position)
+            for position, repository in enumerate(self._repositories)
+        )
+
+    def __len__(self) -> int:
+        """Return the number of distinct names."""
+        return len(self._sorted)
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether a name is in the catalog."""
+        return name in self._names
+
+    def first(self, limit: int) -> List[str]:
+        """
+        Get the first names in sorted order.
+
+        Args:
+            limit: Maximum number of names.
+
+        Returns:
+            Up to `limit` names.
+        """
+        return self._sorted[:limit]
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """
+        Find names matching a query, best match first.
+
+        Exact and prefix matches are found by bisecting the sorted keys and
+        the basename index; substring matches are only scanned for when the
+        prefix matches do not fill the result. For Docker images a query of
+        the form ``repo:tag`` matches the repository and tag separately.
+
+        Args:
+            query: Text typed by the user.
+            limit: Maximum number of results.
+
+        Returns:
+            Up to `limit` matching names.
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return self.first(limit)
+
+        if self.split_tags and ':' in needle:
+            repository_needle, _, tag_needle = needle.partition(':')
+        else:
+            repository_needle, tag_needle = needle, None
+
+        # Prefix ranges can be huge for one-letter queries; only the first
+        # few entries of each are needed to fill a capped result
+        scan_cap = limit * 4
+        ranks = {}
+
+        def add(position: int, rank: int) -> None:
+            if rank < ranks.get(position, RANK_TAG_ONLY + 1):
+                ranks[position] = rank
+
+        # Prefix matches on the full name
+        for position in self._prefix_range(self._keys, needle)[:scan_cap]:
+            add(position, RANK_EXACT if self._keys[position] == needle else RANK_PREFIX)
+
+        # Prefix matches on the repository basename
+        if repository_needle:
+            start = bisect_left(self._basenames, (repository_needle,))
+            for basename, position in self._basenames[start:start + scan_cap]:
+                if not basename.startswith(repository_needle):
+                    break
+                if tag_needle is None or self._tags[position].startswith(tag_needle):
+                    add(position, RANK_BASENAME_PREFIX)
+
+        if len(ranks) < limit:
+            self._substring_matches(repository_needle, tag_needle, add)
+
+        ordered = sorted(ranks, key=lambda p: (ranks[p], len(self._keys[p]), self._keys[p]))
+        return [self._sorted[position] for position in ordered[:limit]]
+
+    def _substring_matches(self, repository_needle: str, tag_needle, add) -> None:
+        """Scan the repository and tag columns for substring matches."""
+        repositories = self._repositories
+        tags = self._tags
+
+        if tag_needle is not None:
+            for position, repository in enumerate(repositories):
+                if repository_needle in repository and tag_needle in tags[position]:
+                    add(position, RANK_SUBSTRING)
+            return
+
+        for position, repository in enumerate(repositories):
+            if repository_needle in repository:
+                add(position, RANK_SUBSTRING)
+            elif repository_needle in tags[position]:
+                add(position, RANK_TAG_ONLY)
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> range:
+        """Return the positions of sorted keys starting with a prefix."""
+        start = bisect_left(keys, prefix)
+        # U+FFFF sorts after any character that can follow the prefix
+        end = bisect_left(keys, prefix + '\uffff', start)
+        return range(start, end)
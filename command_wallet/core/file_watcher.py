@@ -0,0 +1,327 @@
+"""
+File watcher module for CommandWallet.
+
+Detects changes under a set of files and directories by polling stat
+snapshots, for rerunning a command when its inputs change. The directory
+tree is cached: a directory is only listed again when its own mtime
+changes (an entry was added, removed or renamed), otherwise only its files
+are stat'ed. The poll interval stretches with the cost of a poll, so very
+large trees cost a bounded share of one CPU.
+"""
+
+import fnmatch
+import glob
+import os
+import stat
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Directory names never descended into
+IGNORED_DIRECTORIES = frozenset({
+    '.git', '.hg', '.svn', '__pycache__', 'node_modules',
+    '.venv', '.mypy_cache', '.pytest_cache', '.tox',
+})
+
+# Maximum number of files and directories watched by one poller
+MAX_WATCHED_ENTRIES = 50000
+
+# Shortest time between two polls, in seconds
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Quiet time after a change before the change is reported, in seconds
+DEFAULT_DEBOUNCE = 0.3
+
+# A poll may take at most this share of the time between two polls
+MAX_POLL_DUTY = 0.05
+
+
+def split_glob(pattern: str) -> Tuple[str, str]:
+    """
+    Split a glob pattern into the directory to watch and the full pattern.
+
+    Args:
+        pattern: Glob pattern (``~`` and environment variables are expanded,
+            relative patterns are relative to the current directory).
+
+    Returns:
+        Tuple of (deepest directory without wildcards, absolute pattern).
+    """
+    pattern = os.path.abspath(os.path.expandvars(os.path.expanduser(pattern)))
+    parts = pattern.split(os.sep)
+    root_parts = []
+    for part in parts:
+        if glob.has_magic(part):
+            break
+        root_parts.append(part)
+    return os.sep.join(root_parts) or os.sep, pattern
+
+
+class StatPoller:
+    """Stat-snapshot poller over files, directory trees and glob patterns."""
+
+    def __init__(self, paths: Iterable[str], patterns: Iterable[str] = (),
+                 ignore_paths: Iterable[str] = (),
+                 max_entries: int = MAX_WATCHED_ENTRIES):
+        """
+        Initialize the poller and take the first snapshot.
+
+        Args:
+            paths: Files and directories to watch; directories are watched
+                recursively. Paths that do not exist yet are watched for
+                creation.
+            patterns: Glob patterns; changes are reported only for matching
+                paths. ``*`` also matches ``/``, so ``src/*.py`` covers the
+                whole tree below ``src``.
+            ignore_paths: Directories never watched (e.g. where run logs are
+                written, which would retrigger the command).
+            max_entries: Maximum number of entries watched; deeper parts of
+                larger trees are ignored.
+        """
+        self.roots: Dict[str, Optional[List[str]]] = {}
+        for path in paths:
+            path = os.path.abspath(os.path.expandvars(os.path.expanduser(path)))
+            self.roots[path] = None
+        for pattern in patterns:
+            root, full_pattern = split_glob(pattern)
+            filters = self.roots.setdefault(root, [])
+            if filters is not None:
+                filters.append(full_pattern)
+
+        self.ignore_paths = [os.path.abspath(path) for path in ignore_paths]
+        self.max_entries = max_entries
+        self.truncated = False
+        # Files: path -> (mtime_ns, size); directories: path -> (mtime_ns, entry names)
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+        self.last_poll_duration = 0.0
+
+        # The first snapshot reports nothing
+        self._reporting = False
+        for root in self.roots:
+            self._scan(root, set())
+        self._reporting = True
+
+    def entry_count(self) -> int:
+        """Return the number of watched files and directories."""
+        return len(self._files) + len(self._dirs)
+
+    def poll(self) -> Set[str]:
+        """
+        Compare the watched tree with the previous snapshot.
+
+        Returns:
+            Paths that were created, modified or deleted since the last poll
+            (only those matching the patterns of their root, if any).
+        """
+        started = time.monotonic()
+        changed: Set[str] = set()
+
+        # Directories whose listing changed are rescanned
+        for path, (mtime, _) in list(self._dirs.items()):
+            if path not in self._dirs:
+                continue
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                self._scan(path, changed)
+
+        # Files are stat'ed for content changes
+        for path, signature in list(self._files.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._files.pop(path, None)
+                changed.add(path)
+                continue
+            if (st.st_mtime_ns, st.st_size) != signature:
+                self._files[path] = (st.st_mtime_ns, st.st_size)
+                changed.add(path)
+
+        # Roots that did not exist may have been created
+        for root in self.roots:
+            if root not in self._files and root not in self._dirs and os.path.exists(root):
+                self._scan(root, changed)
+
+        self.last_poll_duration = time.monotonic() - started
+        return {path for path in changed if self._matches(path)}
+
+    def _scan(self, path: str, changed: Set[str]) -> None:
+        """
+        (Re)read a path into the snapshot, recording differences in `changed`.
+
+        A directory whose listing changed is compared entry by entry; new
+        subtrees are scanned and vanished ones dropped.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._forget(path, changed)
+            return
+
+        if not stat.S_ISDIR(st.st_mode):
+            signature = (st.st_mtime_ns, st.st_size)
+            if self._files.get(path) != signature:
+                self._files[path] = signature
+                if self._reporting:
+                    changed.add(path)
+            return
+
+        try:
+            names = sorted(
+                entry.name for entry in os.scandir(path)
+                if not (entry.name in IGNORED_DIRECTORIES and entry.is_dir(follow_symlinks=False))
+            )
+        except OSError:
+            names = []
+        old = self._dirs.get(path)
+        self._dirs[path] = (st.st_mtime_ns, names)
+
+        old_names = set(old[1]) if old else set()
+        for name in old_names - set(names):
+            self._forget(os.path.join(path, name), changed)
+        for name in names:
+            child = os.path.join(path, name)
+            if name in old_names and (child in self._files or child in self._dirs):
+                continue
+            if self._ignored(child):
+                continue
+            if self.entry_count() >= self.max_entries:
+                if not self.truncated:
+                    self.truncated = True
+                    print(f"Warning: watching only the first {self.max_entries} files and directories")
+                return
+            if self._reporting:
+                changed.add(child)
+            if os.path.isdir(child) and not os.path.islink(child):
+                self._scan(child, changed)
+            else:
+                try:
+                    st = os.stat(child)
+                except OSError:
+                    continue
+                self._files[child] = (st.st_mtime_ns, st.st_size)
+
+    def _forget(self, path: str, changed: Set[str]) -> None:
+        """Drop a vanished path (and its subtree) from the snapshot."""
+        if self._files.pop(path, None) is not None:
+            changed.add(path)
+        if path in self._dirs:
+            _, names = self._dirs.pop(path)
+            changed.add(path)
+            for name in names:
+                self._forget(os.path.join(path, name), changed)
+
+    def _ignored(self, path: str) -> bool:
+        """Check whether a path is inside an ignored directory."""
+        return any(path == ignored or path.startswith(ignored + os.sep) for ignored in self.ignore_paths)
+
+    def _matches(self, path: str) -> bool:
+        """Check whether a changed path matches the filters of its root."""
+        for root, filters in self.roots.items():
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                if filters is None:
+                    return True
+                if any(fnmatch.fnmatch(path, pattern) for pattern in filters):
+                    return True
+        return False
+
+
+class FileWatcher:
+    """Background thread reporting debounced batches of file changes."""
+
+    def __init__(self, paths: Iterable[str], patterns: Iterable[str],
+                 on_change: Callable[[Set[str]], None],
+                 ignore_paths: Iterable[str] = (),
+                 interval: float = DEFAULT_POLL_INTERVAL,
+                 debounce: float = DEFAULT_DEBOUNCE):
+        """
+        Initialize the watcher (not started).
+
+        Args:
+            paths: Files and directories to watch (see StatPoller).
+            patterns: Glob patterns to watch (see StatPoller).
+            on_change: Function called (from the watcher thread) with the
+                changed paths once a burst of changes has settled.
+            ignore_paths: Directories never watched.
+            interval: Shortest time between two polls, in seconds.
+            debounce: Quiet time after the last change before reporting it.
+        """
+        self.paths = list(paths)
+        self.patterns = list(patterns)
+        self.ignore_paths = list(ignore_paths)
+        self.poller: Optional[StatPoller] = None
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Runs of the watched command in flight; their own writes are ignored
+        self._paused = 0
+        # Whether the next poll still ignores changes (the last writes of a run)
+        self._settling = False
+
+    def start(self) -> None:
+        """Start watching."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching; pending changes are dropped."""
+        self._stop_event.set()
+
+    def pause(self) -> None:
+        """
+        Ignore changes until resume(), while the watched command runs.
+
+        A command writing to files it mentions (``sort in.txt -o out.txt``)
+        would otherwise trigger itself forever. Calls nest: every pause()
+        needs its resume().
+        """
+        with self._lock:
+            self._paused += 1
+
+    def resume(self) -> None:
+        """Undo one pause(); changes up to the next poll are still ignored."""
+        with self._lock:
+            self._paused = max(self._paused - 1, 0)
+            self._settling = True
+
+    def _run(self) -> None:
+        """Take the first snapshot, then poll until stopped."""
+        # Scanning a large tree takes a while, so it happens in this thread
+        self.poller = StatPoller(self.paths, self.patterns, self.ignore_paths)
+        pending: Set[str] = set()
+        while True:
+            if pending:
+                delay = self.debounce
+            else:
+                # Keep the polling cost to a small share of the time
+                delay = max(self.interval, self.poller.last_poll_duration / MAX_POLL_DUTY)
+            if self._stop_event.wait(delay):
+                return
+
+            with self._lock:
+                ignoring = self._paused > 0 or self._settling
+                if not self._paused:
+                    self._settling = False
+
+            try:
+                changed = self.poller.poll()
+            except Exception as e:
+                print(f"Error polling watched files: {e}")
+                changed = set()
+
+            if ignoring:
+                # The snapshot takes in the changes without reporting them
+                pending.clear()
+            elif changed:
+                pending |= changed
+            elif pending:
+                batch, pending = pending, set()
+                self.on_change(batch)
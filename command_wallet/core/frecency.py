@@ -0,0 +1,158 @@
+"""
+Frecency module for CommandWallet.
+
+Scores commands by how often and how recently they ran using exponentially
+decayed run counters, and keeps commands ordered by that score.
+
+A counter stores its score at the time of the last update. Because every
+counter decays at the same rate, ``log(score) + DECAY_RATE * updated`` is a
+time-invariant ordering key: the order of two commands only changes when one
+of them runs, so a run moves a single entry instead of re-sorting everything.
+"""
+
+import math
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Half-life of a run's contribution to the score, in seconds (one week)
+FRECENCY_HALF_LIFE = 7 * 24 * 3600
+DECAY_RATE = math.log(2) / FRECENCY_HALF_LIFE
+
+
+def new_counter() -> Dict[str, Any]:
+    """Return the counter of a command that never ran."""
+    return {'score': 0.0, 'updated': None}
+
+
+def decayed_score(counter: Optional[Dict[str, Any]], now: Optional[float] = None) -> float:
+    """
+    Get the current score of a counter.
+
+    Args:
+        counter: Frecency counter stored on a command.
+        now: Unix timestamp to evaluate at (defaults to the current time).
+
+    Returns:
+        The decayed score; roughly the number of runs in the last half-life.
+    """
+    if not counter or not counter.get('updated'):
+        return 0.0
+    now = time.time() if now is None else now
+    age = max(now - counter['updated'], 0.0)
+    return counter['score'] * math.exp(-DECAY_RATE * age)
+
+
+def record_run(counter: Optional[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Count one run in a counter.
+
+    Args:
+        counter: Existing counter, or None.
+        now: Unix timestamp of the run (defaults to the current time).
+
+    Returns:
+        The updated counter.
+    """
+    now = time.time() if now is None else now
+    return {'score': decayed_score(counter, now) + 1.0, 'updated': now}
+
+
+def frecency_key(counter: Optional[Dict[str, Any]]) -> float:
+    """
+    Get the time-invariant ordering key of a counter.
+
+    Args:
+        counter: Frecency counter stored on a command.
+
+    Returns:
+        A key that sorts like the decayed score at any common point in time;
+        commands that never ran get negative infinity.
+    """
+    if not counter or not counter.get('updated') or counter['score'] <= 0:
+        return -math.inf
+    return math.log(counter['score']) + DECAY_RATE * counter['updated']
+
+
+def score_from_key(key: float, now: Optional[float] = None) -> float:
+    """
+    Convert an ordering key back into the decayed score at a point in time.
+
+    Args:
+        key: Key returned by frecency_key.
+        now: Unix timestamp to evaluate at (defaults to the current time).
+
+    Returns:
+        The decayed score.
+    """
+    if key == -math.inf:
+        return 0.0
+    now = time.time() if now is None else now
+    return math.exp(key - DECAY_RATE * now)
+
+
+class FrecencyOrder:
+    """Commands ordered by frecency, maintained incrementally."""
+
+    def __init__(self):
+        """Initialize an empty ordering."""
+        # Sorted ascending by (-key, command_id), i.e. best command first
+        self._entries: List[Tuple[float, str]] = []
+        self._keys: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        """Return the number of ordered commands."""
+        return len(self._entries)
+
+    def rebuild(self, commands: Dict[str, Any]) -> None:
+        """
+        Rebuild the ordering from scratch.
+
+        Args:
+            commands: Dictionary of all commands.
+        """
+        self._keys = {
+            command_id: frecency_key(command_data.get('frecency'))
+            for command_id, command_data in commands.items()
+        }
+        self._entries = sorted((-key, command_id) for command_id, key in self._keys.items())
+
+    def update(self, command_id: str, command_data: Dict[str, Any]) -> None:
+        """
+        Insert a command or move it after its counter changed.
+
+        Args:
+            command_id: ID of the command.
+            command_data: Command record holding the 'frecency' counter.
+        """
+        key = frecency_key(command_data.get('frecency'))
+        old_key = self._keys.get(command_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._remove_entry(command_id, old_key)
+        self._keys[command_id] = key
+        insort(self._entries, (-key, command_id))
+
+    def remove(self, command_id: str) -> None:
+        """
+        Remove a command from the ordering.
+
+        Args:
+            command_id: ID of the command.
+        """
+        old_key = self._keys.pop(command_id, None)
+        if old_key is not None:
+            self._remove_entry(command_id, old_key)
+
+    def ids(self) -> List[str]:
+        """Return command IDs, highest frecency first."""
+        return [command_id for _, command_id in self._entries]
+
+    def _remove_entry(self, command_id: str, key: float) -> None:
+        """Delete the sorted entry of a command."""
+        entry = (-key, command_id)
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
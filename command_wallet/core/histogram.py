@@ -0,0 +1,169 @@
+"""
+Histogram module for CommandWallet.
+
+Provides fixed-bucket latency histograms and a registry of named
+histograms, shared by the GUI instrumentation and the metrics exporter.
+Observing a value costs a bisect and a few additions.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Upper bounds of the latency buckets, in seconds (roughly 1-2.5-5 steps
+# from 0.1 ms to 10 s); larger values go to an overflow bucket
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Thread-safe histogram of observed values with fixed bucket bounds."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record one value.
+
+        Args:
+            value: Observed value, in the unit of the bucket bounds.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile from the buckets.
+
+        The value is interpolated linearly inside the bucket holding the
+        quantile, so it is accurate to the bucket resolution.
+
+        Args:
+            q: Quantile between 0 and 1.
+
+        Returns:
+            The estimated value, or 0.0 if nothing was observed.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+            maximum = self.max
+        if not total:
+            return 0.0
+
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else maximum
+                upper = min(upper, maximum)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return maximum
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """
+        Get cumulative counts per bucket bound, as exposed by Prometheus.
+
+        Returns:
+            List of (upper bound, count of values <= bound) pairs, ending
+            with (inf, total count).
+        """
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of the histogram."""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': [[bound, count] for bound, count in self.cumulative_counts()[:-1]],
+        }
+
+
+class HistogramRegistry:
+    """Named histograms, created on first use."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets: Bucket bounds of the histograms it creates.
+        """
+        self.buckets = buckets
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Histogram:
+        """
+        Get a histogram, creating it if needed.
+
+        Args:
+            name: Name of the histogram.
+
+        Returns:
+            The histogram.
+        """
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a value in a named histogram.
+
+        Args:
+            name: Name of the histogram.
+            value: Observed value.
+        """
+        self.get(name).observe(value)
+
+    def items(self) -> List[Tuple[str, Histogram]]:
+        """Return (name, histogram) pairs sorted by name."""
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def find(self, name: str) -> Optional[Histogram]:
+        """Return a histogram if it exists, without creating it."""
+        return self._histograms.get(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of all histograms."""
+        return {name: histogram.to_dict() for name, histogram in self.items()}
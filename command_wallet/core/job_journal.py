@@ -0,0 +1,121 @@
+"""
+Job journal module for CommandWallet.
+
+Persists the runner daemon's job queue as an append-only file of JSON
+lines. Every line is a partial job record keyed by 'job_id': enqueueing
+writes the full record and state transitions write only the changed
+fields, so appends stay small. Replaying the file merges the lines back
+into full records. The file is periodically compacted by rewriting it with
+one line per job still worth keeping.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Callable, Iterable
+
+
+# Appended lines after which the journal asks to be compacted
+COMPACT_THRESHOLD = 1000
+
+
+class JobJournal:
+    """Append-only, compactable store of job records."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Journal file; created on the first append.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.appended = 0
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Replay the journal.
+
+        Lines that cannot be parsed (e.g. one cut short by a crash) are
+        skipped.
+
+        Returns:
+            Job records by job ID, in the order the jobs were enqueued.
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return records
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        update = json.loads(line)
+                    except ValueError:
+                        continue
+                    job_id = update.get('job_id') if isinstance(update, dict) else None
+                    if job_id is None:
+                        continue
+                    records.setdefault(job_id, {}).update(update)
+        except OSError as e:
+            print(f"Error loading job journal: {e}")
+        return records
+
+    def append(self, update: Dict[str, Any]) -> None:
+        """
+        Append a job record or a partial update of one.
+
+        Args:
+            update: Fields to record; must include 'job_id'.
+        """
+        line = json.dumps(update) + '\n'
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(line)
+                self._file.flush()
+                self.appended += 1
+            except OSError as e:
+                print(f"Error writing job journal: {e}")
+
+    def needs_compaction(self) -> bool:
+        """Check whether enough lines were appended to compact."""
+        return self.appended >= COMPACT_THRESHOLD
+
+    def compact(self, snapshot: Callable[[], Iterable[Dict[str, Any]]]) -> None:
+        """
+        Rewrite the journal with one full line per job.
+
+        The new file is written next to the old one and renamed over it,
+        so a crash during compaction leaves one of the two intact. The
+        snapshot is taken while appends are blocked: an update is either
+        in the snapshot (its change was made before) or appended to the new
+        file afterwards, never lost in the old one.
+
+        Args:
+            snapshot: Function returning the full records of the jobs to keep.
+        """
+        temp_path = self.path + '.tmp'
+        with self._lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    for record in snapshot():
+                        f.write(json.dumps(record) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(temp_path, self.path)
+                self.appended = 0
+            except OSError as e:
+                print(f"Error compacting job journal: {e}")
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,484 @@
+"""
+Log archive module for CommandWallet.
+
+Compresses finished run logs and prunes old ones. An archived log is a
+series of independently compressed blocks (gzip members, or zstd frames
+when the ``zstandard`` package is installed), so it stays readable with
+``zcat``/``zstdcat``, plus a small index of the compressed offset, output
+offset and first line of every block. Any range of lines, in particular
+the tail, can be read by decompressing only the blocks that hold it.
+
+Retention keeps at most the last N runs of each command, drops runs older
+than a maximum age, and prunes the least recently used runs while all
+logs together exceed a byte budget.
+"""
+
+import gzip
+import os
+import queue
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, Any, BinaryIO, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .output_spool import TIMES_SUFFIX
+
+
+# Output size of one independently compressed block, in bytes
+ARCHIVE_BLOCK_SIZE = 1024 * 1024
+
+# Suffixes of archived logs and of their block index
+GZIP_SUFFIX = ".gz"
+ZSTD_SUFFIX = ".zst"
+INDEX_SUFFIX = ".idx"
+
+# Suffix of run logs, archived or not
+LOG_SUFFIX = ".log"
+
+# Number of lines shown when a stored log is opened
+LOG_TAIL_LINES = 5000
+
+# Size of the blocks read backwards to find the tail of an uncompressed log
+TAIL_READ_SIZE = 64 * 1024
+
+
+def archive_suffix(path: str) -> str:
+    """Return the compression suffix of an archived log, or '' for a plain log."""
+    for suffix in (GZIP_SUFFIX, ZSTD_SUFFIX):
+        if path.endswith(LOG_SUFFIX + suffix):
+            return suffix
+    return ''
+
+
+def plain_log_path(path: str) -> str:
+    """Return the path a log had before it was archived."""
+    suffix = archive_suffix(path)
+    return path[:-len(suffix)] if suffix else path
+
+
+def _compress(data: bytes, suffix: str) -> bytes:
+    """Compress one block."""
+    if suffix == ZSTD_SUFFIX:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(data: bytes, suffix: str) -> bytes:
+    """Decompress one block."""
+    if suffix == ZSTD_SUFFIX:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def archive_log(log_path: str, use_zstd: Optional[bool] = None) -> Optional[str]:
+    """
+    Compress a finished run log and remove the original.
+
+    The archive and its index are written under temporary names and
+    renamed into place, so an interrupted compression leaves the original
+    log untouched.
+
+    Args:
+        log_path: Plain run log.
+        use_zstd: Whether to use zstd; defaults to zstd when available.
+
+    Returns:
+        Path of the archive, or None if the log could not be archived.
+    """
+    if use_zstd is None:
+        use_zstd = zstandard is not None
+    suffix = ZSTD_SUFFIX if use_zstd and zstandard is not None else GZIP_SUFFIX
+    archive_path = log_path + suffix
+    temp_path = f"{archive_path}.{os.getpid()}.tmp"
+    temp_index_path = f"{archive_path}{INDEX_SUFFIX}.{os.getpid()}.tmp"
+
+    # Per block: compressed offset, output offset, first line; then the totals
+    index = array('q')
+    try:
+        with open(log_path, 'rb') as source, open(temp_path, 'wb') as target:
+            compressed = output = lines = 0
+            while True:
+                block = source.read(ARCHIVE_BLOCK_SIZE)
+                if not block:
+                    break
+                # Blocks end at line ends, so a line range maps to whole blocks
+                if not block.endswith(b'\n'):
+                    block += source.readline()
+                index.extend((compressed, output, lines))
+                data = _compress(block, suffix)
+                target.write(data)
+                compressed += len(data)
+                output += len(block)
+                lines += block.count(b'\n')
+            index.extend((compressed, output, lines))
+            target.flush()
+            os.fsync(target.fileno())
+        with open(temp_index_path, 'wb') as f:
+            index.tofile(f)
+
+        stat = os.stat(log_path)
+        os.utime(temp_path, (stat.st_atime, stat.st_mtime))
+        os.replace(temp_index_path, archive_path + INDEX_SUFFIX)
+        os.replace(temp_path, archive_path)
+        os.remove(log_path)
+    except OSError as e:
+        print(f"Error archiving run log {log_path}: {e}")
+        for path in (temp_path, temp_index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return None
+    return archive_path
+
+
+def open_log(path: str) -> BinaryIO:
+    """
+    Open a plain or archived run log for streaming its output.
+
+    Args:
+        path: Run log or archive.
+
+    Returns:
+        Binary file object reading the uncompressed output.
+    """
+    suffix = archive_suffix(path)
+    if suffix == GZIP_SUFFIX:
+        return gzip.open(path, 'rb')
+    if suffix == ZSTD_SUFFIX:
+        if zstandard is None:
+            raise OSError(f"reading {path} requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+class ArchivedLog:
+    """Random access to the lines of an archived run log."""
+
+    def __init__(self, path: str):
+        """
+        Open an archive and load its block index.
+
+        Args:
+            path: Archived log (``.log.gz`` or ``.log.zst``).
+
+        Raises:
+            OSError: If the archive or its index cannot be read.
+        """
+        self.path = path
+        self.suffix = archive_suffix(path)
+        if self.suffix == ZSTD_SUFFIX and zstandard is None:
+            raise OSError(f"reading {path} requires the zstandard package")
+        index = array('q')
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            index.frombytes(f.read())
+        if len(index) < 3 or len(index) % 3:
+            raise OSError(f"damaged archive index for {path}")
+        self._compressed = index[0::3]
+        self._output = index[1::3]
+        self._first_lines = index[2::3]
+
+    def line_count(self) -> int:
+        """Return the number of complete lines."""
+        return self._first_lines[-1]
+
+    def size(self) -> int:
+        """Return the uncompressed output size in bytes."""
+        return self._output[-1]
+
+    def read_text(self, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Read the output of a range of lines, decompressing only their blocks.
+
+        Args:
+            start: Index of the first line (0-based).
+            end: Index after the last line; defaults to the end of the output.
+
+        Returns:
+            The output text, including newlines.
+        """
+        total = self.line_count()
+        end = total if end is None else min(end, total)
+        if start >= end and end < total:
+            return ''
+        blocks = len(self._first_lines) - 1
+        first_block = max(bisect_right(self._first_lines, start, 0, blocks) - 1, 0)
+        last_block = max(bisect_right(self._first_lines, max(end - 1, start), 0, blocks) - 1, 0)
+        if end >= total:
+            last_block = blocks - 1
+
+        data = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._compressed[first_block])
+            for block in range(first_block, last_block + 1):
+                compressed = f.read(self._compressed[block + 1] - self._compressed[block])
+                data.append(_decompress(compressed, self.suffix))
+        text = b''.join(data)
+
+        # Cut the lines before `start` and after `end` out of the blocks
+        skip = start - self._first_lines[first_block]
+        position = 0
+        for _ in range(skip):
+            position = text.index(b'\n', position) + 1
+        if end < total:
+            finish = position
+            for _ in range(end - start):
+                finish = text.index(b'\n', finish) + 1
+            text = text[position:finish]
+        else:
+            text = text[position:]
+        return text.decode('utf-8', errors='replace')
+
+
+def read_log_tail(path: str, count: int = LOG_TAIL_LINES) -> Tuple[Optional[int], Optional[int], str]:
+    """
+    Read the last lines of a plain or archived run log.
+
+    Only the end of the log is read: plain logs are read backwards in
+    blocks and archives decompress only their last blocks.
+
+    Args:
+        path: Run log or archive.
+        count: Number of complete lines to read.
+
+    Returns:
+        Tuple of (index of the first line read, number of complete lines
+        in the log, text of the lines read). The line numbers are only
+        known for archives and are None for plain logs.
+
+    Raises:
+        OSError: If the log cannot be read.
+    """
+    if archive_suffix(path):
+        log = ArchivedLog(path)
+        total = log.line_count()
+        first = max(total - count, 0)
+        return first, total, log.read_text(first)
+
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b''
+        # One newline more than lines wanted marks the start of the first one
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(TAIL_READ_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.split(b'\n')
+    if len(lines) > count + 1:
+        lines = lines[-(count + 1):]
+    return None, None, b'\n'.join(lines).decode('utf-8', errors='replace')
+
+
+class RunRecord:
+    """Files of one stored run, for retention."""
+
+    def __init__(self, log_path: str):
+        """
+        Collect the files of a run.
+
+        Args:
+            log_path: Plain path of the run's log (``<run>.log``).
+        """
+        self.log_path = log_path
+        self.paths = [
+            path for path in (
+                log_path,
+                log_path + GZIP_SUFFIX, log_path + GZIP_SUFFIX + INDEX_SUFFIX,
+                log_path + ZSTD_SUFFIX, log_path + ZSTD_SUFFIX + INDEX_SUFFIX,
+                log_path + TIMES_SUFFIX,
+            )
+            if os.path.exists(path)
+        ]
+        # Readable log: the plain one while it exists, else the archive
+        self.path = next(
+            (path for path in self.paths if path == log_path or archive_suffix(path)), None
+        )
+        self.size = 0
+        self.modified = 0.0
+        self.used = 0.0
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.size += stat.st_size
+            self.modified = max(self.modified, stat.st_mtime)
+            self.used = max(self.used, stat.st_atime, stat.st_mtime)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the run ended (its spool saved the line times on close)."""
+        return os.path.exists(self.log_path + TIMES_SUFFIX) or any(
+            archive_suffix(path) for path in self.paths
+        )
+
+    def remove(self) -> None:
+        """Delete all files of the run."""
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing run log {path}: {e}")
+
+
+def list_runs(command_dir: str) -> List[RunRecord]:
+    """
+    List the stored runs of a command.
+
+    Args:
+        command_dir: Runs directory of the command.
+
+    Returns:
+        The runs, oldest first.
+    """
+    try:
+        names = os.listdir(command_dir)
+    except OSError:
+        return []
+    logs = {plain_log_path(name) for name in names if plain_log_path(name).endswith(LOG_SUFFIX)}
+    return [RunRecord(os.path.join(command_dir, name)) for name in sorted(logs)]
+
+
+def touch_log(path: str) -> None:
+    """Mark a stored log as used now, for least-recently-used pruning."""
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+
+def prune_runs(runs_dir: str, keep_runs: Optional[int] = None,
+               max_age_days: Optional[float] = None,
+               max_total_bytes: Optional[int] = None,
+               now: Optional[float] = None) -> List[str]:
+    """
+    Delete stored runs according to the retention limits.
+
+    Runs that are still being written are never deleted.
+
+    Args:
+        runs_dir: Directory holding one runs directory per command.
+        keep_runs: Maximum number of runs kept per command.
+        max_age_days: Maximum age of a run, in days.
+        max_total_bytes: Maximum size of all runs together; the least
+            recently used runs are deleted first.
+        now: Current time (for testing).
+
+    Returns:
+        Plain log paths of the deleted runs.
+    """
+    now = time.time() if now is None else now
+    removed = []
+    kept: List[RunRecord] = []
+    try:
+        command_dirs = sorted(os.listdir(runs_dir))
+    except OSError:
+        return removed
+
+    for name in command_dirs:
+        runs = [run for run in list_runs(os.path.join(runs_dir, name)) if run.finished]
+        for position, run in enumerate(runs):
+            too_many = keep_runs is not None and position < len(runs) - keep_runs
+            too_old = max_age_days is not None and now - run.modified > max_age_days * 86400
+            if too_many or too_old:
+                run.remove()
+                removed.append(run.log_path)
+            else:
+                kept.append(run)
+
+    if max_total_bytes is not None:
+        total = sum(run.size for run in kept)
+        for run in sorted(kept, key=lambda run: run.used):
+            if total <= max_total_bytes:
+                break
+            run.remove()
+            removed.append(run.log_path)
+            total -= run.size
+    return removed
+
+
+class LogArchiver:
+    """Background thread compressing finished run logs and applying retention."""
+
+    def __init__(self, runs_dir: str, config: Dict[str, Any]):
+        """
+        Initialize the archiver (not started).
+
+        Args:
+            runs_dir: Directory holding one runs directory per command.
+            config: Configuration (see configure()).
+        """
+        self.runs_dir = runs_dir
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.configure(config)
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        Apply the archiving settings.
+
+        Args:
+            config: Configuration with the keys 'log_compression' (whether
+                finished logs are compressed), 'log_keep_runs',
+                'log_max_age_days' and 'log_max_total_mb' (None for no
+                limit).
+        """
+        self.compress = config.get('log_compression', True)
+        self.keep_runs = config.get('log_keep_runs')
+        self.max_age_days = config.get('log_max_age_days')
+        max_total_mb = config.get('log_max_total_mb')
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024) if max_total_mb is not None else None
+
+    def start(self) -> None:
+        """Start the thread; it first sweeps the logs left by earlier sessions."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit(self, log_path: str) -> None:
+        """
+        Archive a log whose run just finished, then apply retention.
+
+        Args:
+            log_path: Plain log of the run.
+        """
+        self._queue.put(log_path)
+
+    def sweep(self) -> None:
+        """Archive every finished plain log, then apply retention."""
+        if self.compress:
+            try:
+                command_dirs = sorted(os.listdir(self.runs_dir))
+            except OSError:
+                command_dirs = []
+            for name in command_dirs:
+                for run in list_runs(os.path.join(self.runs_dir, name)):
+                    if run.finished and run.log_path in run.paths:
+                        archive_log(run.log_path)
+        self.prune()
+
+    def prune(self) -> List[str]:
+        """Apply the retention limits; returns the deleted runs."""
+        return prune_runs(self.runs_dir, self.keep_runs, self.max_age_days, self.max_total_bytes)
+
+    def _run(self) -> None:
+        """Sweep once, then archive submitted logs one at a time."""
+        try:
+            self.sweep()
+        except Exception as e:
+            print(f"Error archiving run logs: {e}")
+        while True:
+            log_path = self._queue.get()
+            try:
+                # A log still being written is left for the next sweep
+                if self.compress and RunRecord(log_path).finished and os.path.exists(log_path):
+                    archive_log(log_path)
+                self.prune()
+            except Exception as e:
+                print(f"Error archiving run logs: {e}")
@@ -0,0 +1,369 @@
+"""
+Metrics module for CommandWallet.
+
+Counts runs, output and storage latency, and exposes them with the current
+queue state in the Prometheus text format: as a file rewritten periodically
+(for the node exporter's textfile collector) and, optionally, over HTTP on
+the loopback interface. Metrics are off by default; code paths check for a
+missing Metrics object, so disabled metrics cost a single comparison.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .admission import AdmissionController, WAIT_METRIC
+from .histogram import Histogram, HistogramRegistry
+
+
+# Prefix of all exported metric names
+METRIC_PREFIX = "commandwallet_"
+
+# Upper bounds of the run duration buckets, in seconds (100 ms to 4 h)
+RUN_DURATION_BUCKETS: Tuple[float, ...] = (
+    0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0, 14400.0,
+)
+
+# Time between two writes of the metrics file, in seconds
+DEFAULT_EXPORT_INTERVAL = 15.0
+
+# Address the HTTP endpoint listens on; metrics are never exposed beyond the machine
+METRICS_HOST = "127.0.0.1"
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Counters: name -> help text
+COUNTERS = {
+    'runs_started_total': "Runs that started executing.",
+    'runs_finished_total': "Runs that finished, by status.",
+    'output_bytes_total': "Bytes of output read from commands.",
+}
+
+# Labels of a series, as sorted (name, value) pairs
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def run_status(exit_code: Optional[int], cancel_reason: Optional[str] = None) -> str:
+    """
+    Classify how a run ended.
+
+    Args:
+        exit_code: Exit code of the run, or None if it could not run.
+        cancel_reason: Why the run was cancelled, if it was.
+
+    Returns:
+        'success', 'failure', 'cancelled', 'timeout' or 'error'.
+    """
+    if cancel_reason == 'timeout':
+        return 'timeout'
+    if cancel_reason:
+        return 'cancelled'
+    if exit_code is None:
+        return 'error'
+    return 'success' if exit_code == 0 else 'failure'
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format labels as ``{name="value",...}``."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value; whole numbers are written without a fraction."""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metrics:
+    """Counters, gauges and histograms of one CommandWallet process."""
+
+    def __init__(self, process: str):
+        """
+        Initialize the metrics.
+
+        Args:
+            process: Name of the process ('gui' or 'daemon'), added as a
+                label to every series so both can be scraped together.
+        """
+        self.process = process
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # Gauges: (name, help text, function returning the current value)
+        self._gauges: List[Tuple[str, str, Callable[[], Optional[float]]]] = []
+        # Histogram families: (name, help text, registry, label, prefix of the histogram names)
+        self._histograms: List[Tuple[str, str, HistogramRegistry, str, str]] = []
+        self.run_durations = HistogramRegistry(RUN_DURATION_BUCKETS)
+        self.save_latency = HistogramRegistry()
+        self.add_histograms('run_duration_seconds', "Duration of finished runs, per command.",
+                            self.run_durations, 'command')
+        self.add_histograms('storage_save_seconds', "Time taken to save a data file.",
+                            self.save_latency, 'file')
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name: Counter name, one of COUNTERS.
+            value: Amount to add.
+            **labels: Labels of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def run_started(self) -> None:
+        """Count a run that started executing."""
+        self.inc('runs_started_total')
+
+    def run_finished(self, command: str, status: str, duration: float) -> None:
+        """
+        Count a finished run and record its duration.
+
+        Args:
+            command: Name of the command.
+            status: How the run ended (see run_status()).
+            duration: Time the run took, in seconds.
+        """
+        self.inc('runs_finished_total', status=status)
+        self.run_durations.observe(command, duration)
+
+    def add_gauge(self, name: str, help_text: str,
+                  func: Callable[[], Optional[float]]) -> None:
+        """
+        Export a value read when the metrics are collected.
+
+        Args:
+            name: Gauge name, without the prefix.
+            help_text: Description of the gauge.
+            func: Function returning the current value, or None to skip it.
+        """
+        self._gauges.append((name, help_text, func))
+
+    def add_histograms(self, name: str, help_text: str, registry: HistogramRegistry,
+                       label: str, prefix: str = '') -> None:
+        """
+        Export the histograms of a registry as one histogram family.
+
+        Args:
+            name: Family name, without the prefix.
+            help_text: Description of the family.
+            registry: Registry whose histograms are exported.
+            label: Label holding the name of each histogram.
+            prefix: Only histograms whose names start with it are exported,
+                with the prefix removed from the label.
+        """
+        self._histograms.append((name, help_text, registry, label, prefix))
+
+    def watch_admission(self, admission: AdmissionController) -> None:
+        """
+        Export the queue of an admission controller.
+
+        Args:
+            admission: Admission controller of the process's executor.
+        """
+        self.add_gauge('queue_depth', "Runs waiting to be admitted.", admission.waiting_count)
+        self.add_gauge('active_workers', "Runs currently executing.", lambda: admission.running_count)
+        self.add_gauge('running_weight', "Total resource weight of the executing runs.",
+                       lambda: admission.running_weight)
+        self.add_histograms('admission_wait_seconds', "Time runs waited to be admitted, per resource class.",
+                            admission.registry, 'resource_class', f"{WAIT_METRIC}.")
+
+    def render(self) -> str:
+        """
+        Collect all metrics in the Prometheus text format.
+
+        Returns:
+            The exposition text, ending with a newline.
+        """
+        base: Labels = (('process', self.process),)
+        lines: List[str] = []
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+        for name, help_text in COUNTERS.items():
+            full_name = METRIC_PREFIX + name
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} counter")
+            series = [(labels, value) for (counter, labels), value in counters if counter == name]
+            if not series and name != 'runs_finished_total':
+                series = [((), 0)]
+            for labels, value in series:
+                lines.append(f"{full_name}{_format_labels(base + labels)} {_format_value(value)}")
+
+        for name, help_text, func in self._gauges:
+            try:
+                value = func()
+            except Exception as e:
+                print(f"Error reading metric {name}: {e}")
+                continue
+            if value is None:
+                continue
+            full_name = METRIC_PREFIX + name
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"{full_name}{_format_labels(base)} {_format_value(value)}")
+
+        for name, help_text, registry, label, prefix in self._histograms:
+            full_name = METRIC_PREFIX + name
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for histogram_name, histogram in registry.items():
+                if not histogram_name.startswith(prefix):
+                    continue
+                labels = base + ((label, histogram_name[len(prefix):]),)
+                self._render_histogram(lines, full_name, labels, histogram)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(lines: List[str], name: str, labels: Labels,
+                          histogram: Histogram) -> None:
+        """Append the bucket, sum and count samples of one histogram."""
+        counts = histogram.cumulative_counts()
+        for bound, count in counts:
+            bucket_labels = _format_labels(labels + (('le', _format_value(bound)),))
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {counts[-1][1]}")
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the metrics text on GET /metrics."""
+
+    # Set on the subclass created by MetricsExporter
+    metrics: Metrics
+
+    def do_GET(self) -> None:
+        """Answer a scrape."""
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep scrapes out of the console."""
+
+
+class MetricsExporter:
+    """Writes the metrics to a file periodically and serves them over HTTP."""
+
+    def __init__(self, metrics: Metrics, file_path: Optional[str] = None,
+                 port: Optional[int] = None,
+                 interval: float = DEFAULT_EXPORT_INTERVAL):
+        """
+        Initialize the exporter (not started).
+
+        Args:
+            metrics: Metrics to export.
+            file_path: File rewritten every `interval` seconds, or None.
+            port: Port of the HTTP endpoint on 127.0.0.1, or None for none.
+            interval: Time between two writes of the file, in seconds.
+        """
+        self.metrics = metrics
+        self.file_path = file_path
+        self.port = port
+        self.interval = max(interval, 1.0)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def from_config(cls, metrics: Metrics, config: Dict[str, Any], metrics_dir: str,
+                    port_key: str = 'metrics_port') -> 'MetricsExporter':
+        """
+        Create an exporter from the application configuration.
+
+        The file is named after the process, so the GUI and the daemon can
+        share the metrics directory.
+
+        Args:
+            metrics: Metrics to export.
+            config: Configuration with the metrics_* settings.
+            metrics_dir: Default directory of the metrics file.
+            port_key: Configuration key holding the HTTP port.
+
+        Returns:
+            The exporter.
+        """
+        directory = os.path.expanduser(config.get('metrics_dir') or metrics_dir)
+        return cls(
+            metrics,
+            file_path=os.path.join(directory, f"command_wallet_{metrics.process}.prom"),
+            port=config.get(port_key),
+            interval=float(config.get('metrics_interval_seconds') or DEFAULT_EXPORT_INTERVAL)
+        )
+
+    def start(self) -> None:
+        """Start writing the file and serving the endpoint."""
+        if self.port:
+            handler = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'metrics': self.metrics})
+            try:
+                self._server = ThreadingHTTPServer((METRICS_HOST, int(self.port)), handler)
+            except (OSError, ValueError) as e:
+                print(f"Error starting metrics endpoint on port {self.port}: {e}")
+            else:
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if self.file_path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and write the file one last time."""
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def write_file(self) -> bool:
+        """
+        Write the metrics file atomically, so collectors never see half of it.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.metrics.render())
+            os.replace(tmp_path, self.file_path)
+            return True
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+    def _run(self) -> None:
+        """Rewrite the file every interval until stopped."""
+        while True:
+            started = time.monotonic()
+            self.write_file()
+            if self._stop_event.wait(max(self.interval - (time.monotonic() - started), 0)):
+                self.write_file()
+                return
@@ -0,0 +1,397 @@
+"""
+Output spool module for CommandWallet.
+
+Stores the output of a run in a file (or in memory) together with a
+line-offset index, so very large logs can be searched and paged through
+without going back to the GUI text widget. Every line also gets the
+monotonic time at which it was completed, kept as a compact array of
+seconds since the start of the run and saved next to the log file.
+"""
+
+import io
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from .ansi import strip_ansi
+
+
+# Amount of output scanned at once when searching, in bytes
+SEARCH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Suffix of the file holding the line times of a spooled log
+TIMES_SUFFIX = ".times"
+
+# Escape sequences searches ignore, as bytes within one line (see strip_ansi())
+_ESCAPE_BYTES = re.compile(rb'\x1b\[[0-9;:?]*[ -/]*[@-~]|\x1b\][^\x07\x1b\n]*(?:\x07|\x1b\\)|\x1b')
+
+
+def read_line_times(log_path: str) -> Optional[Tuple[float, List[float]]]:
+    """
+    Read the line times saved next to a run log.
+
+    Args:
+        log_path: Path of the run log.
+
+    Returns:
+        Tuple of (wall-clock start time of the run, seconds since the start
+        at which each line was completed), or None if there are none.
+    """
+    try:
+        with open(log_path + TIMES_SUFFIX, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < 8:
+        return None
+    start = array('d')
+    start.frombytes(data[:8])
+    times = array('f')
+    times.frombytes(data[8:len(data) - (len(data) - 8) % 4])
+    return start[0], times.tolist()
+
+
+def _search_lines(compiled, block: bytes, first_line: int) -> List[int]:
+    """
+    Find the lines of a block of output matching a byte pattern.
+
+    Args:
+        compiled: Compiled byte pattern.
+        block: Complete lines of output.
+        first_line: Index of the first line of the block.
+
+    Returns:
+        Indexes of matching lines, in order.
+    """
+    matches = []
+    # Start of the line being searched from, and the newlines before it
+    position = 0
+    newlines = 0
+    while position < len(block):
+        match = compiled.search(block, position)
+        if not match:
+            break
+        if match.start() == len(block) and block.endswith(b'\n'):
+            # Empty match after the final newline, not a line
+            break
+        newline = block.rfind(b'\n', position, match.start())
+        line_start = position if newline == -1 else newline + 1
+        line_end = block.find(b'\n', match.start())
+        if line_end == -1:
+            line_end = len(block)
+        # A match running into the next line only counts if the line matches alone
+        if match.end() <= line_end or compiled.search(block[line_start:line_end]):
+            matches.append(first_line + newlines + block.count(b'\n', position, line_start))
+        # Continue at the next line, one hit per line is enough
+        newlines += block.count(b'\n', position, line_end + 1)
+        position = line_end + 1
+    return matches
+
+
+class OutputSpool:
+    """Append-only run output with an index of line start offsets."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize the spool.
+
+        An existing file (e.g. the log of a restarted run) is indexed and
+        its saved line times are loaded, so new output continues it.
+
+        Args:
+            path: File to spool the output to. If None, output is kept in memory.
+            max_bytes: Amount of recent output an in-memory spool keeps, in
+                bytes; older lines keep their numbers but read as empty and
+                are not searched. None keeps everything.
+        """
+        self.path = path
+        self.max_bytes = None if path else max_bytes
+        self._file = open(path, 'a+b') if path else io.BytesIO()
+        self._lock = threading.Lock()
+        self._size = 0
+        # Byte offset where each line starts; offsets[0] is always 0
+        self._offsets = array('q', [0])
+        # Seconds since the start at which each complete line was appended
+        self._times = array('f')
+        # Byte offset and index of the first line still held (see max_bytes)
+        self._kept_offset = 0
+        self._kept_line = 0
+        self.start_time = time.time()
+        self._start_monotonic = time.monotonic()
+        if path:
+            self._index_existing()
+
+    def append(self, text: str) -> None:
+        """
+        Append committed output text.
+
+        Every line completed by the text is stamped with the current time.
+
+        Args:
+            text: Output text; it may end in the middle of a line.
+        """
+        if not text:
+            return
+
+        data = text.encode('utf-8')
+        now = time.monotonic() - self._start_monotonic
+        with self._lock:
+            base = self._size
+            self._file.seek(0, io.SEEK_END)
+            self._file.write(data)
+            count = len(self._offsets)
+            self._offsets.extend(base + match.end() for match in re.finditer(b'\n', data))
+            self._times.extend(array('f', [now]) * (len(self._offsets) - count))
+            self._size += len(data)
+            # Trim to max_bytes once twice as much is held, so trimming is rare
+            if self.max_bytes and self._size - self._kept_offset > 2 * self.max_bytes:
+                self._discard_old_output()
+
+    def elapsed(self) -> float:
+        """Return the seconds since the spool was created."""
+        return time.monotonic() - self._start_monotonic
+
+    def load_line_times(self, start_time: float, times: List[float]) -> None:
+        """
+        Replace the line times, e.g. with the saved times of a stored log.
+
+        Args:
+            start_time: Wall-clock start time of the run.
+            times: Seconds since the start at which each line was completed.
+        """
+        with self._lock:
+            self.start_time = start_time
+            self._times = array('f', times)
+
+    def line_times(self, start: int = 0, end: Optional[int] = None) -> List[float]:
+        """
+        Read the completion times of a range of lines.
+
+        Args:
+            start: Index of the first line (0-based).
+            end: Index after the last line; defaults to the last complete line.
+
+        Returns:
+            Seconds since the start of the spool, one per complete line in
+            the range (an unterminated last line has no time yet).
+        """
+        with self._lock:
+            return self._times[start:end].tolist()
+
+    def line_count(self) -> int:
+        """Return the number of lines, counting an unterminated last line."""
+        with self._lock:
+            if self._size > self._offsets[-1]:
+                return len(self._offsets)
+            return len(self._offsets) - 1
+
+    def size(self) -> int:
+        """Return the spooled output size in bytes."""
+        return self._size
+
+    def read_lines(self, start: int, end: Optional[int] = None) -> List[str]:
+        """
+        Read a range of lines.
+
+        Args:
+            start: Index of the first line (0-based).
+            end: Index after the last line; defaults to the last line.
+
+        Returns:
+            The lines, without trailing newlines.
+        """
+        with self._lock:
+            data = self._read_range(start, end)
+        # Only newlines end lines, as in the offset index (not form feeds...)
+        lines = data.decode('utf-8', errors='replace').split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        return lines
+
+    def read_text(self, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Read the output of a range of lines.
+
+        Args:
+            start: Index of the first line (0-based).
+            end: Index after the last line; defaults to the end of the output.
+
+        Returns:
+            The output text, including newlines.
+        """
+        with self._lock:
+            data = self._read_range(start, end)
+        return data.decode('utf-8', errors='replace')
+
+    def search(self, pattern: str, regex: bool = False, ignore_case: bool = True,
+               start: int = 0) -> List[int]:
+        """
+        Find the lines matching a pattern.
+
+        Lines are matched as displayed: without their escape sequences
+        (colors, titles...), and a match never spans two lines. The spool
+        is scanned in large blocks cut at line boundaries, so the cost grows
+        with the log size and the number of matching lines, not with the
+        number of lines.
+
+        Args:
+            pattern: Plain text or regular expression.
+            regex: Whether the pattern is a regular expression.
+            ignore_case: Whether matching ignores case.
+            start: Index of the first line to search.
+
+        Returns:
+            Indexes of matching lines, in order.
+
+        Raises:
+            re.error: If the regular expression is invalid.
+        """
+        # Byte patterns only fold ASCII case; other patterns match decoded lines
+        binary = pattern.isascii() or not ignore_case
+        compiled = self.compile_pattern(pattern, regex, ignore_case, binary=binary)
+        matches: List[int] = []
+
+        with self._lock:
+            self._prepare_read()
+            offsets = self._offsets
+            size = self._size
+            line = max(start, self._kept_line)
+
+            while line < len(offsets) and offsets[line] < size:
+                # Extend the block to the end of the line crossing the limit
+                block_start = offsets[line]
+                end_line = bisect_right(offsets, block_start + SEARCH_BLOCK_SIZE)
+                end_line = max(end_line, line + 1)
+                block_end = offsets[end_line] if end_line < len(offsets) else size
+
+                self._file.seek(block_start - self._kept_offset)
+                block = self._file.read(block_end - block_start)
+
+                if not binary:
+                    text_lines = block.decode('utf-8', errors='replace').split('\n')
+                    if block.endswith(b'\n'):
+                        text_lines.pop()
+                    matches.extend(
+                        line + index
+                        for index, text_line in enumerate(text_lines)
+                        if compiled.search(strip_ansi(text_line))
+                    )
+                elif b'\x1b' in block:
+                    # Stripping keeps the newlines, so the line numbers hold
+                    matches.extend(_search_lines(compiled, _ESCAPE_BYTES.sub(b'', block), line))
+                else:
+                    matches.extend(_search_lines(compiled, block, line))
+                line = end_line
+
+        return matches
+
+    def close(self) -> None:
+        """
+        Close the spool for writing.
+
+        A file spool stays readable: it is reopened read-only on demand.
+        Its line times are saved next to it (see read_line_times()).
+        """
+        with self._lock:
+            if self.path:
+                self._file.close()
+                self._save_times()
+            else:
+                self._file.flush()
+
+    @staticmethod
+    def compile_pattern(pattern: str, regex: bool = False, ignore_case: bool = True,
+                        binary: bool = False):
+        """
+        Compile a search pattern the way OutputSpool.search does.
+
+        Args:
+            pattern: Plain text or regular expression.
+            regex: Whether the pattern is a regular expression.
+            ignore_case: Whether matching ignores case.
+            binary: Compile for UTF-8 bytes instead of text.
+
+        Returns:
+            The compiled pattern.
+        """
+        source = pattern if regex else re.escape(pattern)
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        if binary:
+            return re.compile(source.encode('utf-8'), flags)
+        return re.compile(source, flags)
+
+    def _read_range(self, start: int, end: Optional[int]) -> bytes:
+        """Read the bytes of a line range (lock must be held)."""
+        offsets = self._offsets
+        if start >= len(offsets):
+            return b''
+        # Dropped lines (see max_bytes) read as empty lines, so the line
+        # numbers of the text read stay right
+        dropped = b''
+        if start < self._kept_line:
+            last = self._kept_line if end is None else min(end, self._kept_line)
+            dropped = b'\n' * max(last - start, 0)
+            start = self._kept_line
+        begin = offsets[start]
+        finish = offsets[end] if end is not None and end < len(offsets) else self._size
+        if finish <= begin:
+            return dropped
+        self._prepare_read()
+        self._file.seek(begin - self._kept_offset)
+        return dropped + self._file.read(finish - begin)
+
+    def _discard_old_output(self) -> None:
+        """Drop the oldest lines beyond max_bytes (lock must be held)."""
+        line = min(bisect_left(self._offsets, self._size - self.max_bytes), len(self._offsets) - 1)
+        offset = self._offsets[line]
+        self._file.seek(offset - self._kept_offset)
+        self._file = io.BytesIO(self._file.read())
+        self._kept_offset = offset
+        self._kept_line = line
+
+    def _index_existing(self) -> None:
+        """Index the output already in the spool file and load its line times."""
+        self._file.seek(0)
+        while True:
+            block = self._file.read(SEARCH_BLOCK_SIZE)
+            if not block:
+                break
+            base = self._size
+            self._offsets.extend(base + match.end() for match in re.finditer(b'\n', block))
+            self._size += len(block)
+        lines = len(self._offsets) - 1
+        if not lines:
+            return
+
+        saved_times = read_line_times(self.path)
+        if saved_times is not None:
+            # Keep counting from the start of the earlier output
+            start_time, times = saved_times
+            self._start_monotonic -= self.start_time - start_time
+            self.start_time = start_time
+            self._times = array('f', times[:lines])
+        # Lines without a saved time get the last known one
+        last = self._times[-1] if self._times else 0.0
+        self._times.extend(array('f', [last]) * (lines - len(self._times)))
+
+    def _save_times(self) -> None:
+        """Write the start time and line times next to the file (lock must be held)."""
+        temp_path = self.path + TIMES_SUFFIX + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(array('d', [self.start_time]).tobytes())
+                self._times.tofile(f)
+            os.replace(temp_path, self.path + TIMES_SUFFIX)
+        except OSError as e:
+            print(f"Error saving output line times: {e}")
+
+    def _prepare_read(self) -> None:
+        """Flush pending writes, or reopen a closed spool file (lock must be held)."""
+        if self._file.closed:
+            self._file = open(self.path, 'rb')
+        else:
+            self._file.flush()
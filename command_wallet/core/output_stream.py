@@ -0,0 +1,322 @@
+"""
+Output stream module for CommandWallet.
+
+Interprets carriage returns and cursor/erase escape sequences in command
+output so that progress bars (tqdm, wget, pip, ...) redrawing a single line
+collapse into the latest state of that line instead of thousands of
+partial lines, and buffers output between a run's reader thread and its
+display.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+# Minimum time between two redraws of the same (unfinished) line, in seconds
+DEFAULT_REDRAW_INTERVAL = 0.1
+
+# Amount of undisplayed output an OutputBuffer holds before it drops it and
+# lets the display reload it from the spool instead, in characters
+MAX_PENDING_CHARS = 1024 * 1024
+
+# Control characters and escape sequences the buffer has to interpret or
+# drop: CSI sequences, OSC strings (window titles, hyperlinks...), other
+# ESC sequences and, last, a lone ESC
+_CONTROL = re.compile(
+    r'\r\n|\r|\n|\x08|\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+    r'|\x1b[ -/]*[0-~]|\x1b'
+)
+
+# Characters that force the slow path
+_SPECIAL = re.compile(r'[\r\x08\x1b]')
+
+# An escape sequence cut in half at the end of a chunk
+_INCOMPLETE_ESCAPE = re.compile(r'\x1b(?:\[[0-9;?]*[ -/]*|\][^\x07\x1b]*\x1b?|[ -/]*)?$')
+
+# Longest unfinished escape sequence kept for the next chunk, in characters;
+# a longer one is taken for stray text
+MAX_PENDING_ESCAPE = 4096
+
+
+class TerminalLineBuffer:
+    """
+    Collapse terminal line redraws in a stream of output text.
+
+    Text is split into *committed* text (complete lines that will not change
+    any more) and the *partial* line currently being drawn. SGR (color)
+    sequences are kept in the text; other cursor sequences are interpreted
+    or dropped, and so are OSC strings such as window titles.
+    """
+
+    def __init__(self, redraw_interval: float = DEFAULT_REDRAW_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the line buffer.
+
+        Args:
+            redraw_interval: Minimum seconds between partial-line redraws.
+            clock: Monotonic clock used for rate limiting.
+        """
+        self.redraw_interval = redraw_interval
+        self.clock = clock
+
+        # Current line as one cell per column; SGR sequences are attached
+        # to the cell that follows them
+        self._cells: List[str] = []
+        self._col = 0
+        self._pending_sgr = ''
+        self._pending_escape = ''
+
+        self._committed: List[str] = []
+        self._partial_dirty = False
+        self._last_emit = float('-inf')
+
+    def feed(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        Feed a chunk of output.
+
+        Args:
+            text: Decoded output text, possibly cut at any position.
+
+        Returns:
+            A (committed, partial) tuple when the display should be updated,
+            or None while a partial-line redraw is being rate limited.
+        """
+        if self._pending_escape:
+            text = self._pending_escape + text
+            self._pending_escape = ''
+
+        incomplete = _INCOMPLETE_ESCAPE.search(text)
+        if incomplete and len(text) - incomplete.start() <= MAX_PENDING_ESCAPE:
+            self._pending_escape = text[incomplete.start():]
+            text = text[:incomplete.start()]
+
+        if text:
+            if (self._col == len(self._cells) and not self._pending_sgr
+                    and not _SPECIAL.search(text)):
+                self._feed_plain(text)
+            else:
+                self._feed_controls(text)
+
+        return self._emit()
+
+    def finish(self) -> str:
+        """
+        Flush the buffer at the end of the stream.
+
+        Returns:
+            All remaining text, including the unfinished last line.
+        """
+        remaining = ''.join(self._committed) + self.partial_line()
+        self._committed.clear()
+        self._partial_dirty = False
+        self._cells = []
+        self._col = 0
+        self._pending_sgr = ''
+        self._pending_escape = ''
+        return remaining
+
+    def partial_line(self) -> str:
+        """Return the current state of the unfinished line."""
+        return ''.join(self._cells) + self._pending_sgr
+
+    def _emit(self) -> Optional[Tuple[str, str]]:
+        """Return pending updates unless a redraw is rate limited."""
+        now = self.clock()
+        if not self._committed:
+            if not self._partial_dirty or now - self._last_emit < self.redraw_interval:
+                return None
+
+        committed = ''.join(self._committed)
+        self._committed.clear()
+        self._partial_dirty = False
+        self._last_emit = now
+        return committed, self.partial_line()
+
+    def _feed_plain(self, text: str) -> None:
+        """Fast path for text without carriage returns or escapes."""
+        newline = text.rfind('\n')
+        if newline == -1:
+            self._cells.extend(text)
+        else:
+            self._committed.append(''.join(self._cells) + text[:newline + 1])
+            self._cells = list(text[newline + 1:])
+        self._col = len(self._cells)
+        self._partial_dirty = True
+
+    def _feed_controls(self, text: str) -> None:
+        """Interpret text containing control characters and escape sequences."""
+        position = 0
+        for match in _CONTROL.finditer(text):
+            if match.start() > position:
+                self._write(text[position:match.start()])
+            self._control(match.group())
+            position = match.end()
+        if position < len(text):
+            self._write(text[position:])
+        self._partial_dirty = True
+
+    def _write(self, segment: str) -> None:
+        """Write printable text at the cursor, overwriting existing cells."""
+        cells = self._cells
+        if self._col > len(cells):
+            cells.extend(' ' * (self._col - len(cells)))
+
+        chars = list(segment)
+        if self._pending_sgr:
+            chars[0] = self._pending_sgr + chars[0]
+            self._pending_sgr = ''
+
+        cells[self._col:self._col + len(chars)] = chars
+        self._col += len(chars)
+
+    def _control(self, sequence: str) -> None:
+        """Apply one control character or escape sequence."""
+        if sequence in ('\n', '\r\n'):
+            self._committed.append(''.join(self._cells) + self._pending_sgr + '\n')
+            self._cells = []
+            self._col = 0
+            self._pending_sgr = ''
+        elif sequence == '\r':
+            self._col = 0
+        elif sequence == '\x08':
+            self._col = max(self._col - 1, 0)
+        elif sequence.startswith('\x1b['):
+            self._csi(sequence[2:-1], sequence[-1], sequence)
+        # OSC strings, other ESC sequences and a lone ESC are dropped
+
+    def _csi(self, params: str, final: str, sequence: str) -> None:
+        """Apply a CSI sequence; unsupported ones are dropped."""
+        if final == 'm':
+            self._pending_sgr += sequence
+            return
+
+        try:
+            number = int(params) if params else 0
+        except ValueError:
+            return
+
+        if final == 'K':
+            if number == 0:
+                del self._cells[self._col:]
+            elif number == 1:
+                end = min(self._col + 1, len(self._cells))
+                self._cells[:end] = ' ' * end
+            elif number == 2:
+                # Columns before the cursor are re-padded on the next write
+                self._cells = []
+        elif final == 'G':
+            self._col = max(number - 1, 0)
+        elif final == 'C':
+            self._col += max(number, 1)
+        elif final == 'D':
+            self._col = max(self._col - max(number, 1), 0)
+
+
+class OutputBuffer:
+    """
+    Thread-safe buffer between a run's reader thread and its display.
+
+    The reader thread writes committed text and the current partial line;
+    the GUI drains everything written since the last drain in one update,
+    whenever it chooses to render. When more than `max_pending` characters
+    pile up (a noisy run in a background tab), complete lines are dropped
+    and only their range is remembered: the text is also in the run's
+    spool, so the display reloads that range from there instead.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_CHARS):
+        """
+        Initialize the buffer.
+
+        Args:
+            max_pending: Maximum number of undisplayed characters kept.
+        """
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._partial = ''
+        self._dirty = False
+
+        # Number of complete lines written, and drained to the display
+        self._lines = 0
+        self._drained_lines = 0
+        # First line of the dropped range, or None while nothing is dropped
+        self._dropped_from: Optional[int] = None
+        # Monotonic time of the last write, for noticing stalled runs
+        self.last_output = time.monotonic()
+        # Set once the display is gone; later output is not kept
+        self.closed = False
+
+    def write(self, text: str, partial: str = '') -> None:
+        """
+        Add output (called from the reader thread).
+
+        Args:
+            text: Committed output text.
+            partial: Current state of the unfinished last line.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.last_output = time.monotonic()
+            self._partial = partial
+            self._dirty = True
+            if not text:
+                return
+
+            self._lines += text.count('\n')
+            self._pending.append(text)
+            self._pending_size += len(text)
+
+            if self._dropped_from is None and self._pending_size <= self.max_pending:
+                return
+
+            # Keep only the text after the last complete line
+            if self._dropped_from is None:
+                self._dropped_from = self._drained_lines
+            newline = text.rfind('\n')
+            if newline != -1:
+                tail = text[newline + 1:]
+                self._pending = [tail] if tail else []
+                self._pending_size = len(tail)
+
+    def drain(self) -> Optional[Tuple[Optional[Tuple[int, int]], str, str]]:
+        """
+        Take everything written since the last drain.
+
+        Returns:
+            None if nothing changed, else a (reload, committed, partial)
+            tuple: `reload` is a (start, end) range of spool lines that were
+            dropped and must be read from the spool first, or None; then
+            `committed` is appended and `partial` replaces the unfinished
+            last line.
+        """
+        with self._lock:
+            if not self._dirty:
+                return None
+
+            reload = None
+            if self._dropped_from is not None:
+                reload = (self._dropped_from, self._lines)
+                self._dropped_from = None
+
+            committed = ''.join(self._pending)
+            self._pending = []
+            self._pending_size = 0
+            self._drained_lines = self._lines
+            self._dirty = False
+            return reload, committed, self._partial
+
+    def close(self) -> None:
+        """Discard the undisplayed output and ignore further writes."""
+        with self._lock:
+            self.closed = True
+            self._pending = []
+            self._pending_size = 0
+            self._partial = ''
+            self._dropped_from = None
+            self._dirty = False
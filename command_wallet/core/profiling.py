@@ -0,0 +1,187 @@
+"""
+Profiling module for CommandWallet.
+
+Captures cProfile profiles and tracemalloc snapshot diffs on demand, for
+finding out why the application is slow or growing. Nothing is measured
+until a capture is started, so an idle Profiler costs nothing. cProfile
+only sees the thread that starts it: start and stop a capture from the
+same thread (the Tk thread in the GUI).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+
+# Directory the .prof files are written to by default
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".command-wallet", "profiles")
+
+# Number of frames recorded per allocation while tracing memory
+TRACE_FRAMES = 10
+
+# Number of allocation sites listed in a memory report
+TOP_ALLOCATIONS = 25
+
+# Number of functions listed in a profile summary
+TOP_FUNCTIONS = 30
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Take an allocation snapshot without tracemalloc's own allocations."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+class Profiler:
+    """On-demand cProfile and tracemalloc captures."""
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR):
+        """
+        Initialize the profiler (nothing is captured yet).
+
+        Args:
+            output_dir: Directory the .prof files are written to.
+        """
+        self.output_dir = output_dir
+        self.last_profile_path: Optional[str] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._label = ''
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def profiling(self) -> bool:
+        """Whether a CPU profile is being captured."""
+        return self._profile is not None
+
+    @property
+    def tracing_memory(self) -> bool:
+        """Whether allocations are being traced."""
+        return self._baseline is not None
+
+    def start_profile(self, label: str = 'session') -> bool:
+        """
+        Start capturing a CPU profile in the calling thread.
+
+        Args:
+            label: What is profiled, used in the file name.
+
+        Returns:
+            True if the capture started, False if one is already running.
+        """
+        if self._profile is not None:
+            return False
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (e.g. python -m cProfile) is already active
+            print(f"Error starting profiler: {e}")
+            return False
+        self._profile = profile
+        self._label = label
+        return True
+
+    def stop_profile(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Stop the CPU profile and write it to a .prof file.
+
+        Args:
+            path: File to write; by default a timestamped file in the output
+                directory.
+
+        Returns:
+            The path of the file, or None if nothing was captured or it
+            could not be written.
+        """
+        if self._profile is None:
+            return None
+        profile, self._profile = self._profile, None
+        profile.disable()
+        if path is None:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.output_dir, f"{timestamp}-{self._label}.prof")
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+            return None
+        self.last_profile_path = path
+        return path
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[None]:
+        """
+        Profile a block of code; it runs unprofiled if a capture is running.
+
+        Args:
+            label: What is profiled, used in the file name.
+        """
+        started = self.start_profile(label)
+        try:
+            yield
+        finally:
+            if started:
+                self.stop_profile()
+
+    def start_memory_trace(self) -> None:
+        """Start tracing allocations and take the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self._baseline = _take_snapshot()
+
+    def memory_report(self, limit: int = TOP_ALLOCATIONS) -> str:
+        """
+        Compare the allocations with the baseline snapshot.
+
+        Args:
+            limit: Number of allocation sites listed.
+
+        Returns:
+            The sites whose memory grew the most since the baseline, as text.
+        """
+        if self._baseline is None:
+            return "Memory tracing is not running.\n"
+        stats = _take_snapshot().compare_to(self._baseline, 'lineno')
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"Traced memory: {current / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)",
+            f"Top {limit} allocation sites by growth since tracing started:",
+            "",
+        ]
+        for stat in stats[:limit]:
+            lines.append(
+                f"{stat.size_diff / 1024:>+10.1f} KB {stat.count_diff:>+8} blocks  "
+                f"{stat.traceback.format()[0].strip()}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def stop_memory_trace(self) -> None:
+        """Stop tracing allocations."""
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def summarize_profile(path: str, limit: int = TOP_FUNCTIONS) -> str:
+    """
+    Summarize a .prof file.
+
+    Args:
+        path: Profile written by Profiler.stop_profile().
+        limit: Number of functions listed.
+
+    Returns:
+        The most expensive functions by cumulative time, as text.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,235 @@
+"""
+Run diff module for CommandWallet.
+
+Compares the output logs of two runs of a command line by line. Both logs
+are streamed from disk: the common leading lines are skipped by comparing
+line hashes, and from the first difference on one hash per line is kept
+(memory grows with the lines after the first difference, but not with
+their text). The common trailing lines are trimmed before the remaining
+region is diffed, and the text of a line is only read again for the lines
+shown in the diff. Volatile tokens such as timestamps and PIDs can be
+masked so they do not show up as changes.
+"""
+
+import re
+from array import array
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple
+
+from .ansi import strip_ansi
+from .log_archive import open_log
+
+
+# Unchanged lines shown around each change
+DIFF_CONTEXT = 3
+
+# Regular expressions for tokens that change from run to run
+VOLATILE_PATTERNS = (
+    # Dates and times: 2024-01-31T12:00:00.123Z, 31/01/2024-12:00:00, 12:00:00.123
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?',
+    r'\d{2}/\d{2}/\d{4}[- ]\d{2}:\d{2}:\d{2}',
+    r'\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b',
+    # Process IDs: pid 1234, PID=1234, [1234]
+    r'\b(?i:pid)[ =:]*\d+',
+    r'\[\d{2,}\]',
+    # Durations: 1.23s, 450ms, 12.5 sec
+    r'\b\d+(?:\.\d+)?\s?(?:ms|s|sec|secs|seconds)\b',
+    # Memory addresses and UUIDs
+    r'\b0x[0-9a-fA-F]{6,}\b',
+    r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b',
+)
+
+# Text that replaces masked tokens before lines are compared
+MASK_PLACEHOLDER = "<*>"
+
+
+def compile_masks(patterns: Iterable[str]) -> Optional[Pattern]:
+    """
+    Combine mask patterns into one, skipping invalid ones.
+
+    Args:
+        patterns: Regular expressions of tokens to mask.
+
+    Returns:
+        A pattern matching any of the tokens, or None if there are none.
+    """
+    valid = []
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            print(f"Invalid diff mask '{pattern}': {e}")
+            continue
+        valid.append(f"(?:{pattern})")
+    return re.compile('|'.join(valid)) if valid else None
+
+
+def normalize_line(line: bytes, mask: Optional[Pattern] = None) -> str:
+    """
+    Turn a raw log line into the text that is compared.
+
+    Args:
+        line: Line read from a log file.
+        mask: Pattern of tokens to mask (see compile_masks()).
+
+    Returns:
+        The decoded line without its newline, colors and masked tokens.
+    """
+    text = line.decode('utf-8', errors='replace').rstrip('\r\n')
+    if '\x1b' in text:
+        text = strip_ansi(text)
+    if mask is not None:
+        text = mask.sub(MASK_PLACEHOLDER, text)
+    return text
+
+
+class _LineReader:
+    """Sequential reader returning the lines of a log by index."""
+
+    def __init__(self, path: str, offset: int, line: int):
+        """
+        Open a log at a known line start.
+
+        Args:
+            path: Log file.
+            offset: Byte offset where line `line` starts.
+            line: Index of the line at `offset`.
+        """
+        self._file = open_log(path)
+        self._file.seek(offset)
+        self._line = line
+
+    def read(self, start: int, end: int) -> List[str]:
+        """Return lines [start, end); requests must move forward."""
+        while self._line < start:
+            self._file.readline()
+            self._line += 1
+        lines = []
+        while self._line < end:
+            lines.append(normalize_line(self._file.readline()))
+            self._line += 1
+        return lines
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
+
+
+class RunDiff:
+    """Line diff between the logs of two runs."""
+
+    def __init__(self, old_path: str, new_path: str, mask: Optional[Pattern] = None,
+                 context: int = DIFF_CONTEXT):
+        """
+        Initialize the diff (nothing is read yet).
+
+        Args:
+            old_path: Log of the earlier run (plain or archived).
+            new_path: Log of the later run (plain or archived).
+            mask: Pattern of volatile tokens to ignore (see compile_masks()).
+            context: Unchanged lines shown around each change.
+        """
+        self.old_path = old_path
+        self.new_path = new_path
+        self.mask = mask
+        self.context = context
+        self.added = 0
+        self.removed = 0
+
+    def iter_lines(self) -> Iterator[Tuple[str, str]]:
+        """
+        Compute the diff and yield it line by line, like a unified diff.
+
+        Yields:
+            (kind, text) tuples: kind is '@' for a hunk header, ' ' for an
+            unchanged line, '-' for a line only in the old log and '+' for
+            a line only in the new log. Lines are shown without colors and
+            unmasked. `added` and `removed` count the changed lines.
+        """
+        self.added = 0
+        self.removed = 0
+        start, old_offset, new_offset, old_hashes, new_hashes = self._hash_after_prefix()
+
+        # Trim the common trailing lines, keeping some context
+        common = 0
+        limit = min(len(old_hashes), len(new_hashes))
+        while common < limit and old_hashes[-1 - common] == new_hashes[-1 - common]:
+            common += 1
+        trim = max(common - self.context, 0)
+        # In place, so the trimmed hashes are not kept twice
+        del old_hashes[len(old_hashes) - trim:]
+        del new_hashes[len(new_hashes) - trim:]
+        if old_hashes == new_hashes:
+            return
+
+        matcher = SequenceMatcher(None, old_hashes, new_hashes)
+        old_reader = _LineReader(self.old_path, old_offset, start)
+        new_reader = _LineReader(self.new_path, new_offset, start)
+        try:
+            for group in matcher.get_grouped_opcodes(self.context):
+                old_first, new_first = group[0][1], group[0][3]
+                old_last, new_last = group[-1][2], group[-1][4]
+                yield '@', (
+                    f"@@ -{start + old_first + 1},{old_last - old_first} "
+                    f"+{start + new_first + 1},{new_last - new_first} @@"
+                )
+                for tag, old_a, old_b, new_a, new_b in group:
+                    old_lines = old_reader.read(start + old_a, start + old_b)
+                    new_lines = new_reader.read(start + new_a, start + new_b)
+                    if tag == 'equal':
+                        for line in new_lines:
+                            yield ' ', line
+                        continue
+                    for line in old_lines:
+                        self.removed += 1
+                        yield '-', line
+                    for line in new_lines:
+                        self.added += 1
+                        yield '+', line
+        finally:
+            old_reader.close()
+            new_reader.close()
+
+    def _hash_after_prefix(self) -> Tuple[int, int, int, array, array]:
+        """
+        Skip the common leading lines and hash the rest of both logs.
+
+        Returns:
+            Tuple of (index of the first hashed line, its byte offset in the
+            old log and in the new log, hashes of the old log's lines from
+            there on, same for the new log). Hashing starts a few lines
+            before the first difference, to show them as context.
+        """
+        # Recent common lines as (byte offset in old, in new), for context
+        recent = deque(maxlen=self.context + 1)
+        line = 0
+        old_offset = new_offset = 0
+        with open_log(self.old_path) as old_file, open_log(self.new_path) as new_file:
+            while True:
+                recent.append((old_offset, new_offset))
+                old_line = old_file.readline()
+                new_line = new_file.readline()
+                if not old_line or not new_line or (
+                        old_line != new_line
+                        and normalize_line(old_line, self.mask) != normalize_line(new_line, self.mask)):
+                    break
+                old_offset += len(old_line)
+                new_offset += len(new_line)
+                line += 1
+
+        # Start a few lines earlier, then hash everything that is left
+        start = line - (len(recent) - 1)
+        old_offset, new_offset = recent[0]
+        old_hashes = self._hash_lines(self.old_path, old_offset)
+        new_hashes = self._hash_lines(self.new_path, new_offset)
+        return start, old_offset, new_offset, old_hashes, new_hashes
+
+    def _hash_lines(self, path: str, offset: int) -> array:
+        """Hash the normalized lines of a log from a byte offset to its end."""
+        mask = self.mask
+        # Reopened, since compressed streams may only seek forward
+        with open_log(path) as file:
+            file.seek(offset)
+            return array('q', (hash(normalize_line(line, mask)) for line in file))
+
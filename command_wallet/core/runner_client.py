@@ -0,0 +1,232 @@
+"""
+Runner client module for CommandWallet.
+
+Connects to the runner daemon over its Unix domain socket to submit jobs,
+list them and stream their output.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from .runner_daemon import send_message, read_message, is_daemon_running
+
+
+# Time allowed for a freshly spawned daemon to start listening, in seconds
+DAEMON_START_TIMEOUT = 5.0
+
+# Text written to attached output when the daemon dropped some of it
+GAP_NOTICE = "\n[... output skipped, see the run's log file ...]\n"
+
+
+class RunnerError(Exception):
+    """Error reported by the runner daemon or while talking to it."""
+
+
+class RunnerClient:
+    """Client of the runner daemon."""
+
+    def __init__(self, socket_path: str):
+        """
+        Initialize the client.
+
+        Args:
+            socket_path: Path of the daemon's Unix domain socket.
+        """
+        self.socket_path = socket_path
+
+    def is_running(self) -> bool:
+        """Check whether the daemon is listening."""
+        return is_daemon_running(self.socket_path)
+
+    def spawn_daemon(self) -> bool:
+        """
+        Start the daemon in the background unless it is already running.
+
+        The daemon runs in its own session, so it keeps running (and keeps
+        its jobs running) when the process that spawned it exits.
+
+        Returns:
+            True if the daemon is listening.
+        """
+        if self.is_running():
+            return True
+        try:
+            subprocess.Popen(
+                [sys.executable, '-m', 'command_wallet.cli', '--socket', self.socket_path, 'daemon'],
+                cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        except OSError as e:
+            print(f"Error starting runner daemon: {e}")
+            return False
+
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.is_running():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def submit(self, command: str, name: str = '', command_id: Optional[str] = None,
+               log_path: Optional[str] = None, header: str = '',
+               on_interrupt: Optional[str] = None,
+               resource_class: Optional[str] = None, timeout: Optional[float] = None,
+               container_name: Optional[str] = None) -> str:
+        """
+        Submit a job.
+
+        Args:
+            command: Final command line to run.
+            name: Display name of the command.
+            command_id: ID of the command, if it is a saved one.
+            log_path: File the daemon spools the output to.
+            header: Text written to the output before the command's own.
+            on_interrupt: What the daemon does with the job if it stops
+                while the job runs ('fail' or 'restart').
+            resource_class: Resource class of the command, for the daemon's
+                admission control.
+            timeout: Optional wall-clock limit of the run, in seconds.
+            container_name: Name of the run's docker container, if any, so
+                cancelling the job stops it.
+
+        Returns:
+            ID of the new job.
+
+        Raises:
+            RunnerError: If the daemon cannot be reached or rejects the job.
+        """
+        reply = self._request({
+            'op': 'submit',
+            'command': command,
+            'name': name,
+            'command_id': command_id,
+            'log_path': log_path,
+            'header': header,
+            'on_interrupt': on_interrupt,
+            'resource_class': resource_class,
+            'timeout': timeout,
+            'container_name': container_name,
+        })
+        return reply['job_id']
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """
+        List the daemon's jobs.
+
+        Returns:
+            Job descriptions, oldest first.
+
+        Raises:
+            RunnerError: If the daemon cannot be reached.
+        """
+        return self._request({'op': 'list'})['jobs']
+
+    def cancel(self, job_id: str) -> None:
+        """
+        Cancel a pending or running job.
+
+        Args:
+            job_id: ID of the job.
+
+        Raises:
+            RunnerError: If the daemon cannot be reached or does not know
+                the job.
+        """
+        self._request({'op': 'cancel', 'job_id': job_id})
+
+    def attach(self, job_id: str, output_callback: Callable[..., None],
+               tail: bool = False) -> Optional[int]:
+        """
+        Stream a job's output until it ends.
+
+        Args:
+            job_id: ID of the job.
+            output_callback: Function receiving committed text and the
+                current partial line, like the executor's output callback.
+            tail: If True, skip the output produced before attaching.
+
+        Returns:
+            The job's exit code (None if it failed to start).
+
+        Raises:
+            RunnerError: If the daemon cannot be reached or the connection
+                is lost before the job ends.
+        """
+        with self._connect() as sock:
+            rfile = sock.makefile('rb')
+            wfile = sock.makefile('wb')
+            send_message(wfile, {'op': 'attach', 'job_id': job_id, 'tail': tail})
+            self._check_reply(read_message(rfile))
+            while True:
+                event = read_message(rfile)
+                if event is None:
+                    raise RunnerError("connection to the runner daemon was lost")
+                kind = event.get('event')
+                if kind == 'output':
+                    output_callback(event['text'], event['partial'])
+                elif kind == 'gap':
+                    output_callback(GAP_NOTICE)
+                elif kind == 'exit':
+                    return event['exit_code']
+
+    def attach_async(self, job_id: str, output_callback: Callable[..., None],
+                     completion_callback: Optional[Callable[[Optional[int]], None]] = None,
+                     tail: bool = False) -> None:
+        """
+        Stream a job's output in a background thread.
+
+        Args:
+            job_id: ID of the job.
+            output_callback: Function receiving the output (see attach()).
+            completion_callback: Function called with the exit code when the
+                job ends, or with None if the connection fails.
+            tail: If True, skip the output produced before attaching.
+        """
+        def run():
+            exit_code = None
+            try:
+                exit_code = self.attach(job_id, output_callback, tail)
+            except (OSError, RunnerError, ValueError) as e:
+                print(f"Error attaching to job {job_id}: {e}")
+            finally:
+                if completion_callback:
+                    completion_callback(exit_code)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _connect(self) -> socket.socket:
+        """Open a connection to the daemon."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise RunnerError(f"runner daemon is not reachable at {self.socket_path}: {e}")
+        return sock
+
+    def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and return the daemon's reply."""
+        try:
+            with self._connect() as sock:
+                rfile = sock.makefile('rb')
+                wfile = sock.makefile('wb')
+                send_message(wfile, request)
+                return self._check_reply(read_message(rfile))
+        except (OSError, ValueError) as e:
+            raise RunnerError(f"runner daemon request failed: {e}")
+
+    def _check_reply(self, reply: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Raise RunnerError unless a reply reports success."""
+        if reply is None:
+            raise RunnerError("runner daemon closed the connection")
+        if not reply.get('ok'):
+            raise RunnerError(reply.get('error', "unknown error"))
+        return reply
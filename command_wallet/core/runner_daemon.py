@@ -0,0 +1,646 @@
+"""
+Runner daemon module for CommandWallet.
+
+A local daemon that runs commands on behalf of the GUI, the command line
+and the scheduler, so runs survive closing the window. Clients talk to it
+over a Unix domain socket with a JSON-lines protocol: every request is one
+JSON object on a line and every reply or event is one JSON object on a
+line.
+
+Requests:
+    {"op": "submit", "command": ..., "name": ..., "command_id": ..., "log_path": ...,
+     "header": ..., "on_interrupt": "fail" | "restart", "resource_class": ...,
+     "timeout": ..., "container_name": ...}
+        -> {"ok": true, "job_id": ...}
+    {"op": "list"}
+        -> {"ok": true, "jobs": [...]}
+    {"op": "cancel", "job_id": ...}
+        -> {"ok": true}
+    {"op": "attach", "job_id": ..., "tail": false}
+        -> {"ok": true, "job": {...}}, then {"event": "output", "text": ...,
+           "partial": ...} events and a final {"event": "exit", "exit_code": ...}
+
+Recent output of every job is kept in a bounded in-memory ring; a client
+attaching late (or reading too slowly) receives a "gap" event for the
+output it missed, which is still available in the job's log file. With a
+journal, the job queue survives restarts of the daemon.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Deque, List, Optional, Tuple
+
+from .command_executor import (
+    CommandExecutor, RunHandle, process_group_alive, stop_process_group
+)
+from .data_manager import DataManager
+from .job_journal import JobJournal
+from .output_spool import OutputSpool
+
+
+# Output kept in memory per job for attaching clients, in characters
+RING_BUFFER_CHARS = 1024 * 1024
+
+# Finished jobs kept for listing and attaching
+MAX_FINISHED_JOBS = 50
+
+# Longest wait for new output before checking the connection, in seconds
+ATTACH_POLL_INTERVAL = 1.0
+
+# What to do with a job that was running when the daemon stopped:
+# 'fail' marks it interrupted, 'restart' runs it again
+INTERRUPT_POLICIES = ('fail', 'restart')
+DEFAULT_INTERRUPT_POLICY = 'fail'
+
+# States a job never leaves
+FINAL_STATES = ('finished', 'interrupted')
+
+# Largest difference between a job's start and the start of the process
+# holding its journaled process group ID for the group to still be the
+# job's (the ID may have been reused after a reboot), in seconds
+ORPHAN_START_TOLERANCE = 60.0
+
+# Time given to a stopped job's thread to finish after its grace period, in seconds
+STOP_JOIN_MARGIN = 10.0
+
+
+def get_socket_path(config_dir: str) -> str:
+    """
+    Get the path of the daemon socket.
+
+    Args:
+        config_dir: CommandWallet configuration directory.
+
+    Returns:
+        Path of the Unix domain socket.
+    """
+    return os.path.join(config_dir, "runner.sock")
+
+
+def get_journal_path(config_dir: str) -> str:
+    """
+    Get the path of the daemon's job journal.
+
+    Args:
+        config_dir: CommandWallet configuration directory.
+
+    Returns:
+        Path of the journal file.
+    """
+    return os.path.join(config_dir, "jobs.journal")
+
+
+def send_message(stream, message: Dict[str, Any]) -> None:
+    """
+    Write one JSON-lines message to a socket file.
+
+    Args:
+        stream: Writable binary file object of the socket.
+        message: Message to send.
+    """
+    stream.write(json.dumps(message).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def read_message(stream) -> Optional[Dict[str, Any]]:
+    """
+    Read one JSON-lines message from a socket file.
+
+    Args:
+        stream: Readable binary file object of the socket.
+
+    Returns:
+        The message, or None at end of stream.
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def _process_start_time(pid: int) -> Optional[float]:
+    """
+    Get the wall-clock start time of a process from /proc (Linux only).
+
+    Args:
+        pid: ID of the process.
+
+    Returns:
+        The start time as a timestamp, or None if it is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the command name, which may contain spaces
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open("/proc/stat") as f:
+            boot_time = next(float(line.split()[1]) for line in f if line.startswith('btime '))
+        return boot_time + int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+class OutputRing:
+    """Bounded, sequence-numbered buffer of a job's recent output."""
+
+    def __init__(self, max_chars: int = RING_BUFFER_CHARS):
+        """
+        Initialize the ring.
+
+        Args:
+            max_chars: Maximum number of characters kept.
+        """
+        self.max_chars = max_chars
+        self.condition = threading.Condition()
+        self._chunks: Deque[Tuple[int, str]] = deque()
+        self._size = 0
+        self._next_seq = 0
+        self.partial = ''
+        self.closed = False
+
+    def append(self, text: str, partial: str = '') -> None:
+        """
+        Add output and wake up attached clients.
+
+        Args:
+            text: Committed output text.
+            partial: Current state of the unfinished last line.
+        """
+        with self.condition:
+            if text:
+                self._chunks.append((self._next_seq, text))
+                self._next_seq += 1
+                self._size += len(text)
+                while self._size > self.max_chars and len(self._chunks) > 1:
+                    _, dropped = self._chunks.popleft()
+                    self._size -= len(dropped)
+            self.partial = partial
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        """Mark the output as complete and wake up attached clients."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def end_seq(self) -> int:
+        """Return the sequence number the next chunk will get."""
+        with self.condition:
+            return self._next_seq
+
+    def read(self, seq: int, timeout: float) -> Tuple[List[str], int, bool, str, bool]:
+        """
+        Wait for and return output from a sequence number on.
+
+        Args:
+            seq: First chunk wanted.
+            timeout: Longest wait for new output, in seconds.
+
+        Returns:
+            Tuple of (chunks, next sequence number, whether output before
+            the returned chunks was dropped, partial line, closed flag).
+        """
+        with self.condition:
+            if seq >= self._next_seq and not self.closed:
+                self.condition.wait(timeout)
+            first = self._chunks[0][0] if self._chunks else self._next_seq
+            gap = seq < first
+            chunks = [text for chunk_seq, text in self._chunks if chunk_seq >= seq]
+            return chunks, self._next_seq, gap, self.partial, self.closed
+
+
+class DaemonJob:
+    """A command run by the daemon."""
+
+    def __init__(self, job_id: str, request: Dict[str, Any]):
+        """
+        Initialize the job from a submit request or a journal record.
+
+        Args:
+            job_id: ID of the job.
+            request: The submit request (or recovered record).
+        """
+        self.job_id = job_id
+        self.command = request['command']
+        self.name = request.get('name', '')
+        self.command_id = request.get('command_id')
+        self.log_path = request.get('log_path')
+        self.header = request.get('header', '')
+        self.on_interrupt = request.get('on_interrupt') or DEFAULT_INTERRUPT_POLICY
+        self.resource_class = request.get('resource_class')
+        self.timeout = request.get('timeout')
+        self.container_name = request.get('container_name')
+        self.cancel_reason: Optional[str] = request.get('cancel_reason')
+        self.handle = RunHandle(self.container_name)
+        self.ring = OutputRing()
+        self.state = request.get('state', 'pending')
+        self.exit_code: Optional[int] = request.get('exit_code')
+        self.submitted = request.get('submitted', time.time())
+        self.started: Optional[float] = request.get('started')
+        self.finished: Optional[float] = request.get('finished')
+        self.pgid: Optional[int] = request.get('pgid')
+        self.thread: Optional[threading.Thread] = None
+        if self.state in FINAL_STATES:
+            self.ring.close()
+
+    def info(self) -> Dict[str, Any]:
+        """Return a JSON-serializable description of the job."""
+        return {
+            'job_id': self.job_id,
+            'command_id': self.command_id,
+            'name': self.name,
+            'command': self.command,
+            'log_path': self.log_path,
+            'header': self.header,
+            'on_interrupt': self.on_interrupt,
+            'resource_class': self.resource_class,
+            'timeout': self.timeout,
+            'container_name': self.container_name,
+            'cancel_reason': self.cancel_reason,
+            'state': self.state,
+            'exit_code': self.exit_code,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'pgid': self.pgid,
+        }
+
+    def orphaned_group(self) -> Optional[int]:
+        """
+        Find the process group a running job left behind when the daemon died.
+
+        Runs are started in their own session, so they outlive the daemon.
+        The journaled group is only taken for the job's if its leader
+        started together with the job (when /proc tells).
+
+        Returns:
+            ID of the live process group, or None.
+        """
+        if not self.pgid or not process_group_alive(self.pgid):
+            return None
+        started = _process_start_time(self.pgid)
+        if started is not None and self.started is not None:
+            if abs(started - self.started) > ORPHAN_START_TOLERANCE:
+                return None
+        return self.pgid
+
+
+class RunnerDaemon:
+    """Runs submitted jobs and streams their output to attached clients."""
+
+    def __init__(self, socket_path: str, executor: Optional[CommandExecutor] = None,
+                 journal: Optional[JobJournal] = None,
+                 data_manager: Optional[DataManager] = None):
+        """
+        Initialize the daemon (not listening yet).
+
+        Args:
+            socket_path: Path of the Unix domain socket to listen on.
+            executor: Executor running the jobs; a new one by default.
+            journal: Optional journal persisting the job queue, so pending
+                and interrupted jobs are recovered on the next start.
+            data_manager: Optional data manager used to record the runs of
+                jobs restarted after an interruption.
+        """
+        self.socket_path = socket_path
+        self.executor = executor or CommandExecutor()
+        self.journal = journal
+        self.data_manager = data_manager
+        self.jobs: Dict[str, DaemonJob] = {}
+        self._lock = threading.Lock()
+        self._job_counter = 0
+        self._server = None
+        self._stopping = False
+
+    def serve_forever(self) -> None:
+        """Recover the journaled jobs, then serve clients until shutdown()."""
+        if os.path.exists(self.socket_path):
+            if is_daemon_running(self.socket_path):
+                raise OSError(f"A runner daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                uid = get_peer_uid(self.request)
+                if uid is not None and uid != os.getuid():
+                    print(f"Runner daemon refused a client of user {uid}")
+                    return
+                daemon._handle_client(self.rfile, self.wfile)
+
+        # Create the socket private, so no other user can connect before
+        # its permissions are set
+        old_umask = os.umask(0o077)
+        try:
+            self._server = _ThreadingUnixServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+        self.recover()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            if self.journal is not None:
+                self.journal.close()
+
+    def shutdown(self) -> None:
+        """Stop serving (running jobs are not interrupted)."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def stop_jobs(self) -> None:
+        """
+        Stop all pending and running jobs before the daemon exits.
+
+        Their journal records are left as they are, so the next start
+        handles them like jobs interrupted by a crash, according to their
+        interrupt policy. Returns once their processes are gone.
+        """
+        with self._lock:
+            self._stopping = True
+            jobs = [job for job in self.jobs.values() if job.state not in FINAL_STATES]
+        for job in jobs:
+            job.handle.cancel('shutdown')
+        for job in jobs:
+            if job.thread is not None:
+                job.thread.join(job.handle.grace_period + STOP_JOIN_MARGIN)
+
+    def recover(self) -> None:
+        """
+        Reload the jobs of the journal after a restart.
+
+        Finished jobs are listed again, pending jobs are started, and jobs
+        that were running are restarted or marked interrupted according to
+        their interrupt policy. Processes such jobs left running are stopped
+        first, so a restart never runs a command twice. The journal is then
+        compacted.
+        """
+        if self.journal is None:
+            return
+
+        to_start = []
+        restarted_commands = []
+        orphans = []
+        with self._lock:
+            for job_id, record in self.journal.load().items():
+                if 'command' not in record:
+                    continue
+                job = DaemonJob(job_id, record)
+                if job.state == 'running':
+                    pgid = job.orphaned_group()
+                    if pgid is not None:
+                        orphans.append((pgid, job.container_name))
+                    job.pgid = None
+                    if job.on_interrupt == 'restart':
+                        job.state = 'pending'
+                        job.header = (
+                            f"\n--- Restarted after an interruption at "
+                            f"{datetime.now().strftime('%d/%m/%Y-%H:%M:%S')} ---\n\n"
+                        )
+                        if job.command_id:
+                            restarted_commands.append(job.command_id)
+                    else:
+                        job.state = 'interrupted'
+                        job.finished = time.time()
+                        job.ring.close()
+                if job.state == 'pending':
+                    to_start.append(job)
+                self.jobs[job_id] = job
+            self._prune_finished()
+            self.journal.compact(self._snapshot)
+
+        stoppers = [
+            threading.Thread(target=stop_process_group, args=orphan, daemon=True)
+            for orphan in orphans
+        ]
+        for thread in stoppers:
+            thread.start()
+        for thread in stoppers:
+            thread.join()
+        self._record_executions(restarted_commands)
+        for job in to_start:
+            self._start(job)
+
+    def submit(self, request: Dict[str, Any]) -> DaemonJob:
+        """
+        Enqueue and start a job.
+
+        Args:
+            request: Submit request with at least 'command'.
+
+        Returns:
+            The new job.
+        """
+        with self._lock:
+            self._job_counter += 1
+            job_id = f"job_{int(time.time())}_{self._job_counter}"
+            while job_id in self.jobs:
+                self._job_counter += 1
+                job_id = f"job_{int(time.time())}_{self._job_counter}"
+            job = DaemonJob(job_id, request)
+            self.jobs[job_id] = job
+            self._prune_finished()
+        self._journal(job.info())
+        self._start(job)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a pending or running job.
+
+        Args:
+            job_id: ID of the job.
+
+        Returns:
+            False if there is no such job.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.handle.cancel()
+        return True
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Return descriptions of all known jobs, oldest first."""
+        with self._lock:
+            return [job.info() for job in self.jobs.values()]
+
+    def _start(self, job: DaemonJob) -> None:
+        """Run a pending job in a background thread once it is admitted."""
+        spool = OutputSpool(job.log_path) if job.log_path else None
+        if job.header:
+            if spool is not None:
+                spool.append(job.header)
+            job.ring.append(job.header)
+
+        def on_started():
+            job.state = 'running'
+            job.started = time.time()
+            self._journal({'job_id': job.job_id, 'state': job.state, 'started': job.started})
+
+        def on_process(pid):
+            job.pgid = pid
+            self._journal({'job_id': job.job_id, 'pgid': job.pgid})
+
+        def on_completion(exit_code):
+            job.exit_code = exit_code
+            job.finished = time.time()
+            job.cancel_reason = job.handle.cancel_reason
+            job.state = 'finished'
+            job.ring.close()
+            self._journal({
+                'job_id': job.job_id,
+                'state': job.state,
+                'exit_code': job.exit_code,
+                'cancel_reason': job.cancel_reason,
+                'finished': job.finished,
+            })
+
+        thread = threading.Thread(
+            target=self.executor._execute_command,
+            args=(job.command, on_completion, spool, job.ring.append),
+            kwargs={
+                'resource_class': job.resource_class,
+                'started_callback': on_started,
+                'handle': job.handle,
+                'timeout': job.timeout,
+                'command_name': job.name or None,
+                'process_callback': on_process,
+            },
+            daemon=True
+        )
+        job.thread = thread
+        thread.start()
+
+    def _journal(self, update: Dict[str, Any]) -> None:
+        """Record a job change, compacting the journal when it grew enough."""
+        if self.journal is None or self._stopping:
+            # Jobs stopped with the daemon stay recorded as they were, to be
+            # recovered by the next start like interrupted jobs
+            return
+        self.journal.append(update)
+        if self.journal.needs_compaction():
+            with self._lock:
+                self.journal.compact(self._snapshot)
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        """Return the records of all jobs, for compacting the journal (lock held)."""
+        return [job.info() for job in self.jobs.values()]
+
+    def _record_executions(self, command_ids: List[str]) -> None:
+        """Record the runs of restarted commands, for the owner of the commands file to merge."""
+        if self.data_manager is None or not command_ids:
+            return
+        self.data_manager.record_runs(command_ids)
+
+    def _prune_finished(self) -> None:
+        """Forget the oldest finished jobs beyond the limit (lock held)."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in FINAL_STATES]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def _handle_client(self, rfile, wfile) -> None:
+        """Serve the requests of one client connection."""
+        try:
+            while True:
+                request = read_message(rfile)
+                if request is None:
+                    return
+                op = request.get('op')
+                if op == 'submit' and request.get('command'):
+                    job = self.submit(request)
+                    send_message(wfile, {'ok': True, 'job_id': job.job_id})
+                elif op == 'list':
+                    send_message(wfile, {'ok': True, 'jobs': self.list_jobs()})
+                elif op == 'cancel':
+                    if self.cancel(request.get('job_id')):
+                        send_message(wfile, {'ok': True})
+                    else:
+                        send_message(wfile, {'ok': False, 'error': "unknown job"})
+                elif op == 'attach':
+                    self._stream_job(request, wfile)
+                    return
+                else:
+                    send_message(wfile, {'ok': False, 'error': f"invalid request: {op}"})
+        except (OSError, ValueError) as e:
+            # Client went away or sent garbage
+            print(f"Runner daemon client error: {e}")
+
+    def _stream_job(self, request: Dict[str, Any], wfile) -> None:
+        """Stream a job's output to a client until the job ends."""
+        job = self.jobs.get(request.get('job_id'))
+        if job is None:
+            send_message(wfile, {'ok': False, 'error': "unknown job"})
+            return
+        send_message(wfile, {'ok': True, 'job': job.info()})
+
+        seq = job.ring.end_seq() if request.get('tail') else 0
+        last_partial = None
+        while True:
+            chunks, seq_end, gap, partial, closed = job.ring.read(seq, ATTACH_POLL_INTERVAL)
+            if gap:
+                send_message(wfile, {'event': 'gap'})
+            if chunks or partial != last_partial:
+                send_message(wfile, {'event': 'output', 'text': ''.join(chunks), 'partial': partial})
+                last_partial = partial
+            seq = seq_end
+            if closed and not chunks:
+                send_message(wfile, {'event': 'exit', 'exit_code': job.exit_code})
+                return
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server handling each client in its own thread."""
+
+    daemon_threads = True
+
+
+def get_peer_uid(sock: socket.socket) -> Optional[int]:
+    """
+    Get the user ID of the process on the other end of a Unix socket.
+
+    Args:
+        sock: Connected Unix domain socket.
+
+    Returns:
+        The peer's user ID, or None where the system does not tell it.
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    try:
+        # struct ucred: pid, uid, gid
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    except OSError:
+        return None
+    return struct.unpack('3i', creds)[1]
+
+
+def is_daemon_running(socket_path: str) -> bool:
+    """
+    Check whether a daemon is listening on a socket.
+
+    Args:
+        socket_path: Path of the Unix domain socket.
+
+    Returns:
+        True if a connection could be made.
+    """
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,396 @@
+"""
+Scheduler module for CommandWallet.
+
+Runs commands on their cron schedules while the application is open.
+Upcoming fire times of all scheduled commands are kept in a min-heap, and
+the scheduler thread sleeps on a condition variable until the earliest one
+is due (or a schedule changes) instead of polling.
+
+Each schedule has policies for overlapping runs (skip, queue or allow),
+for firings missed while the application was closed or the machine was
+asleep (catch up none, once or all) and a random start jitter. A global
+cap limits how many scheduled runs execute at the same time; firings
+beyond it wait for a free slot.
+"""
+
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Callable, Deque, List, Optional, Tuple
+
+from .cron import CronSchedule, CronError
+
+
+# Longest single sleep, in seconds; waking up now and then keeps firings on
+# time when the wall clock jumps (suspend, NTP or manual changes)
+MAX_SLEEP = 60.0
+
+# A firing this late (seconds) counts as missed and follows the catch-up policy
+MISFIRE_GRACE = 60.0
+
+# Upper bounds protecting against runaway catch-up or queueing
+MAX_CATCH_UP_RUNS = 100
+MAX_QUEUED_RUNS = 10
+
+# Default number of scheduled runs allowed to execute at the same time
+DEFAULT_MAX_CONCURRENT = 4
+
+# Policy values and defaults
+OVERLAP_POLICIES = ('skip', 'queue', 'allow')
+CATCH_UP_POLICIES = ('none', 'once', 'all')
+DEFAULT_OVERLAP = 'skip'
+DEFAULT_CATCH_UP = 'none'
+
+
+def get_schedule_expression(command_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the cron expression of an enabled schedule.
+
+    Args:
+        command_data: Command record.
+
+    Returns:
+        The expression, or None if the command is not scheduled.
+    """
+    schedule = command_data.get('schedule')
+    if not schedule or not schedule.get('enabled') or not schedule.get('expression'):
+        return None
+    return schedule['expression']
+
+
+class _Job:
+    """Compiled schedule and policies of one command."""
+
+    def __init__(self, schedule: Dict[str, Any]):
+        """
+        Compile a command's schedule settings.
+
+        Args:
+            schedule: The command's 'schedule' dictionary.
+
+        Raises:
+            CronError: If the expression is invalid.
+        """
+        self.cron = CronSchedule(schedule['expression'])
+        self.overlap = schedule.get('overlap', DEFAULT_OVERLAP)
+        if self.overlap not in OVERLAP_POLICIES:
+            self.overlap = DEFAULT_OVERLAP
+        self.catch_up = schedule.get('catch_up', DEFAULT_CATCH_UP)
+        if self.catch_up not in CATCH_UP_POLICIES:
+            self.catch_up = DEFAULT_CATCH_UP
+        self.jitter = max(float(schedule.get('jitter') or 0), 0.0)
+        self.last_fired = schedule.get('last_fired')
+
+        # Settings that require re-queueing when they change
+        self.key = (self.cron.expression, self.overlap, self.catch_up, self.jitter)
+
+
+class CronScheduler:
+    """Background thread firing commands on their cron schedules."""
+
+    def __init__(self, fire_callback: Callable[[str, float, Callable[[], None]], None],
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 clock: Callable[[], float] = time.time,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the scheduler (not started).
+
+        Args:
+            fire_callback: Called with the command ID, the scheduled fire
+                time (Unix timestamp) and a `done` function when a run must
+                start. `done` must be called when the run ends (or right
+                away if it does not start) to free its slot.
+            max_concurrent: Maximum number of scheduled runs executing at
+                the same time.
+            clock: Wall clock returning Unix timestamps.
+            rng: Random generator used for jitter.
+        """
+        self.fire_callback = fire_callback
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Heap of (due time, version, command ID, cron time); due time is the
+        # cron time plus jitter. Entries whose version is not the command's
+        # current one are stale and skipped when popped
+        self._heap: List[Tuple[float, int, str, float]] = []
+        self._jobs: Dict[str, _Job] = {}
+        self._versions: Dict[str, int] = {}
+
+        # Runs started and not done, per command and in total
+        self._active: Dict[str, int] = {}
+        self._active_total = 0
+        # Firings waiting for a global slot, and per-command overlap queues
+        self._waiting: Deque[Tuple[str, float]] = deque()
+        self._waiting_count: Dict[str, int] = {}
+        self._queued: Dict[str, Deque[float]] = {}
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_commands(self, commands: Dict[str, Any]) -> None:
+        """
+        Replace all schedules with those of a commands dictionary.
+
+        Commands whose schedule records a previous firing ('last_fired')
+        get the firings missed since then handled by their catch-up policy.
+
+        Args:
+            commands: Dictionary of all commands.
+        """
+        with self._condition:
+            self._heap = []
+            self._jobs = {}
+            for command_id, command_data in commands.items():
+                self._add(command_id, command_data, resume=True)
+            self._condition.notify()
+
+    def update_command(self, command_id: str, command_data: Dict[str, Any]) -> None:
+        """
+        Add, change or remove the schedule of one command.
+
+        Args:
+            command_id: ID of the command.
+            command_data: Command record holding the 'schedule' field.
+        """
+        with self._condition:
+            current = self._jobs.get(command_id)
+            if current is not None and get_schedule_expression(command_data) is not None:
+                try:
+                    if _Job(command_data['schedule']).key == current.key:
+                        return
+                except CronError:
+                    pass
+            self._discard(command_id)
+            self._add(command_id, command_data)
+            self._condition.notify()
+
+    def remove_command(self, command_id: str) -> None:
+        """
+        Remove the schedule of a command.
+
+        Args:
+            command_id: ID of the command.
+        """
+        with self._condition:
+            self._discard(command_id)
+            self._condition.notify()
+
+    def next_fire_time(self, command_id: str) -> Optional[float]:
+        """
+        Get the next fire time of a command.
+
+        Args:
+            command_id: ID of the command.
+
+        Returns:
+            Unix timestamp (including jitter), or None if not scheduled.
+        """
+        with self._condition:
+            version = self._versions.get(command_id)
+            times = [
+                due for due, entry_version, entry_id, _ in self._heap
+                if entry_id == command_id and entry_version == version
+            ]
+        return min(times) if times else None
+
+    def active_count(self) -> int:
+        """Return the number of scheduled runs currently executing."""
+        with self._condition:
+            return self._active_total
+
+    def _add(self, command_id: str, command_data: Dict[str, Any], resume: bool = False) -> None:
+        """Compile a command's schedule and queue its next firing (lock held)."""
+        if get_schedule_expression(command_data) is None:
+            return
+        try:
+            job = _Job(command_data['schedule'])
+        except CronError as e:
+            print(f"Error in schedule of command {command_id}: {e}")
+            return
+
+        self._jobs[command_id] = job
+        version = self._versions.get(command_id, 0) + 1
+        self._versions[command_id] = version
+
+        now = self.clock()
+        if resume and job.catch_up != 'none' and job.last_fired:
+            # Resume after the last firing so missed ones are caught up
+            start = min(job.last_fired, now)
+        else:
+            start = now
+        self._queue_next(command_id, job, version, start)
+
+    def _discard(self, command_id: str) -> None:
+        """Forget a command's schedule; its heap entries become stale (lock held)."""
+        if self._jobs.pop(command_id, None) is not None:
+            self._versions[command_id] = self._versions.get(command_id, 0) + 1
+            self._queued.pop(command_id, None)
+
+    def _queue_next(self, command_id: str, job: _Job, version: int, after: float) -> None:
+        """Queue the first firing after a timestamp (lock held)."""
+        fire = job.cron.next_fire(datetime.fromtimestamp(after))
+        if fire is None:
+            return
+        cron_time = fire.timestamp()
+        due = cron_time + (self.rng.uniform(0, job.jitter) if job.jitter else 0.0)
+        heapq.heappush(self._heap, (due, version, command_id, cron_time))
+
+    def _missed_times(self, job: _Job, cron_time: float, now: float) -> List[float]:
+        """List the cron times from `cron_time` up to now (capped)."""
+        times = [cron_time]
+        moment = datetime.fromtimestamp(cron_time)
+        while len(times) < MAX_CATCH_UP_RUNS:
+            moment = job.cron.next_fire(moment)
+            if moment is None or moment.timestamp() > now:
+                break
+            times.append(moment.timestamp())
+        return times
+
+    def _fire_due(self, command_id: str, version: int, cron_time: float) -> List[Tuple[str, float]]:
+        """
+        Handle a due heap entry and queue the command's next firing (lock held).
+
+        Returns:
+            Runs to start, as (command ID, fire time) pairs.
+        """
+        job = self._jobs[command_id]
+        now = self.clock()
+
+        # Jitter delays the start but does not make a firing late
+        if now - cron_time <= MISFIRE_GRACE + job.jitter:
+            fire_times = [cron_time]
+            next_after = cron_time
+        else:
+            missed = self._missed_times(job, cron_time, now)
+            if job.catch_up == 'all':
+                fire_times = missed
+            elif job.catch_up == 'once':
+                fire_times = missed[-1:]
+            else:
+                fire_times = []
+                print(f"Skipping {len(missed)} missed run(s) of scheduled command {command_id}")
+            next_after = now
+
+        self._queue_next(command_id, job, version, next_after)
+
+        to_start = []
+        for fire_time in fire_times:
+            to_start.extend(self._dispatch(command_id, fire_time))
+        return to_start
+
+    def _dispatch(self, command_id: str, fire_time: float) -> List[Tuple[str, float]]:
+        """
+        Apply the overlap policy and the global cap to one firing (lock held).
+
+        Returns:
+            Runs to start now, as (command ID, fire time) pairs.
+        """
+        job = self._jobs.get(command_id)
+        if job is None:
+            return []
+
+        busy = self._active.get(command_id, 0) + self._waiting_count.get(command_id, 0)
+        if busy and job.overlap == 'skip':
+            print(f"Skipping run of scheduled command {command_id}: previous run still active")
+            return []
+        if busy and job.overlap == 'queue':
+            queue = self._queued.setdefault(command_id, deque())
+            if len(queue) < MAX_QUEUED_RUNS:
+                queue.append(fire_time)
+            return []
+
+        if self._active_total >= self.max_concurrent:
+            self._waiting.append((command_id, fire_time))
+            self._waiting_count[command_id] = self._waiting_count.get(command_id, 0) + 1
+            return []
+
+        self._active[command_id] = self._active.get(command_id, 0) + 1
+        self._active_total += 1
+        return [(command_id, fire_time)]
+
+    def _job_done(self, command_id: str) -> None:
+        """Free the slot of a finished run and start runs waiting for it."""
+        with self._condition:
+            self._active[command_id] = max(self._active.get(command_id, 0) - 1, 0)
+            self._active_total = max(self._active_total - 1, 0)
+            to_start = []
+
+            # Runs waiting for a global slot, oldest first
+            while self._waiting and self._active_total < self.max_concurrent:
+                waiting_id, fire_time = self._waiting.popleft()
+                self._waiting_count[waiting_id] -= 1
+                to_start.extend(self._dispatch(waiting_id, fire_time))
+
+            # A run queued behind this one by the 'queue' overlap policy;
+            # it waits behind the runs above if no slot is left
+            queue = self._queued.get(command_id)
+            if queue and not self._active[command_id] and not self._waiting_count.get(command_id):
+                to_start.extend(self._dispatch(command_id, queue.popleft()))
+
+        self._start(to_start)
+
+    def _start(self, runs: List[Tuple[str, float]]) -> None:
+        """Invoke the fire callback for runs to start (lock not held)."""
+        for command_id, fire_time in runs:
+            finished = threading.Event()
+
+            def done(command_id=command_id, finished=finished):
+                # Tolerate callers reporting the end of a run twice
+                if not finished.is_set():
+                    finished.set()
+                    self._job_done(command_id)
+
+            try:
+                self.fire_callback(command_id, fire_time, done)
+            except Exception as e:
+                print(f"Error firing scheduled command {command_id}: {e}")
+                done()
+
+    def _run(self) -> None:
+        """Scheduler loop: sleep until the earliest firing, then fire it."""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due, version, command_id, cron_time = self._heap[0]
+                if self._versions.get(command_id) != version:
+                    heapq.heappop(self._heap)
+                    continue
+
+                delay = due - self.clock()
+                if delay > 0:
+                    self._condition.wait(min(delay, MAX_SLEEP))
+                    continue
+
+                heapq.heappop(self._heap)
+                to_start = self._fire_due(command_id, version, cron_time)
+
+            self._start(to_start)
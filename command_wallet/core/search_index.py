@@ -0,0 +1,369 @@
+"""
+Search index module for CommandWallet.
+
+Keeps an in-memory index over command names and command text that is
+updated incrementally and answers ranked fuzzy queries.
+"""
+
+import heapq
+import re
+import time
+from bisect import bisect_right
+from itertools import accumulate, islice
+from typing import Dict, Any, List, Optional, Set
+
+from .frecency import frecency_key, score_from_key
+
+
+# Match quality for each kind of hit, best first
+QUALITY_NAME_PREFIX = 1.0
+QUALITY_NAME_WORD = 0.9
+QUALITY_NAME_SUBSTRING = 0.8
+QUALITY_COMMAND_SUBSTRING = 0.6
+QUALITY_NAME_FUZZY = 0.4
+QUALITY_COMMAND_FUZZY = 0.3
+
+# Weight of usage (frecency) relative to match quality
+USAGE_WEIGHT = 0.3
+
+# Time budget for a whole query, in seconds; the substring scans and the
+# subsequence (fuzzy) stage stop early once it is spent so results always
+# come back within a frame
+SEARCH_BUDGET = 0.012
+
+# Number of slots checked between two looks at the fuzzy time budget
+FUZZY_CHUNK = 1024
+
+# Above `cap * DENSE_FACTOR` hits a needle is scanned for in usage order
+DENSE_FACTOR = 4
+
+# Edited slots checked one by one before a joined column is rebuilt
+MAX_STALE_SLOTS = 512
+
+
+def _char_bit(char: str) -> int:
+    """Map a character to one of 64 mask bits (letters and digits get their own)."""
+    if 'a' <= char <= 'z':
+        return 1 << (ord(char) - 97)
+    if '0' <= char <= '9':
+        return 1 << (ord(char) - 22)
+    return 1 << (36 + ord(char) % 28)
+
+
+def _char_mask(text: str) -> int:
+    """Build a 64-bit mask of the characters present in a string."""
+    mask = 0
+    for char in set(text):
+        mask |= _char_bit(char)
+    return mask
+
+
+class _Column:
+    """Newline-joined copy of one indexed field for fast substring scans."""
+
+    def __init__(self, values: List[str]):
+        self.blob = '\n'.join(values) + '\n'
+        self.offsets = list(accumulate((len(value) + 1 for value in values), initial=0))
+
+    def find_slots(self, needle: str) -> List[int]:
+        """Return the slots whose value contains the needle, in slot order."""
+        blob = self.blob
+        offsets = self.offsets
+        slots = []
+        pos = blob.find(needle)
+        while pos != -1:
+            slot = bisect_right(offsets, pos) - 1
+            slots.append(slot)
+            pos = blob.find(needle, offsets[slot + 1])
+        return slots
+
+
+class CommandSearchIndex:
+    """Incrementally maintained fuzzy search index over commands."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # Slot-based columns; deleted slots are reused through the free list
+        self._ids: List[Optional[str]] = []
+        self._names: List[str] = []
+        self._texts: List[str] = []
+        self._masks: List[int] = []
+        # Time-invariant frecency keys, see command_wallet.core.frecency
+        self._usage: List[float] = []
+        self._free: List[int] = []
+        self._slots: Dict[str, int] = {}
+
+        # Slots ordered by usage, best first; rebuilt lazily when stale
+        self._order: List[int] = []
+        self._order_dirty = False
+
+        # Joined columns for substring scans, and the slots edited since
+        # they were built (checked directly until the next rebuild)
+        self._name_column: Optional[_Column] = None
+        self._text_column: Optional[_Column] = None
+        self._stale_names: Set[int] = set()
+        self._stale_texts: Set[int] = set()
+
+    def __len__(self) -> int:
+        """Return the number of indexed commands."""
+        return len(self._slots)
+
+    def rebuild(self, commands: Dict[str, Any]) -> None:
+        """
+        Rebuild the index from scratch.
+
+        Args:
+            commands: Dictionary of all commands.
+        """
+        self.__init__()
+        # Sorted once on first use instead of on every insertion
+        self._order_dirty = True
+        for command_id, command_data in commands.items():
+            self.add(command_id, command_data)
+
+    def add(self, command_id: str, command_data: Dict[str, Any]) -> None:
+        """
+        Add a command to the index, or re-index it if already present.
+
+        Args:
+            command_id: ID of the command.
+            command_data: Command record.
+        """
+        if command_id in self._slots:
+            self.update(command_id, command_data)
+            return
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._ids)
+            self._ids.append(None)
+            self._names.append('')
+            self._texts.append('')
+            self._masks.append(0)
+            self._usage.append(0.0)
+
+        self._ids[slot] = command_id
+        self._slots[command_id] = slot
+        self._store(slot, command_data)
+        self._place_in_order(slot)
+
+    def update(self, command_id: str, command_data: Dict[str, Any]) -> None:
+        """
+        Re-index a command after its name, text or usage changed.
+
+        Args:
+            command_id: ID of the command.
+            command_data: Updated command record.
+        """
+        slot = self._slots.get(command_id)
+        if slot is None:
+            self.add(command_id, command_data)
+            return
+
+        previous_usage = self._usage[slot]
+        self._store(slot, command_data)
+        if self._usage[slot] != previous_usage and not self._order_dirty:
+            self._order.remove(slot)
+            self._place_in_order(slot)
+
+    def remove(self, command_id: str) -> None:
+        """
+        Remove a command from the index.
+
+        Args:
+            command_id: ID of the command.
+        """
+        slot = self._slots.pop(command_id, None)
+        if slot is None:
+            return
+
+        self._ids[slot] = None
+        self._names[slot] = ''
+        self._texts[slot] = ''
+        self._masks[slot] = 0
+        self._free.append(slot)
+        if not self._order_dirty:
+            self._order.remove(slot)
+        self._stale_names.add(slot)
+        self._stale_texts.add(slot)
+
+    def search(self, query: str, limit: int = 100) -> List[str]:
+        """
+        Search commands by name and command text.
+
+        Results are ranked by match quality (name prefix, word prefix,
+        substring, then subsequence matches) combined with how often and
+        how recently each command was executed.
+
+        Args:
+            query: Text typed by the user.
+            limit: Maximum number of results to return.
+
+        Returns:
+            List of matching command IDs, best match first.
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        deadline = time.perf_counter() + SEARCH_BUDGET
+
+        # Collect a few more hits than requested so that better-quality
+        # matches on less used commands can still make the cut
+        cap = limit * 4
+        scored: Dict[int, float] = {}
+
+        for slot in self._substring_slots(needle, self._get_name_column(), self._names,
+                                          self._stale_names, cap, deadline):
+            name = self._names[slot]
+            if name.startswith(needle):
+                scored[slot] = QUALITY_NAME_PREFIX
+            elif (' ' + needle) in name:
+                scored[slot] = QUALITY_NAME_WORD
+            else:
+                scored[slot] = QUALITY_NAME_SUBSTRING
+
+        # Later stages only run while in budget, unless nothing was found yet
+        if len(scored) < limit and (not scored or time.perf_counter() < deadline):
+            for slot in self._substring_slots(needle, self._get_text_column(), self._texts,
+                                              self._stale_texts, cap, deadline):
+                if slot not in scored:
+                    scored[slot] = QUALITY_COMMAND_SUBSTRING
+
+        if len(scored) < limit and len(needle) > 1:
+            self._fuzzy_search(needle, scored, cap, deadline)
+
+        now = time.time()
+        usage = self._usage
+
+        def rank(slot: int) -> float:
+            # Saturate the decayed run count into [0, 1)
+            score = score_from_key(usage[slot], now)
+            return scored[slot] + USAGE_WEIGHT * score / (score + 1.0)
+
+        ranked = sorted(scored, key=rank, reverse=True)
+        return [self._ids[slot] for slot in ranked[:limit]]
+
+    def _substring_slots(self, needle: str, column: _Column, values: List[str],
+                         stale: Set[int], cap: int, deadline: float) -> List[int]:
+        """
+        Find up to `cap` slots containing a needle in one field, most used first.
+
+        Needles with a manageable number of hits are located directly in the
+        joined column, plus the edited slots the column does not reflect yet;
+        very common needles are scanned for in usage order so the scan can
+        stop early, at `cap` hits or at the deadline.
+        """
+        usage = self._usage
+        if column.blob.count(needle) > cap * DENSE_FACTOR:
+            order = self._get_order()
+            slots = []
+            # The most used chunk is always scanned, later ones only while in budget
+            for start in range(0, len(order), FUZZY_CHUNK):
+                if start and time.perf_counter() > deadline:
+                    break
+                chunk = order[start:start + FUZZY_CHUNK]
+                slots.extend(islice((s for s in chunk if needle in values[s]), cap - len(slots)))
+                if len(slots) >= cap:
+                    break
+            return slots
+
+        ids = self._ids
+        slots = [s for s in column.find_slots(needle) if ids[s] is not None and s not in stale]
+        slots.extend(s for s in stale if ids[s] is not None and needle in values[s])
+        if len(slots) > cap:
+            slots = heapq.nlargest(cap, slots, key=lambda s: usage[s])
+        return slots
+
+    def _fuzzy_search(self, needle: str, scored: Dict[int, float],
+                      cap: int, deadline: float) -> None:
+        """Add subsequence matches in usage order until the deadline."""
+        needle_mask = _char_mask(needle)
+        masks = self._masks
+        pattern = re.compile('.*?'.join(re.escape(char) for char in needle))
+        names = self._names
+        texts = self._texts
+        order = self._get_order()
+
+        found = 0
+        # The most used chunk is always checked, later ones only while in budget
+        for start in range(0, len(order), FUZZY_CHUNK):
+            if start and time.perf_counter() > deadline:
+                break
+            chunk = order[start:start + FUZZY_CHUNK]
+            for slot in [s for s in chunk if masks[s] & needle_mask == needle_mask]:
+                if slot in scored:
+                    continue
+                if pattern.search(names[slot]):
+                    scored[slot] = QUALITY_NAME_FUZZY
+                elif pattern.search(texts[slot]):
+                    scored[slot] = QUALITY_COMMAND_FUZZY
+                else:
+                    continue
+                found += 1
+                if found >= cap:
+                    return
+
+    def _store(self, slot: int, command_data: Dict[str, Any]) -> None:
+        """Write the searchable columns of a command into a slot."""
+        name = (command_data.get('name') or '').lower()
+        text = (command_data.get('command') or '').lower()
+        if name != self._names[slot]:
+            self._names[slot] = name
+            self._stale_names.add(slot)
+        if text != self._texts[slot]:
+            self._texts[slot] = text
+            self._stale_texts.add(slot)
+        self._masks[slot] = _char_mask(name) | _char_mask(text)
+        self._usage[slot] = self._usage_score(command_data)
+
+    def _usage_score(self, command_data: Dict[str, Any]) -> float:
+        """
+        Get the usage ordering key of a command.
+
+        Args:
+            command_data: Command record.
+
+        Returns:
+            The frecency key of the command's run counter.
+        """
+        return frecency_key(command_data.get('frecency'))
+
+    def _place_in_order(self, slot: int) -> None:
+        """Insert a slot into the usage order, unless a full sort is pending."""
+        if self._order_dirty:
+            return
+        order = self._order
+        usage = self._usage
+        value = usage[slot]
+        # Binary search for the first slot used less, the order being descending
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if usage[order[middle]] >= value:
+                low = middle + 1
+            else:
+                high = middle
+        order.insert(low, slot)
+
+    def _get_order(self) -> List[int]:
+        """Return live slots sorted by usage, best first."""
+        if self._order_dirty:
+            usage = self._usage
+            self._order = sorted(self._slots.values(), key=lambda s: usage[s], reverse=True)
+            self._order_dirty = False
+        return self._order
+
+    def _get_name_column(self) -> _Column:
+        """Return the joined name column, rebuilding it after many edits."""
+        if self._name_column is None or len(self._stale_names) > MAX_STALE_SLOTS:
+            self._name_column = _Column(self._names)
+            self._stale_names.clear()
+        return self._name_column
+
+    def _get_text_column(self) -> _Column:
+        """Return the joined command text column, rebuilding it after many edits."""
+        if self._text_column is None or len(self._stale_texts) > MAX_STALE_SLOTS:
+            self._text_column = _Column(self._texts)
+            self._stale_texts.clear()
+        return self._text_column
@@ -0,0 +1,243 @@
+"""
+Command list module for CommandWallet.
+
+Provides a virtualized command list that only creates enough row widgets
+to fill the visible viewport and recycles them while scrolling.
+"""
+
+import customtkinter as ctk
+from typing import Callable, List, Optional
+
+
+class VirtualCommandList:
+    """Scrollable list of command buttons with widget recycling."""
+
+    def __init__(self, parent, on_select: Callable[[str], None],
+                 get_label: Callable[[str], str],
+                 get_tooltip: Callable[[str], str],
+                 row_height: int = 32):
+        """
+        Initialize the virtualized command list.
+
+        Args:
+            parent: Parent widget.
+            on_select: Callback invoked with the command ID of a clicked row.
+            get_label: Callback returning the button text for a command ID.
+            get_tooltip: Callback returning the tooltip text for a command ID.
+            row_height: Height in pixels reserved for each row.
+        """
+        self.on_select = on_select
+        self.get_label = get_label
+        self.get_tooltip = get_tooltip
+        self.row_height = row_height
+
+        # Model: ordered command IDs and the first visible position
+        self.items: List[str] = []
+        self.first_index = 0
+
+        # Recycled row widgets and what each one currently displays
+        self.rows: List[ctk.CTkButton] = []
+        self.row_ids: List[Optional[str]] = []
+        self.row_texts: List[Optional[str]] = []
+        self.visible_rows = 0
+        self.tooltip = None
+
+        self.frame = ctk.CTkFrame(parent)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(
+            self.frame,
+            text="Commands List"
+        ).grid(row=0, column=0, columnspan=2, pady=(5, 0))
+
+        self.rows_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.rows_frame.grid(row=1, column=0, sticky="nsew", padx=(5, 0), pady=5)
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+        # The viewport size comes from the parent, never from the rows
+        self.rows_frame.grid_propagate(False)
+
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 5), pady=5)
+
+        self.rows_frame.bind("<Configure>", self._on_resize)
+        self._bind_mousewheel(self.rows_frame)
+
+    def grid(self, **kwargs) -> None:
+        """Place the list in its parent using the grid geometry manager."""
+        self.frame.grid(**kwargs)
+
+    def set_items(self, command_ids: List[str]) -> None:
+        """
+        Replace the ordered list of command IDs shown by the list.
+
+        Args:
+            command_ids: Command IDs in display order.
+        """
+        self.items = list(command_ids)
+        self._clamp_first_index()
+        self._render()
+
+    def update_item(self, command_id: str) -> None:
+        """
+        Refresh a single row in place if the command is currently visible.
+
+        Args:
+            command_id: ID of the command whose label changed.
+        """
+        for row_index in range(self.visible_rows):
+            if self.row_ids[row_index] == command_id:
+                self._configure_row(row_index, command_id)
+                return
+
+    def scroll_to(self, command_id: str) -> None:
+        """
+        Scroll so that the given command is visible.
+
+        Args:
+            command_id: ID of the command to reveal.
+        """
+        try:
+            position = self.items.index(command_id)
+        except ValueError:
+            return
+
+        page = max(self.visible_rows, 1)
+        if position < self.first_index:
+            self.first_index = position
+        elif position >= self.first_index + page:
+            self.first_index = position - page + 1
+        else:
+            return
+        self._clamp_first_index()
+        self._render()
+
+    def _on_resize(self, event) -> None:
+        """Grow the row pool to fill the viewport after a resize."""
+        needed = max(event.height // self.row_height, 1)
+        if needed == self.visible_rows:
+            return
+
+        while len(self.rows) < needed:
+            self._create_row(len(self.rows))
+
+        self.visible_rows = needed
+        self._clamp_first_index()
+        self._render()
+
+    def _create_row(self, row_index: int) -> None:
+        """Create one reusable row button."""
+        button = ctk.CTkButton(
+            self.rows_frame,
+            text="",
+            height=self.row_height - 4,
+            command=lambda idx=row_index: self._on_row_click(idx),
+            anchor="w"
+        )
+        button.bind("<Enter>", lambda e, idx=row_index: self._show_tooltip(e, idx))
+        button.bind("<Leave>", self._hide_tooltip)
+        self._bind_mousewheel(button)
+
+        self.rows.append(button)
+        self.row_ids.append(None)
+        self.row_texts.append(None)
+
+    def _render(self) -> None:
+        """Bind the visible slice of the model to the row widgets."""
+        for row_index, button in enumerate(self.rows):
+            position = self.first_index + row_index
+            if row_index < self.visible_rows and position < len(self.items):
+                self._configure_row(row_index, self.items[position])
+                if self.row_ids[row_index] is not None and not button.winfo_manager():
+                    button.grid(row=row_index, column=0, sticky="ew", padx=5, pady=2)
+            elif self.row_ids[row_index] is not None:
+                button.grid_remove()
+                self.row_ids[row_index] = None
+
+        self._update_scrollbar()
+
+    def _configure_row(self, row_index: int, command_id: str) -> None:
+        """Point a row at a command, touching the widget only if needed."""
+        text = self.get_label(command_id)
+        self.row_ids[row_index] = command_id
+        if self.row_texts[row_index] != text:
+            self.rows[row_index].configure(text=text)
+            self.row_texts[row_index] = text
+
+    def _update_scrollbar(self) -> None:
+        """Sync the scrollbar slider with the visible slice."""
+        total = len(self.items)
+        if total == 0 or total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+            return
+
+        low = self.first_index / total
+        high = min(self.first_index + self.visible_rows, total) / total
+        self.scrollbar.set(low, high)
+
+    def _clamp_first_index(self) -> None:
+        """Keep the first visible position inside the model bounds."""
+        max_first = max(len(self.items) - self.visible_rows, 0)
+        self.first_index = min(max(self.first_index, 0), max_first)
+
+    def _scroll_by(self, rows: int) -> None:
+        """Scroll the list by a number of rows."""
+        previous = self.first_index
+        self.first_index += rows
+        self._clamp_first_index()
+        if self.first_index != previous:
+            self._hide_tooltip()
+            self._render()
+
+    def _on_scrollbar(self, action: str, *args) -> None:
+        """Handle scrollbar drag and arrow commands."""
+        if action == "moveto":
+            self.first_index = int(float(args[0]) * len(self.items))
+            self._clamp_first_index()
+            self._render()
+        elif action == "scroll":
+            amount = int(args[0])
+            if len(args) > 1 and args[1] == "pages":
+                amount *= max(self.visible_rows - 1, 1)
+            self._scroll_by(amount)
+
+    def _bind_mousewheel(self, widget) -> None:
+        """Route mouse wheel events on a widget to the list."""
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        widget.bind("<Button-5>", lambda e: self._scroll_by(3))
+
+    def _on_mousewheel(self, event) -> None:
+        """Handle mouse wheel scrolling (Windows and macOS)."""
+        if event.delta:
+            self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_row_click(self, row_index: int) -> None:
+        """Dispatch a row click to the command it currently shows."""
+        command_id = self.row_ids[row_index]
+        if command_id is not None:
+            self.on_select(command_id)
+
+    def _show_tooltip(self, event, row_index: int) -> None:
+        """Show the tooltip for the command shown in a row."""
+        command_id = self.row_ids[row_index]
+        if command_id is None:
+            return
+
+        self._hide_tooltip()
+        self.tooltip = ctk.CTkToplevel(self.rows[row_index])
+        self.tooltip.wm_overrideredirect(True)
+        self.tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
+
+        label = ctk.CTkLabel(
+            self.tooltip,
+            text=self.get_tooltip(command_id),
+            font=ctk.CTkFont(size=10)
+        )
+        label.pack()
+
+    def _hide_tooltip(self, event=None) -> None:
+        """Destroy the tooltip window if one is shown."""
+        if self.tooltip is not None:
+            self.tooltip.destroy()
+            self.tooltip = None
@@ -6,13 +6,24 @@ with schedule configuration and preview.
 """
 
 import customtkinter as ctk
-from typing import Dict, Any, Callable, List
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from ..core.cron import CronSchedule, CronError, CRON_FIELDS
+from ..core.scheduler import (
+    OVERLAP_POLICIES, CATCH_UP_POLICIES, DEFAULT_OVERLAP, DEFAULT_CATCH_UP
+)
+
+
+# Number of upcoming fire times shown in the preview
+UPCOMING_RUN_COUNT = 5
 
 
 class CronExportDialog:
     """Dialog for exporting commands as cron entries."""
     
-    def __init__(self, parent, command_data: Dict[str, Any], prepare_command_callback: Callable[[Dict[str, Any]], str]):
+    def __init__(self, parent, command_data: Dict[str, Any], prepare_command_callback: Callable[[Dict[str, Any]], str],
+                 save_schedule_callback: Optional[Callable[[Optional[Dict[str, Any]]], None]] = None):
         """
         Initialize the cron export dialog.
         
@@ -20,20 +31,29 @@ class CronExportDialog:
             parent: Parent window.
             command_data: Command data to export.
             prepare_command_callback: Callback to prepare the final command string.
+            save_schedule_callback: Optional callback storing the schedule on
+                the command so the built-in scheduler runs it.
         """
         self.parent = parent
         self.command_data = command_data
         self.prepare_command_callback = prepare_command_callback
+        self.save_schedule_callback = save_schedule_callback
         self.window = None
+        self.schedule_var = None
+        self.crontab_var = None
+        self.overlap_var = None
+        self.catch_up_var = None
+        self.jitter_entry = None
         self.cron_entries = []
         self.cron_preview_label = None
+        self.upcoming_label = None
         self.cron_output_text = None
     
     def show(self) -> None:
         """Show the cron export dialog."""
         self.window = ctk.CTkToplevel(self.parent)
         self.window.title("Export to Cron")
-        self.window.geometry("700x600")
+        self.window.geometry("760x760")
         self.window.transient(self.parent)
         
         # Wait for window to be fully created before grabbing focus
@@ -112,10 +132,16 @@ class CronExportDialog:
             ("Minute", "0-59", "* means every minute"),
             ("Hour", "0-23", "* means every hour"),
             ("Day", "1-31", "* means every day"),
-            ("Month", "1-12", "* means every month"),
-            ("Weekday", "0-7", "0 and 7 = Sunday, * means every day")
+            ("Month", "1-12", "jan-dec also allowed, * means every month"),
+            ("Weekday", "0-7", "0 and 7 = Sunday, mon-fri also allowed, * means every day")
         ]
         
+        # Start from the command's saved schedule, if any
+        schedule = self.command_data.get('schedule') or {}
+        saved_fields = schedule.get('expression', '').split()
+        if len(saved_fields) != len(field_info):
+            saved_fields = ["*"] * len(field_info)
+        
         # Create cron entry fields
         self.cron_entries = []
         for i, (label, range_text, desc) in enumerate(field_info):
@@ -129,7 +155,7 @@ class CronExportDialog:
             # Entry
             entry = ctk.CTkEntry(grid_frame, width=80, placeholder_text="*")
             entry.grid(row=i, column=1, padx=(0, 20), pady=5)
-            entry.insert(0, "*")
+            entry.insert(0, saved_fields[i])
             entry.bind('<KeyRelease>', self._update_cron_preview)
             self.cron_entries.append(entry)
             
@@ -147,6 +173,52 @@ class CronExportDialog:
                 font=ctk.CTkFont(size=10),
                 text_color="gray"
             ).grid(row=i, column=3, sticky="w", padx=(0, 10), pady=5)
+        
+        if self.save_schedule_callback:
+            self.schedule_var = ctk.BooleanVar(value=bool(schedule.get('enabled')))
+            ctk.CTkCheckBox(
+                fields_frame, 
+                text="Run on this schedule while CommandWallet is open", 
+                variable=self.schedule_var
+            ).pack(anchor="w", padx=20, pady=(0, 5))
+            
+            self.crontab_var = ctk.BooleanVar(value=bool(schedule.get('crontab')))
+            ctk.CTkCheckBox(
+                fields_frame, 
+                text="Include in the system crontab (Install Crontab)", 
+                variable=self.crontab_var
+            ).pack(anchor="w", padx=20, pady=(5, 10))
+            
+            self._create_policy_fields(fields_frame, schedule)
+    
+    def _create_policy_fields(self, parent, schedule: Dict[str, Any]) -> None:
+        """Create the overlap, catch-up and jitter settings of the built-in scheduler."""
+        policy_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        policy_frame.pack(anchor="w", padx=20, pady=(0, 15))
+        
+        ctk.CTkLabel(policy_frame, text="If still running:").pack(side="left", padx=(0, 5))
+        self.overlap_var = ctk.StringVar(value=schedule.get('overlap', DEFAULT_OVERLAP))
+        ctk.CTkOptionMenu(
+            policy_frame, 
+            values=list(OVERLAP_POLICIES), 
+            variable=self.overlap_var, 
+            width=90
+        ).pack(side="left", padx=(0, 15))
+        
+        ctk.CTkLabel(policy_frame, text="Missed runs:").pack(side="left", padx=(0, 5))
+        self.catch_up_var = ctk.StringVar(value=schedule.get('catch_up', DEFAULT_CATCH_UP))
+        ctk.CTkOptionMenu(
+            policy_frame, 
+            values=list(CATCH_UP_POLICIES), 
+            variable=self.catch_up_var, 
+            width=90
+        ).pack(side="left", padx=(0, 15))
+        
+        ctk.CTkLabel(policy_frame, text="Jitter (s):").pack(side="left", padx=(0, 5))
+        self.jitter_entry = ctk.CTkEntry(policy_frame, width=60, placeholder_text="0")
+        self.jitter_entry.pack(side="left")
+        if schedule.get('jitter'):
+            self.jitter_entry.insert(0, str(schedule['jitter']))
     
     def _create_preview_section(self) -> None:
         """Create the schedule preview section."""
@@ -165,7 +237,15 @@ class CronExportDialog:
             font=ctk.CTkFont(size=12), 
             wraplength=650
         )
-        self.cron_preview_label.pack(anchor="w", padx=10, pady=(0, 10))
+        self.cron_preview_label.pack(anchor="w", padx=10, pady=(0, 5))
+        
+        self.upcoming_label = ctk.CTkLabel(
+            preview_frame, 
+            text="", 
+            font=ctk.CTkFont(family="Consolas", size=11),
+            justify="left"
+        )
+        self.upcoming_label.pack(anchor="w", padx=10, pady=(0, 10))
     
     def _create_output_section(self) -> None:
         """Create the generated cron entry output section."""
@@ -199,6 +279,15 @@ class CronExportDialog:
         )
         self.copy_btn.pack(side="right", padx=(5, 10), pady=10)
         
+        # Save schedule button
+        if self.save_schedule_callback:
+            self.save_btn = ctk.CTkButton(
+                buttons_frame, 
+                text="Save Schedule", 
+                command=self._save_schedule
+            )
+            self.save_btn.pack(side="right", padx=(5, 5), pady=10)
+        
         # Close button
         ctk.CTkButton(
             buttons_frame, 
@@ -220,6 +309,10 @@ class CronExportDialog:
         month = self.cron_entries[3].get() or "*"
         weekday = self.cron_entries[4].get() or "*"
         
+        # Validate the fields and list the next fire times
+        cron_schedule = f"{minute} {hour} {day} {month} {weekday}"
+        self._show_upcoming_runs(cron_schedule)
+        
         # Generate human-readable description
         description = self._get_cron_description(minute, hour, day, month, weekday)
         self.cron_preview_label.configure(text=description)
@@ -227,13 +320,43 @@ class CronExportDialog:
         # Generate cron entry
         final_command = self.prepare_command_callback(self.command_data)
         
-        cron_schedule = f"{minute} {hour} {day} {month} {weekday}"
         cron_entry = f"# {self.command_data['name']} - {description}\n{cron_schedule} {final_command}"
         
         # Update output text
         self.cron_output_text.delete("1.0", "end")
         self.cron_output_text.insert("1.0", cron_entry)
     
+    def _show_upcoming_runs(self, expression: str) -> None:
+        """
+        Show the next fire times of a schedule, or why it is invalid.
+        
+        Args:
+            expression: Cron expression built from the fields.
+        """
+        default_border = ctk.ThemeManager.theme["CTkEntry"]["border_color"]
+        for entry in self.cron_entries:
+            entry.configure(border_color=default_border)
+        
+        try:
+            schedule = CronSchedule(expression)
+        except CronError as e:
+            field_names = [name for name, _, _ in CRON_FIELDS]
+            if e.field in field_names:
+                self.cron_entries[field_names.index(e.field)].configure(border_color="red")
+            self.upcoming_label.configure(text=f"Invalid {e}", text_color="red")
+            return
+        
+        times = schedule.next_fire_times(datetime.now(), UPCOMING_RUN_COUNT)
+        if not times:
+            self.upcoming_label.configure(text="This schedule never fires.", text_color="orange")
+            return
+        
+        lines = ["Next runs:"] + [f"  {t.strftime('%a %d/%m/%Y %H:%M')}" for t in times]
+        self.upcoming_label.configure(
+            text="\n".join(lines),
+            text_color=ctk.ThemeManager.theme["CTkLabel"]["text_color"]
+        )
+    
     def _get_cron_description(self, minute: str, hour: str, day: str, month: str, weekday: str) -> str:
         """
         Generate human-readable description of cron schedule.
@@ -315,6 +438,38 @@ class CronExportDialog:
             self.copy_btn.configure(text="Copied!")
             self.window.after(1500, lambda: self.copy_btn.configure(text="Copy to Clipboard"))
     
+    def _get_cron_schedule(self) -> str:
+        """Get the schedule fields as one cron expression."""
+        return " ".join(entry.get().strip() or "*" for entry in self.cron_entries)
+    
+    def _save_schedule(self) -> None:
+        """Store the schedule on the command for the built-in scheduler."""
+        expression = self._get_cron_schedule()
+        try:
+            CronSchedule(expression)
+        except CronError as e:
+            self.cron_preview_label.configure(text=f"Invalid schedule: {e}")
+            return
+        
+        try:
+            jitter = float(self.jitter_entry.get().strip() or 0)
+            if jitter < 0:
+                raise ValueError
+        except ValueError:
+            self.cron_preview_label.configure(text="Invalid jitter: enter a number of seconds")
+            return
+        
+        self.save_schedule_callback({
+            'expression': expression,
+            'enabled': self.schedule_var.get(),
+            'crontab': self.crontab_var.get(),
+            'overlap': self.overlap_var.get(),
+            'catch_up': self.catch_up_var.get(),
+            'jitter': jitter
+        })
+        self.save_btn.configure(text="Saved!")
+        self.window.after(1500, lambda: self.save_btn.configure(text="Save Schedule"))
+    
     def _close_dialog(self) -> None:
         """Close the dialog."""
         self.window.destroy()
@@ -0,0 +1,184 @@
+"""
+Debug panel module for CommandWallet.
+
+Provides a window showing the event-loop instrumentation: handler timing
+histograms, event-loop lag and the most recent slow handler calls, and a
+window showing profiling reports.
+"""
+
+import customtkinter as ctk
+from datetime import datetime
+from tkinter import filedialog
+
+from .instrumentation import TkInstrumentation, LOOP_LAG_METRIC
+
+
+# Interval between two refreshes of the panel, in milliseconds
+REFRESH_INTERVAL_MS = 1000
+
+# Number of handlers listed, slowest total time first
+MAX_HANDLER_ROWS = 40
+
+# Number of recent slow calls listed
+MAX_SLOW_ROWS = 20
+
+
+class DebugPanel:
+    """Window showing event-loop latency statistics."""
+
+    def __init__(self, parent, instrumentation: TkInstrumentation):
+        """
+        Initialize the debug panel.
+
+        Args:
+            parent: Parent window.
+            instrumentation: Instrumentation whose measurements are shown.
+        """
+        self.parent = parent
+        self.instrumentation = instrumentation
+        self.window = None
+        self.stats_text = None
+        self._refresh_after_id = None
+
+    def show(self) -> None:
+        """Show the debug panel."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title("Event Loop Stats")
+        self.window.geometry("900x600")
+        self.window.transient(self.parent)
+        self.window.protocol("WM_DELETE_WINDOW", self._close_panel)
+
+        self._create_widgets()
+        self._refresh()
+
+    def _create_widgets(self) -> None:
+        """Create the panel widgets."""
+        self.stats_text = ctk.CTkTextbox(
+            self.window,
+            wrap="none",
+            font=ctk.CTkFont(family="Consolas", size=11)
+        )
+        self.stats_text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        buttons_frame = ctk.CTkFrame(self.window)
+        buttons_frame.pack(fill="x", padx=10, pady=(5, 10))
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="Export JSON...",
+            command=self._export_json
+        ).pack(side="left", padx=10, pady=10)
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="Close",
+            command=self._close_panel
+        ).pack(side="right", padx=10, pady=10)
+
+    def _refresh(self) -> None:
+        """Redraw the statistics and schedule the next refresh."""
+        self.stats_text.configure(state="normal")
+        self.stats_text.delete("1.0", "end")
+        self.stats_text.insert("end", self._format_stats())
+        self.stats_text.configure(state="disabled")
+        self._refresh_after_id = self.window.after(REFRESH_INTERVAL_MS, self._refresh)
+
+    def _format_stats(self) -> str:
+        """Format the measurements as text tables."""
+        registry = self.instrumentation.registry
+        lines = []
+
+        lag = registry.find(LOOP_LAG_METRIC)
+        if lag is not None and lag.count:
+            lines.append(
+                f"Event loop lag: p50 {lag.quantile(0.5) * 1000:.1f} ms   "
+                f"p95 {lag.quantile(0.95) * 1000:.1f} ms   "
+                f"p99 {lag.quantile(0.99) * 1000:.1f} ms   "
+                f"max {lag.max * 1000:.1f} ms   ({lag.count} beats)"
+            )
+            lines.append("")
+
+        handlers = [
+            (name, histogram) for name, histogram in registry.items()
+            if name != LOOP_LAG_METRIC and histogram.count
+        ]
+        handlers.sort(key=lambda item: item[1].sum, reverse=True)
+
+        lines.append(f"{'Handler':<60} {'calls':>8} {'total ms':>10} "
+                     f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for name, histogram in handlers[:MAX_HANDLER_ROWS]:
+            lines.append(
+                f"{name[:60]:<60} {histogram.count:>8} {histogram.sum * 1000:>10.1f} "
+                f"{histogram.quantile(0.5) * 1000:>8.2f} "
+                f"{histogram.quantile(0.95) * 1000:>8.2f} "
+                f"{histogram.quantile(0.99) * 1000:>8.2f} "
+                f"{histogram.max * 1000:>8.2f}"
+            )
+
+        slow_calls = list(self.instrumentation.slow_calls)[-MAX_SLOW_ROWS:]
+        if slow_calls:
+            lines.append("")
+            lines.append(f"Recent slow handlers (>= {self.instrumentation.slow_handler * 1000:.0f} ms):")
+            for timestamp, name, duration in reversed(slow_calls):
+                time_str = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+                lines.append(f"  [{time_str}] {name}: {duration * 1000:.1f} ms")
+
+        return "\n".join(lines) + "\n"
+
+    def _export_json(self) -> None:
+        """Save the measurements to a JSON file chosen by the user."""
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")],
+            initialfile="command-wallet-stats.json"
+        )
+        if path:
+            self.instrumentation.dump(path)
+
+    def _close_panel(self) -> None:
+        """Stop refreshing and close the panel."""
+        if self._refresh_after_id is not None:
+            self.window.after_cancel(self._refresh_after_id)
+            self._refresh_after_id = None
+        self.window.destroy()
+
+
+class ReportWindow:
+    """Window showing a text report, e.g. a profile summary."""
+
+    def __init__(self, parent, title: str, text: str):
+        """
+        Initialize the report window.
+
+        Args:
+            parent: Parent window.
+            title: Window title.
+            text: Report text.
+        """
+        self.parent = parent
+        self.title = title
+        self.text = text
+        self.window = None
+
+    def show(self) -> None:
+        """Show the report."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title(self.title)
+        self.window.geometry("1000x600")
+        self.window.transient(self.parent)
+
+        report_text = ctk.CTkTextbox(
+            self.window,
+            wrap="none",
+            font=ctk.CTkFont(family="Consolas", size=11)
+        )
+        report_text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        report_text.insert("end", self.text)
+        report_text.configure(state="disabled")
+
+        ctk.CTkButton(
+            self.window,
+            text="Close",
+            command=self.window.destroy
+        ).pack(side="right", padx=10, pady=(5, 10))
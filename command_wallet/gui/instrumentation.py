@@ -0,0 +1,193 @@
+"""
+Instrumentation module for CommandWallet.
+
+Opt-in measurement of the Tk event loop: every Python callback Tk invokes
+(event bindings, widget commands and ``after`` callbacks) is timed into a
+histogram per handler, a heartbeat measures how late the event loop runs
+scheduled work, and handlers slower than a threshold are logged.
+"""
+
+import json
+import time
+import tkinter
+from collections import deque
+from typing import Dict, Any, Callable, Deque, Optional, Tuple
+
+from ..core.histogram import HistogramRegistry
+
+
+# Handlers running longer than this are logged, in milliseconds
+DEFAULT_SLOW_HANDLER_MS = 50.0
+
+# Interval between two event-loop heartbeats, in milliseconds
+HEARTBEAT_INTERVAL_MS = 100
+
+# Number of slow handler calls kept for the debug panel
+SLOW_LOG_SIZE = 200
+
+# Histogram receiving the event-loop lag measured by the heartbeat
+LOOP_LAG_METRIC = "event_loop_lag"
+
+
+def unwrap_callback(func: Callable) -> Callable:
+    """
+    Get the function Tk really calls for a callback.
+
+    Args:
+        func: Callback registered with Tk.
+
+    Returns:
+        The scheduled function for ``after`` callbacks (which Misc.after
+        wraps in a local ``callit``), else the callback itself.
+    """
+    code = getattr(func, '__code__', None)
+    if code is not None and code.co_name == 'callit' and func.__closure__:
+        free = dict(zip(code.co_freevars, func.__closure__))
+        if 'func' in free:
+            return free['func'].cell_contents
+    return func
+
+
+def callback_name(func: Callable) -> str:
+    """
+    Get a readable name for an (unwrapped) Tk callback.
+
+    Lambdas are named after the place they are defined in.
+
+    Args:
+        func: Callback function.
+
+    Returns:
+        A name such as ``CommandWalletWindow._on_name_change``.
+    """
+    name = getattr(func, '__qualname__', None) or type(func).__name__
+    code = getattr(func, '__code__', None)
+    if code is not None and code.co_name == '<lambda>':
+        filename = code.co_filename.replace('\\', '/').rsplit('/', 1)[-1]
+        name = f"{name} ({filename}:{code.co_firstlineno})"
+    return name
+
+
+class TkInstrumentation:
+    """Event-handler timing and event-loop lag measurement for Tk."""
+
+    def __init__(self, slow_handler_ms: float = DEFAULT_SLOW_HANDLER_MS,
+                 registry: Optional[HistogramRegistry] = None):
+        """
+        Initialize the instrumentation (inactive until installed).
+
+        Args:
+            slow_handler_ms: Threshold above which handler calls are logged.
+            registry: Histogram registry to record into; a new one by default.
+        """
+        self.slow_handler = slow_handler_ms / 1000.0
+        self.registry = registry or HistogramRegistry()
+        self.slow_calls: Deque[Tuple[float, str, float]] = deque(maxlen=SLOW_LOG_SIZE)
+        self.root = None
+        self._original_call = None
+        self._heartbeat_after_id = None
+        self._heartbeat_due = 0.0
+        self._names: Dict[Any, str] = {}
+
+    def install(self) -> None:
+        """
+        Start timing Tk callbacks.
+
+        Must be called before the widgets are created: Tk keeps the
+        callback wrapper that was current when a handler was registered.
+        """
+        if self._original_call is not None:
+            return
+
+        original_call = tkinter.CallWrapper.__call__
+        instrumentation = self
+
+        def timed_call(wrapper, *args):
+            start = time.perf_counter()
+            try:
+                return original_call(wrapper, *args)
+            finally:
+                instrumentation._record(wrapper.func, time.perf_counter() - start)
+
+        self._original_call = original_call
+        tkinter.CallWrapper.__call__ = timed_call
+
+    def uninstall(self) -> None:
+        """Stop timing Tk callbacks and the heartbeat."""
+        if self._original_call is not None:
+            tkinter.CallWrapper.__call__ = self._original_call
+            self._original_call = None
+        if self._heartbeat_after_id is not None and self.root is not None:
+            try:
+                self.root.after_cancel(self._heartbeat_after_id)
+            except tkinter.TclError:
+                pass
+            self._heartbeat_after_id = None
+
+    def start_heartbeat(self, root) -> None:
+        """
+        Start measuring event-loop lag.
+
+        Args:
+            root: Application root window.
+        """
+        self.root = root
+        self._schedule_heartbeat()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of all measurements."""
+        return {
+            'slow_handler_ms': self.slow_handler * 1000.0,
+            'histograms': self.registry.to_dict(),
+            'slow_calls': [
+                {'time': timestamp, 'handler': name, 'duration': duration}
+                for timestamp, name, duration in self.slow_calls
+            ],
+        }
+
+    def dump(self, path: str) -> bool:
+        """
+        Write the measurements to a JSON file.
+
+        Args:
+            path: Output file path.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats(), f, indent=2)
+            return True
+        except Exception as e:
+            print(f"Error writing instrumentation stats: {e}")
+            return False
+
+    def _record(self, func: Callable, duration: float) -> None:
+        """Record one handler call."""
+        func = unwrap_callback(func)
+        if func == self._heartbeat:
+            return
+
+        # Callbacks are often new objects (bound methods, lambdas, after
+        # wrappers), so names are cached by their code object
+        key = getattr(func, '__code__', None) or type(func)
+        name = self._names.get(key)
+        if name is None:
+            name = self._names[key] = callback_name(func)
+
+        self.registry.observe(name, duration)
+        if duration >= self.slow_handler:
+            self.slow_calls.append((time.time(), name, duration))
+            print(f"Slow handler {name}: {duration * 1000.0:.1f} ms")
+
+    def _schedule_heartbeat(self) -> None:
+        """Schedule the next heartbeat and remember when it is due."""
+        self._heartbeat_due = time.perf_counter() + HEARTBEAT_INTERVAL_MS / 1000.0
+        self._heartbeat_after_id = self.root.after(HEARTBEAT_INTERVAL_MS, self._heartbeat)
+
+    def _heartbeat(self) -> None:
+        """Measure how late the event loop ran this callback."""
+        lag = max(time.perf_counter() - self._heartbeat_due, 0.0)
+        self.registry.observe(LOOP_LAG_METRIC, lag)
+        self._schedule_heartbeat()
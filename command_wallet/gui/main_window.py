@@ -6,23 +6,81 @@ editor, and output display functionality.
 """
 
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import platform
 import os
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional
 
 from ..core.data_manager import DataManager
 from ..core.command_executor import CommandExecutor
 from .config_dialog import ConfigDialog
 from .cron_dialog import CronExportDialog
+from .command_list import VirtualCommandList
+from .output_view import OutputView, DEFAULT_STALL_THRESHOLD
+from .run_tabs import RunTab, RunTabs
+from .instrumentation import TkInstrumentation
+from .debug_panel import DebugPanel, ReportWindow
+from ..core.output_spool import OutputSpool, read_line_times
+from ..core.scheduler import CronScheduler, DEFAULT_MAX_CONCURRENT
+from ..core.crontab import CrontabManager
+from ..core.runner_daemon import (
+    get_socket_path, INTERRUPT_POLICIES, DEFAULT_INTERRUPT_POLICY, FINAL_STATES
+)
+from ..core.runner_client import RunnerClient, RunnerError
+from ..core.admission import AdmissionController, RESOURCE_CLASSES, DEFAULT_RESOURCE_CLASS
+from ..core.file_watcher import FileWatcher
+from ..core.run_diff import RunDiff, compile_masks, VOLATILE_PATTERNS
+from ..core.log_archive import LogArchiver, read_log_tail, plain_log_path, touch_log, LOG_TAIL_LINES
+from ..core.metrics import Metrics, MetricsExporter
+from ..core.profiling import Profiler, summarize_profile
+
+
+# Maximum number of entries shown in the conda/docker combo dropdowns
+COMBO_RESULT_LIMIT = 50
+
+# Delay after the last keystroke before a combo is filtered, in milliseconds
+COMBO_FILTER_DELAY_MS = 150
+
+# Colors of the lines of a run diff, as ANSI codes (rendered by the output view)
+DIFF_LINE_COLORS = {'@': "\x1b[36m", '-': "\x1b[31m", '+': "\x1b[32m", ' ': ""}
+
+# Diff lines collected before they are written to the diff tab
+DIFF_BATCH_LINES = 500
+
+# Recent output of a daemon job kept in its tab for searching, in bytes
+# (the daemon writes the full output to the job's log file)
+DAEMON_TAB_SPOOL_BYTES = 64 * 1024 * 1024
 
 
 class CommandWalletWindow:
     """Main application window for CommandWallet."""
     
-    def __init__(self):
-        """Initialize the main window."""
+    def __init__(self, instrumentation: Optional[TkInstrumentation] = None,
+                 profiler: Optional[Profiler] = None,
+                 data_manager: Optional[DataManager] = None,
+                 command_executor: Optional[CommandExecutor] = None):
+        """
+        Initialize the main window.
+        
+        Args:
+            instrumentation: Optional installed event-loop instrumentation;
+                enables the Debug menu.
+            profiler: Optional profiler; enables the profiling entries of
+                the Debug menu.
+            data_manager: Data manager to use; a new one by default (the
+                GUI benchmarks pass one with a synthetic wallet).
+            command_executor: Command executor to use; a new one by default.
+        """
+        self.instrumentation = instrumentation
+        self.profiler = profiler
+        # Whether the next run started is profiled
+        self._profile_next_run = False
+        # Label of the CPU profile started from the Debug menu ('interval' or
+        # 'run'), or None; a session profile (main.py --profile) is not ours
+        self._menu_profile: Optional[str] = None
+        
         # Set appearance mode and color theme
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
@@ -32,9 +90,13 @@ class CommandWalletWindow:
         self._set_window_icon()
         self._maximize_window()
         
+        if self.instrumentation is not None:
+            self.instrumentation.start_heartbeat(self.root)
+        
         # Initialize core components
-        self.data_manager = DataManager()
-        self.command_executor = CommandExecutor(self._update_output)
+        self.data_manager = data_manager or DataManager()
+        self.command_executor = command_executor or CommandExecutor()
+        self.scheduler = CronScheduler(self._on_schedule_fired)
         
         # Data storage
         self.commands = {}
@@ -42,13 +104,31 @@ class CommandWalletWindow:
         self.config = {}
         
         # GUI components
-        self.command_buttons = []
-        self.output_text = None
+        self.command_list = None
+        self.sort_mode = None
+        self.run_tabs = None
+        self.status_label = None
         self.run_button = None
         
+        # Watch mode: file watcher and latest run tab of each watched command
+        self.watchers: Dict[str, FileWatcher] = {}
+        self.watch_tabs: Dict[str, Any] = {}
+        
         # Load data and create GUI
         self._load_data()
+        self.scheduler.max_concurrent = self.config.get('max_scheduled_jobs', DEFAULT_MAX_CONCURRENT)
+        self.command_executor.admission = AdmissionController.from_config(self.config)
+        self.runner_client = self._connect_runner_daemon()
+        # Compress finished run logs and apply retention in the background
+        self.log_archiver = LogArchiver(self.data_manager.runs_dir, self.config)
+        self.log_archiver.start()
+        self.metrics_exporter = self._start_metrics()
         self._create_widgets()
+        self._attach_daemon_jobs()
+        
+        # Run scheduled commands while the window is open
+        self.scheduler.set_commands(self.commands)
+        self.scheduler.start()
         
         # Load first command if any
         if self.commands:
@@ -62,6 +142,62 @@ class CommandWalletWindow:
         """Run the main application loop."""
         self.root.mainloop()
     
+    def _connect_runner_daemon(self) -> Optional[RunnerClient]:
+        """
+        Connect to the runner daemon, starting it if needed.
+        
+        Returns:
+            The client, or None if runs should stay in this process (the
+            daemon is disabled in the configuration or cannot be started).
+        """
+        if not self.config.get('use_runner_daemon'):
+            return None
+        client = RunnerClient(get_socket_path(self.data_manager.config_dir))
+        if not client.spawn_daemon():
+            print("Error starting runner daemon, running commands in the GUI process")
+            return None
+        return client
+    
+    def _start_metrics(self) -> Optional[MetricsExporter]:
+        """
+        Start exporting metrics, if they are enabled in the configuration.
+        
+        Returns:
+            The running exporter, or None if metrics are disabled.
+        """
+        if not self.config.get('metrics_enabled'):
+            return None
+        metrics = Metrics('gui')
+        metrics.watch_admission(self.command_executor.admission)
+        metrics.add_gauge('scheduled_runs_active', "Scheduled runs currently executing.",
+                          self.scheduler.active_count)
+        if self.instrumentation is not None:
+            metrics.add_histograms('ui_latency_seconds', "Duration of Tk event handlers and event-loop lag.",
+                                   self.instrumentation.registry, 'handler')
+        self.command_executor.metrics = metrics
+        self.data_manager.metrics = metrics
+        exporter = MetricsExporter.from_config(
+            metrics, self.config, os.path.join(self.data_manager.config_dir, "metrics")
+        )
+        exporter.start()
+        return exporter
+    
+    def _attach_daemon_jobs(self) -> None:
+        """Open tabs for daemon jobs still running from a previous session."""
+        if self.runner_client is None:
+            return
+        try:
+            jobs = self.runner_client.list_jobs()
+        except RunnerError as e:
+            print(f"Error listing runner daemon jobs: {e}")
+            return
+        for job in jobs:
+            if job['state'] not in FINAL_STATES:
+                on_finished = None
+                if job.get('log_path'):
+                    on_finished = lambda path=job['log_path']: self.log_archiver.submit(path)
+                self._open_daemon_tab(job['job_id'], job['name'], job['command'], on_finished)
+    
     def _maximize_window(self) -> None:
         """Maximize the window cross-platform."""
         system = platform.system()
@@ -119,6 +255,9 @@ class CommandWalletWindow:
     def _load_data(self) -> None:
         """Load commands and configuration from storage."""
         self.commands = self.data_manager.load_commands()
+        # Runs recorded by the runner daemon or the command line meanwhile
+        if self.data_manager.merge_pending_runs(self.commands):
+            self.data_manager.save_commands(self.commands)
         self.config = self.data_manager.load_config()
     
     def _create_widgets(self) -> None:
@@ -142,7 +281,7 @@ class CommandWalletWindow:
         left_frame = ctk.CTkFrame(parent)
         left_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 10), pady=10)
         left_frame.grid_columnconfigure(0, weight=1)
-        left_frame.grid_rowconfigure(2, weight=1)
+        left_frame.grid_rowconfigure(3, weight=1)
         
         # Commands list label
         ctk.CTkLabel(
@@ -151,11 +290,20 @@ class CommandWalletWindow:
             font=ctk.CTkFont(size=16, weight="bold")
         ).grid(row=0, column=0, pady=(10, 5), padx=10)
         
+        # Search box
+        self.search_entry = ctk.CTkEntry(
+            left_frame, 
+            placeholder_text="Search commands..."
+        )
+        self.search_entry.grid(row=1, column=0, pady=(0, 10), padx=10, sticky="ew")
+        self.search_entry.bind('<KeyRelease>', self._on_search_change)
+        
         # Sorting buttons frame
         sort_frame = ctk.CTkFrame(left_frame)
-        sort_frame.grid(row=1, column=0, pady=(0, 10), padx=10, sticky="ew")
+        sort_frame.grid(row=2, column=0, pady=(0, 10), padx=10, sticky="ew")
         sort_frame.grid_columnconfigure(0, weight=1)
         sort_frame.grid_columnconfigure(1, weight=1)
+        sort_frame.grid_columnconfigure(2, weight=1)
         
         ctk.CTkButton(
             sort_frame, 
@@ -167,16 +315,26 @@ class CommandWalletWindow:
             sort_frame, 
             text="Sort by Date", 
             command=self._sort_by_date
-        ).grid(row=0, column=1, padx=(5, 10), pady=10, sticky="ew")
+        ).grid(row=0, column=1, padx=(5, 5), pady=10, sticky="ew")
         
-        # Commands list frame
-        self.commands_frame = ctk.CTkScrollableFrame(left_frame, label_text="Commands List")
-        self.commands_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
-        self.commands_frame.grid_columnconfigure(0, weight=1)
+        ctk.CTkButton(
+            sort_frame, 
+            text="Frecency", 
+            command=self._sort_by_frecency
+        ).grid(row=0, column=2, padx=(5, 10), pady=10, sticky="ew")
+        
+        # Commands list (virtualized, rows are recycled while scrolling)
+        self.command_list = VirtualCommandList(
+            left_frame,
+            on_select=self.load_command,
+            get_label=lambda cid: self.commands[cid]['name'],
+            get_tooltip=self._get_tooltip_text
+        )
+        self.command_list.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
         
         # Add/Delete buttons frame
         buttons_frame = ctk.CTkFrame(left_frame)
-        buttons_frame.grid(row=3, column=0, pady=(0, 10), padx=10, sticky="ew")
+        buttons_frame.grid(row=4, column=0, pady=(0, 10), padx=10, sticky="ew")
         buttons_frame.grid_columnconfigure(0, weight=1)
         buttons_frame.grid_columnconfigure(1, weight=1)
         
@@ -268,7 +426,7 @@ class CommandWalletWindow:
         
         self.conda_combo = ctk.CTkComboBox(
             conda_frame, 
-            values=self.command_executor.get_conda_environments(), 
+            values=self.command_executor.search_conda_environments('', COMBO_RESULT_LIMIT), 
             state="disabled"
         )
         self.conda_combo.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
@@ -291,7 +449,7 @@ class CommandWalletWindow:
         
         self.docker_combo = ctk.CTkComboBox(
             docker_frame, 
-            values=self.command_executor.get_docker_images(), 
+            values=self.command_executor.search_docker_images('', COMBO_RESULT_LIMIT), 
             state="disabled"
         )
         self.docker_combo.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
@@ -308,6 +466,69 @@ class CommandWalletWindow:
         self.volume_mounts_entry.grid(row=3, column=1, sticky="ew", padx=(0, 10), pady=(5, 10))
         self.volume_mounts_entry.bind('<KeyRelease>', self._on_volume_mounts_change)
         self.volume_mounts_entry.bind('<FocusOut>', self._on_volume_mounts_change)
+        
+        # Run options
+        ctk.CTkLabel(
+            options_frame, 
+            text="Run Options:", 
+            font=ctk.CTkFont(size=12)
+        ).grid(row=4, column=0, sticky="w", pady=(0, 10), padx=(10, 10))
+        
+        run_options_frame = ctk.CTkFrame(options_frame, fg_color="transparent")
+        run_options_frame.grid(row=4, column=1, sticky="w", padx=(0, 10), pady=(0, 10))
+        
+        ctk.CTkLabel(run_options_frame, text="If interrupted:").grid(row=0, column=0, sticky="w", padx=(0, 5))
+        self.on_interrupt_menu = ctk.CTkOptionMenu(
+            run_options_frame,
+            values=list(INTERRUPT_POLICIES),
+            width=110,
+            command=self._on_run_option_change
+        )
+        self.on_interrupt_menu.set(DEFAULT_INTERRUPT_POLICY)
+        self.on_interrupt_menu.grid(row=0, column=1, sticky="w", padx=(0, 15))
+        
+        ctk.CTkLabel(run_options_frame, text="Resources:").grid(row=0, column=2, sticky="w", padx=(0, 5))
+        self.resource_class_menu = ctk.CTkOptionMenu(
+            run_options_frame,
+            values=list(RESOURCE_CLASSES),
+            width=110,
+            command=self._on_run_option_change
+        )
+        self.resource_class_menu.set(DEFAULT_RESOURCE_CLASS)
+        self.resource_class_menu.grid(row=0, column=3, sticky="w", padx=(0, 15))
+        
+        ctk.CTkLabel(run_options_frame, text="Timeout (s):").grid(row=0, column=4, sticky="w", padx=(0, 5))
+        self.timeout_entry = ctk.CTkEntry(run_options_frame, width=80, placeholder_text="none")
+        self.timeout_entry.grid(row=0, column=5, sticky="w")
+        self.timeout_entry.bind('<KeyRelease>', self._on_run_option_change)
+        self.timeout_entry.bind('<FocusOut>', self._on_run_option_change)
+        
+        # Watch mode
+        ctk.CTkLabel(
+            options_frame, 
+            text="Watch:", 
+            font=ctk.CTkFont(size=12)
+        ).grid(row=5, column=0, sticky="w", pady=(0, 10), padx=(10, 10))
+        
+        watch_frame = ctk.CTkFrame(options_frame, fg_color="transparent")
+        watch_frame.grid(row=5, column=1, sticky="ew", padx=(0, 10), pady=(0, 10))
+        watch_frame.grid_columnconfigure(0, weight=1)
+        
+        self.watch_globs_entry = ctk.CTkEntry(
+            watch_frame,
+            placeholder_text="Extra glob patterns to watch, e.g. src/*.py tests/*.py"
+        )
+        self.watch_globs_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.watch_globs_entry.bind('<KeyRelease>', self._on_run_option_change)
+        self.watch_globs_entry.bind('<FocusOut>', self._on_run_option_change)
+        
+        self.watch_var = ctk.BooleanVar()
+        ctk.CTkSwitch(
+            watch_frame,
+            text="Rerun on changes",
+            variable=self.watch_var,
+            command=self._toggle_watch
+        ).grid(row=0, column=1, sticky="e")
     
     def _create_action_buttons(self, parent) -> None:
         """Create the action buttons section."""
@@ -321,17 +542,65 @@ class CommandWalletWindow:
         )
         self.run_button.pack(side="left", padx=(10, 5), pady=10)
         
+        ctk.CTkButton(
+            buttons_frame, 
+            text="Compare Runs", 
+            command=self._compare_runs
+        ).pack(side="left", padx=(5, 5), pady=10)
+        
+        ctk.CTkButton(
+            buttons_frame, 
+            text="Open Log", 
+            command=self._open_run_log
+        ).pack(side="left", padx=(5, 5), pady=10)
+        
         ctk.CTkButton(
             buttons_frame, 
             text="Export Cron", 
             command=self._show_cron_dialog
         ).pack(side="left", padx=(5, 5), pady=10)
         
+        ctk.CTkButton(
+            buttons_frame, 
+            text="Install Crontab", 
+            command=self._install_crontab
+        ).pack(side="left", padx=(5, 5), pady=10)
+        
         ctk.CTkButton(
             buttons_frame, 
             text="Config", 
             command=self._show_config_dialog
         ).pack(side="left", padx=(5, 10), pady=10)
+        
+        if self.instrumentation is not None or self.profiler is not None:
+            self._create_debug_menu(buttons_frame)
+    
+    def _create_debug_menu(self, parent) -> None:
+        """Create the Debug button and its menu (only when instrumented or profiling)."""
+        import tkinter as tk
+        
+        self.debug_menu = tk.Menu(self.root, tearoff=0)
+        if self.instrumentation is not None:
+            self.debug_menu.add_command(label="Event Loop Stats...", command=self._show_debug_panel)
+        if self.profiler is not None:
+            if self.instrumentation is not None:
+                self.debug_menu.add_separator()
+            self.debug_menu.add_command(label="Start Profiling", command=self._toggle_profiling)
+            self._profiling_menu_index = self.debug_menu.index("end")
+            self.debug_menu.add_command(label="Profile List Refresh", command=self._profile_list_refresh)
+            self.debug_menu.add_command(label="Profile Sorting", command=self._profile_sorting)
+            self.debug_menu.add_command(label="Profile Next Run", command=self._arm_run_profile)
+            self.debug_menu.add_separator()
+            self.debug_menu.add_command(label="Start Memory Tracing", command=self._toggle_memory_trace)
+            self._memory_menu_index = self.debug_menu.index("end")
+            self.debug_menu.add_command(label="Top Allocations...", command=self._show_memory_report)
+        
+        debug_button = ctk.CTkButton(parent, text="Debug", width=80)
+        debug_button.configure(command=lambda: self.debug_menu.post(
+            debug_button.winfo_rootx(),
+            debug_button.winfo_rooty() + debug_button.winfo_height()
+        ))
+        debug_button.pack(side="left", padx=(0, 10), pady=10)
     
     def _create_output_area(self, parent) -> None:
         """Create the output display area."""
@@ -347,71 +616,81 @@ class CommandWalletWindow:
             font=ctk.CTkFont(size=14, weight="bold")
         ).grid(row=0, column=0, sticky="w", pady=(10, 5), padx=10)
         
-        # Output text area
-        self.output_text = ctk.CTkTextbox(
+        # Status messages (kept out of the output so it mirrors the spool)
+        self.status_label = ctk.CTkLabel(
             output_frame, 
-            wrap="word", 
-            state="disabled",
-            font=ctk.CTkFont(family="Consolas", size=11)
+            text="", 
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
         )
-        self.output_text.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        self.status_label.grid(row=0, column=0, sticky="e", pady=(10, 5), padx=10)
         
-        # Add context menu
+        # Context menu shared by the output of all runs
         self._create_output_context_menu()
+        
+        # One output tab per run
+        self.run_tabs = RunTabs(
+            output_frame,
+            self.root,
+            self._bind_output_view,
+            self.config.get('stall_threshold_seconds') or DEFAULT_STALL_THRESHOLD
+        )
+        self.run_tabs.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
     
     def _bind_conda_events(self) -> None:
         """Bind events for conda combo box."""
-        conda_envs = self.command_executor.get_conda_environments()
-        
-        def filter_conda_environments(event):
-            current_text = event.widget.get()
-            typed_text = current_text.lower()
-            
-            if not typed_text:
-                self.conda_combo.configure(values=conda_envs)
-                return
-            
-            if current_text in conda_envs:
-                return
-            
-            filtered = [env for env in conda_envs if typed_text in env.lower()]
-            self.conda_combo.configure(values=filtered if filtered else conda_envs)
-        
-        def on_conda_click(event):
-            if self.conda_combo.cget('state') == 'normal':
-                self.conda_combo.configure(values=conda_envs)
-        
-        self.conda_combo.bind('<KeyRelease>', filter_conda_environments)
-        self.conda_combo.bind('<Button-1>', on_conda_click)
+        self._bind_filtered_combo(
+            self.conda_combo,
+            self.command_executor.search_conda_environments,
+            self.command_executor.has_conda_environment
+        )
         self.conda_combo.bind('<<ComboboxSelected>>', self._on_conda_selected)
         self.conda_combo.bind('<FocusOut>', self._on_conda_change)
     
     def _bind_docker_events(self) -> None:
         """Bind events for docker combo box."""
-        docker_images = self.command_executor.get_docker_images()
-        
-        def filter_docker_images(event):
-            current_text = event.widget.get()
-            typed_text = current_text.lower()
-            
-            if not typed_text:
-                self.docker_combo.configure(values=docker_images)
-                return
+        self._bind_filtered_combo(
+            self.docker_combo,
+            self.command_executor.search_docker_images,
+            self.command_executor.has_docker_image
+        )
+        self.docker_combo.bind('<<ComboboxSelected>>', self._on_docker_selected)
+        self.docker_combo.bind('<FocusOut>', self._on_docker_change)
+    
+    def _bind_filtered_combo(self, combo, search: Callable[[str, int], List[str]],
+                             contains: Callable[[str], bool]) -> None:
+        """
+        Bind debounced, capped filtering to a searchable combo box.
+        
+        Args:
+            combo: The combo box to filter.
+            search: Catalog search function returning ranked matches.
+            contains: Function telling whether a value is an exact entry.
+        """
+        pending = {'after_id': None}
+        
+        def apply_filter():
+            pending['after_id'] = None
+            current_text = combo.get()
             
-            if current_text in docker_images:
+            if current_text and contains(current_text):
                 return
             
-            filtered = [img for img in docker_images if typed_text in img.lower()]
-            self.docker_combo.configure(values=filtered if filtered else docker_images)
+            filtered = search(current_text, COMBO_RESULT_LIMIT)
+            combo.configure(values=filtered if filtered else search('', COMBO_RESULT_LIMIT))
         
-        def on_docker_click(event):
-            if self.docker_combo.cget('state') == 'normal':
-                self.docker_combo.configure(values=docker_images)
+        def filter_values(event):
+            # Debounce: only filter once typing pauses
+            if pending['after_id'] is not None:
+                self.root.after_cancel(pending['after_id'])
+            pending['after_id'] = self.root.after(COMBO_FILTER_DELAY_MS, apply_filter)
         
-        self.docker_combo.bind('<KeyRelease>', filter_docker_images)
-        self.docker_combo.bind('<Button-1>', on_docker_click)
-        self.docker_combo.bind('<<ComboboxSelected>>', self._on_docker_selected)
-        self.docker_combo.bind('<FocusOut>', self._on_docker_change)
+        def on_click(event):
+            if combo.cget('state') == 'normal':
+                combo.configure(values=search('', COMBO_RESULT_LIMIT))
+        
+        combo.bind('<KeyRelease>', filter_values)
+        combo.bind('<Button-1>', on_click)
     
     def _create_output_context_menu(self) -> None:
         """Create right-click context menu for output text area."""
@@ -421,15 +700,25 @@ class CommandWalletWindow:
         self.output_menu = tk.Menu(self.root, tearoff=0)
         self.output_menu.add_command(label="Copy All", command=self._copy_all_output)
         self.output_menu.add_command(label="Copy Selection", command=self._copy_selected_output)
+        self.output_menu.add_command(label="Find...", command=self._focus_output_search)
         self.output_menu.add_separator()
         self.output_menu.add_command(label="Clear Output", command=self._clear_output)
-        
+    
+    def _bind_output_view(self, view: OutputView) -> None:
+        """Bind the context menu and shortcuts to the output of a run tab."""
         # Bind right-click to show menu
-        self.output_text.bind("<Button-3>", self._show_output_context_menu)
+        view.text.bind("<Button-3>", self._show_output_context_menu)
         
         # Bind keyboard shortcuts
-        self.output_text.bind("<Control-c>", lambda e: self._copy_selected_output())
-        self.output_text.bind("<Control-a>", lambda e: self._select_all_output())
+        view.text.bind("<Control-c>", lambda e: self._copy_selected_output())
+        view.text.bind("<Control-a>", lambda e: self._select_all_output())
+        view.text.bind("<Control-f>", lambda e: self._focus_output_search())
+    
+    @property
+    def output_text(self):
+        """Text widget of the selected run tab, or None."""
+        view = self.run_tabs.current_view() if self.run_tabs else None
+        return view.text if view is not None else None
     
     # Event handlers and utility methods continue in the next part...
     
@@ -492,47 +781,40 @@ class CommandWalletWindow:
         except Exception as e:
             print(f"Error selecting all output: {e}")
     
+    def _focus_output_search(self) -> None:
+        """Move keyboard focus to the output search box."""
+        view = self.run_tabs.current_view()
+        if view is not None:
+            view.search_entry.focus()
+    
     def _clear_output(self) -> None:
         """Clear all output text."""
         try:
-            self.output_text.configure(state="normal")
-            self.output_text.delete("1.0", "end")
-            self.output_text.configure(state="disabled")
+            view = self.run_tabs.current_view()
+            if view is not None:
+                view.clear()
         except Exception as e:
             print(f"Error clearing output: {e}")
     
     def _show_status_message(self, message: str) -> None:
-        """Show a brief status message in the output area."""
+        """Show a brief status message next to the output title."""
         try:
-            self.output_text.configure(state="normal")
-            
-            current_text = self.output_text.get("1.0", "end-1c")
-            if current_text and not current_text.endswith('\n'):
-                self.output_text.insert("end", "\n")
-            
             timestamp = datetime.now().strftime("%H:%M:%S")
-            status_line = f"[{timestamp}] {message}\n"
-            self.output_text.insert("end", status_line)
-            self.output_text.see("end")
+            self.status_label.configure(text=f"[{timestamp}] {message}")
             
-            self.output_text.configure(state="disabled")
+            if hasattr(self, '_status_after_id'):
+                self.root.after_cancel(self._status_after_id)
+            self._status_after_id = self.root.after(
+                3000, lambda: self.status_label.configure(text="")
+            )
         except Exception as e:
             print(f"Error showing status message: {e}")
     
-    def _update_output(self, text: str) -> None:
-        """Update output text widget (callback for command executor)."""
-        def update():
-            self.output_text.configure(state="normal")
-            self.output_text.insert("end", text)
-            self.output_text.see("end")
-            self.output_text.configure(state="disabled")
-        
-        self.root.after(0, update)
-    
     def _add_command(self) -> None:
         """Add a new command."""
         command_id = self.data_manager.create_new_command(self.commands)
         self._update_commands_list()
+        self.command_list.scroll_to(command_id)
         self.load_command(command_id)
         self.data_manager.save_commands(self.commands)
     
@@ -540,82 +822,72 @@ class CommandWalletWindow:
         """Delete selected command."""
         if self.current_command_id and self.current_command_id in self.commands:
             if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this command?"):
-                del self.commands[self.current_command_id]
+                self.scheduler.remove_command(self.current_command_id)
+                self._stop_watch(self.current_command_id)
+                self.data_manager.delete_command(self.commands, self.current_command_id)
                 self._update_commands_list()
                 self._clear_form()
                 self.data_manager.save_commands(self.commands)
     
     def _update_commands_list(self, sort_by: Optional[str] = None) -> None:
-        """Update the commands list in the scrollable frame."""
-        # Clear existing buttons
-        for button in self.command_buttons:
-            button.destroy()
-        self.command_buttons.clear()
+        """Update the commands list with the current (or a new) sort order."""
+        if sort_by is not None:
+            self.sort_mode = sort_by
+        
+        # An active search shows ranked matches instead of the sorted list
+        query = self.search_entry.get().strip()
+        if query:
+            self.command_list.set_items(self.data_manager.search_commands(query))
+            return
         
         # Sort commands
-        if sort_by == 'name':
-            sorted_commands = sorted(self.commands.items(), key=lambda item: item[1]['name'].lower())
-        elif sort_by == 'date':
-            def get_sort_key(item):
-                last_exec = item[1].get('last_execution')
+        if self.sort_mode == 'name':
+            sorted_ids = sorted(self.commands, key=lambda cid: self.commands[cid]['name'].lower())
+        elif self.sort_mode == 'date':
+            def get_sort_key(command_id):
+                last_exec = self.commands[command_id].get('last_execution')
                 return last_exec or '1970-01-01 00:00:00'
             
-            sorted_commands = sorted(self.commands.items(), key=get_sort_key, reverse=True)
+            sorted_ids = sorted(self.commands, key=get_sort_key, reverse=True)
+        elif self.sort_mode == 'frecency':
+            # Maintained incrementally by the data manager, no sort needed
+            sorted_ids = self.data_manager.get_commands_by_frecency()
         else:
-            sorted_commands = self.commands.items()
-        
-        # Create command buttons
-        for i, (command_id, command_data) in enumerate(sorted_commands):
-            button = ctk.CTkButton(
-                self.commands_frame,
-                text=command_data['name'],
-                command=lambda cid=command_id: self.load_command(cid),
-                anchor="w"
-            )
-            button.grid(row=i, column=0, sticky="ew", padx=5, pady=2)
-            self.command_buttons.append(button)
-            
-            # Add tooltip
-            self._create_tooltip(button, command_data)
-    
-    def _create_tooltip(self, widget, command_data: Dict[str, Any]) -> None:
-        """Create tooltip for command button showing last execution date."""
-        def on_enter(event):
-            last_exec = command_data.get('last_execution')
-            if last_exec:
-                try:
-                    dt = datetime.strptime(last_exec, "%Y-%m-%d %H:%M:%S")
-                    formatted_date = dt.strftime("%d/%m/%Y %H:%M:%S")
-                    tooltip_text = f"Last executed: {formatted_date}"
-                except:
-                    tooltip_text = f"Last executed: {last_exec}"
-            else:
-                tooltip_text = "Never executed"
-            
-            # Create tooltip window
-            self.tooltip = ctk.CTkToplevel(widget)
-            self.tooltip.wm_overrideredirect(True)
-            self.tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
-            
-            label = ctk.CTkLabel(self.tooltip, text=tooltip_text, font=ctk.CTkFont(size=10))
-            label.pack()
-        
-        def on_leave(event):
-            if hasattr(self, 'tooltip'):
-                self.tooltip.destroy()
-                delattr(self, 'tooltip')
+            sorted_ids = list(self.commands)
         
-        widget.bind("<Enter>", on_enter)
-        widget.bind("<Leave>", on_leave)
+        self.command_list.set_items(sorted_ids)
+    
+    def _on_search_change(self, event) -> None:
+        """Handle search text change."""
+        self._update_commands_list()
+    
+    def _get_tooltip_text(self, command_id: str) -> str:
+        """Get tooltip text for a command button showing last execution date."""
+        last_exec = self.commands.get(command_id, {}).get('last_execution')
+        if last_exec:
+            try:
+                dt = datetime.strptime(last_exec, "%Y-%m-%d %H:%M:%S")
+                formatted_date = dt.strftime("%d/%m/%Y %H:%M:%S")
+                return f"Last executed: {formatted_date}"
+            except:
+                return f"Last executed: {last_exec}"
+        return "Never executed"
     
     def _sort_by_name(self) -> None:
         """Sort commands by name."""
+        self.search_entry.delete(0, "end")
         self._update_commands_list(sort_by='name')
     
     def _sort_by_date(self) -> None:
         """Sort commands by last execution date."""
+        self.search_entry.delete(0, "end")
         self._update_commands_list(sort_by='date')
     
+    def _sort_by_frecency(self) -> None:
+        """Sort commands by frecency (how often and how recently they ran)."""
+        self.search_entry.delete(0, "end")
+        self._update_commands_list(sort_by='frecency')
+    
     def load_command(self, command_id: str) -> None:
         """Load command data into the form."""
         if command_id in self.commands:
@@ -655,6 +927,16 @@ class CommandWalletWindow:
                 self.docker_combo.set('')
                 self.volume_mounts_entry.configure(state="disabled")
                 self.volume_mounts_entry.delete(0, "end")
+            
+            # Load run options
+            self.on_interrupt_menu.set(command_data.get('on_interrupt') or DEFAULT_INTERRUPT_POLICY)
+            self.resource_class_menu.set(command_data.get('resource_class') or DEFAULT_RESOURCE_CLASS)
+            self.timeout_entry.delete(0, "end")
+            if command_data.get('timeout'):
+                self.timeout_entry.insert(0, f"{command_data['timeout']:g}")
+            self.watch_globs_entry.delete(0, "end")
+            self.watch_globs_entry.insert(0, command_data.get('watch_globs', ''))
+            self.watch_var.set(command_id in self.watchers)
     
     def _clear_form(self) -> None:
         """Clear the form."""
@@ -667,24 +949,38 @@ class CommandWalletWindow:
         self.docker_combo.configure(state="disabled")
         self.volume_mounts_entry.configure(state="disabled")
         self.volume_mounts_entry.delete(0, "end")
-        self.output_text.configure(state="normal")
-        self.output_text.delete("1.0", "end")
-        self.output_text.configure(state="disabled")
+        self.on_interrupt_menu.set(DEFAULT_INTERRUPT_POLICY)
+        self.resource_class_menu.set(DEFAULT_RESOURCE_CLASS)
+        self.timeout_entry.delete(0, "end")
+        self.watch_globs_entry.delete(0, "end")
+        self.watch_var.set(False)
     
     def _save_command_data(self) -> None:
         """Save current command data."""
         if self.current_command_id:
-            self.commands[self.current_command_id].update({
+            self.data_manager.update_command(self.commands, self.current_command_id, {
                 'name': self.name_entry.get(),
                 'command': self.command_entry.get(),
                 'use_conda': self.conda_var.get(),
                 'conda_env': self.conda_combo.get(),
                 'use_docker': self.docker_var.get(),
                 'docker_image': self.docker_combo.get(),
-                'volume_mounts': self.volume_mounts_entry.get()
+                'volume_mounts': self.volume_mounts_entry.get(),
+                'on_interrupt': self.on_interrupt_menu.get(),
+                'resource_class': self.resource_class_menu.get(),
+                'timeout': self._get_timeout(),
+                'watch_globs': self.watch_globs_entry.get()
             })
             self.data_manager.save_commands(self.commands)
     
+    def _get_timeout(self) -> Optional[float]:
+        """Get the timeout from the form; None if empty or invalid."""
+        try:
+            timeout = float(self.timeout_entry.get().strip())
+        except ValueError:
+            return None
+        return timeout if timeout > 0 else None
+    
     def _run_command(self) -> None:
         """Run the selected command."""
         if not self.current_command_id:
@@ -694,36 +990,334 @@ class CommandWalletWindow:
         # Save current data
         self._save_command_data()
         
-        command_data = self.commands[self.current_command_id]
-        command = command_data['command'].strip()
-        
-        if not command:
+        if not self.commands[self.current_command_id]['command'].strip():
             messagebox.showwarning("Empty Command", "Please enter a command to run.")
             return
         
+        self._start_run(self.current_command_id)
+    
+    def _start_run(self, command_id: str, scheduled: bool = False,
+                   on_finished: Optional[Callable[[], None]] = None,
+                   trigger: Optional[str] = None) -> RunTab:
+        """
+        Start a run of a command in a new output tab.
+        
+        Args:
+            command_id: ID of the command to run.
+            scheduled: Whether the run was started by the scheduler.
+            on_finished: Optional function called (from the executor thread)
+                when the run ends.
+            trigger: Optional description of what started the run, added
+                to the output header.
+            
+        Returns:
+            The run's tab.
+        """
+        command_data = self.commands[command_id]
+        
         # Save execution timestamp
-        self.data_manager.update_command_execution_time(self.commands, self.current_command_id)
+        self.data_manager.update_command_execution_time(self.commands, command_id)
         self.data_manager.save_commands(self.commands)
+        if self.sort_mode == 'frecency':
+            self._update_commands_list()
         
         # Prepare and display starting message
         execution_time = datetime.now()
         timestamp_str = execution_time.strftime("%d/%m/%Y-%H:%M:%S")
-        final_command = self.command_executor._prepare_command(command_data, self.config)
+        handle = self.command_executor.create_run_handle(command_data)
+        final_command = self.command_executor._prepare_command(
+            command_data, self.config, handle.container_name
+        )
+        
+        kind = "scheduled command" if scheduled else "command"
+        header = f"Started {kind} '{final_command}' at {timestamp_str}\n"
+        if trigger:
+            header += f"{trigger}\n"
+        header += "\n"
+        log_path = self.data_manager.create_run_log_path(command_id)
+        
+        # Profile this run's work in the Tk thread if requested from the Debug menu
+        profile_run = self._profile_next_run and self.profiler.start_profile('run')
+        self._profile_next_run = False
+        if profile_run:
+            self._menu_profile = 'run'
+        
+        # A watched command must not rerun because of its own writes
+        watcher = self.watchers.get(command_id)
+        if watcher is not None:
+            watcher.pause()
+        
+        def finished():
+            self.log_archiver.submit(log_path)
+            if watcher is not None:
+                watcher.resume()
+            if profile_run:
+                self.root.after(0, lambda: self._finish_profile('run'))
+            if on_finished:
+                on_finished()
+        
+        # Hand the run to the runner daemon, so it outlives the window
+        if self.runner_client is not None:
+            try:
+                job_id = self.runner_client.submit(
+                    final_command, command_data.get('name', ''), command_id, log_path, header,
+                    command_data.get('on_interrupt'), command_data.get('resource_class'),
+                    command_data.get('timeout'), handle.container_name
+                )
+            except RunnerError as e:
+                print(f"Error submitting to runner daemon, running in the GUI process: {e}")
+            else:
+                return self._open_daemon_tab(job_id, command_data.get('name', ''), final_command, finished)
+        
+        # Spool the run's output to disk so it can be searched
+        spool = OutputSpool(log_path)
+        spool.append(header)
+        
+        # Open a tab for the run and add starting message
+        tab = self.run_tabs.add_run(command_data.get('name', ''), final_command, spool)
+        tab.buffer.write(header)
+        tab.flush()
+        
+        # Execute command asynchronously; the tab's buffer collects the output
+        def on_completion(exit_code):
+            finished()
+            self.root.after(0, lambda: self.run_tabs.finish_run(tab, exit_code))
+        
+        tab.on_stop = handle.cancel
+        self.command_executor.execute_command_async(
+            command_data, self.config, on_completion, spool, tab.buffer.write, handle
+        )
+        return tab
+    
+    def _open_daemon_tab(self, job_id: str, command_name: str, final_command: str,
+                         on_finished: Optional[Callable[[], None]] = None) -> RunTab:
+        """
+        Open a tab streaming the output of a runner daemon job.
+        
+        The daemon writes the run's log file; the tab mirrors the streamed
+        output into an in-memory spool for searching, which keeps only the
+        most recent output of long runs.
+        
+        Args:
+            job_id: ID of the daemon job.
+            command_name: Name of the command, for the tab title.
+            final_command: Command line being run.
+            on_finished: Optional function called (from the streaming
+                thread) when the job ends.
+            
+        Returns:
+            The job's tab.
+        """
+        spool = OutputSpool(max_bytes=DAEMON_TAB_SPOOL_BYTES)
+        tab = self.run_tabs.add_run(command_name, final_command, spool)
+        
+        def on_output(text, partial=''):
+            spool.append(text)
+            tab.buffer.write(text, partial)
+        
+        def on_completion(exit_code):
+            if on_finished:
+                on_finished()
+            self.root.after(0, lambda: self.run_tabs.finish_run(tab, exit_code))
+        
+        def on_stop():
+            try:
+                self.runner_client.cancel(job_id)
+            except RunnerError as e:
+                print(f"Error cancelling job {job_id}: {e}")
+        
+        tab.on_stop = on_stop
+        self.runner_client.attach_async(job_id, on_output, on_completion)
+        return tab
+    
+    def _compare_runs(self) -> None:
+        """Show what changed between the output of the last two runs of the selected command."""
+        if not self.current_command_id:
+            messagebox.showwarning("No Command", "Please select a command to compare its runs.")
+            return
+        
+        command_data = self.commands[self.current_command_id]
+        log_paths = self.data_manager.list_run_logs(self.current_command_id)
+        if len(log_paths) < 2:
+            messagebox.showinfo("Compare Runs", "The command needs at least two finished runs to compare.")
+            return
+        old_path, new_path = log_paths[-2:]
+        touch_log(old_path)
+        touch_log(new_path)
+        
+        patterns = list(VOLATILE_PATTERNS) if self.config.get('diff_mask_volatile', True) else []
+        patterns.extend(self.config.get('diff_masks') or [])
+        diff = RunDiff(old_path, new_path, compile_masks(patterns))
+        
+        spool = OutputSpool()
+        title = f"Changes from {os.path.basename(old_path)} to {os.path.basename(new_path)}"
+        tab = self.run_tabs.add_run(f"Diff {command_data.get('name', '')}", title, spool)
+        cancelled = threading.Event()
+        tab.on_stop = cancelled.set
+        
+        def write(text):
+            spool.append(text)
+            tab.buffer.write(text)
+        
+        def run():
+            exit_code = 0
+            try:
+                write(f"--- {old_path}\n+++ {new_path}\n")
+                batch = []
+                for kind, line in diff.iter_lines():
+                    if cancelled.is_set():
+                        break
+                    color = DIFF_LINE_COLORS[kind]
+                    prefix = '' if kind == '@' else kind
+                    batch.append(f"{color}{prefix}{line}\x1b[0m\n" if color else f"{prefix}{line}\n")
+                    if len(batch) >= DIFF_BATCH_LINES:
+                        write(''.join(batch))
+                        batch = []
+                write(''.join(batch))
+                
+                if cancelled.is_set():
+                    write("\n--- Comparison stopped ---\n")
+                elif diff.added or diff.removed:
+                    write(f"\n--- {diff.added} lines added, {diff.removed} lines removed ---\n")
+                else:
+                    write("\n--- No differences ---\n")
+            except OSError as e:
+                print(f"Error comparing runs: {e}")
+                write(f"\nError comparing runs: {e}\n")
+                exit_code = None
+            finally:
+                spool.close()
+                self.root.after(0, lambda: self.run_tabs.finish_run(tab, exit_code))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _open_run_log(self) -> None:
+        """Open a stored run log in a new tab, showing its last lines."""
+        initial_dir = self.data_manager.runs_dir
+        if self.current_command_id:
+            command_dir = os.path.join(self.data_manager.runs_dir, self.current_command_id)
+            if os.path.isdir(command_dir):
+                initial_dir = command_dir
+        
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Open Run Log",
+            initialdir=initial_dir,
+            filetypes=[("Run logs", "*.log *.log.gz *.log.zst"), ("All files", "*")]
+        )
+        if not path:
+            return
+        
+        try:
+            first_line, total_lines, text = read_log_tail(path)
+        except OSError as e:
+            messagebox.showerror("Open Log", f"Could not read {path}: {e}")
+            return
+        touch_log(path)
+        
+        shown_lines = text.count('\n')
+        spool = OutputSpool()
+        spool.append(text)
+        saved_times = read_line_times(plain_log_path(path))
+        if saved_times is not None:
+            start_time, times = saved_times
+            if first_line is None:
+                first_line = max(len(times) - shown_lines, 0)
+            spool.load_line_times(start_time, times[first_line:])
+        
+        title = os.path.basename(path)
+        if first_line or (first_line is None and shown_lines >= LOG_TAIL_LINES):
+            total = f" of {total_lines}" if total_lines is not None else ""
+            title += f" (last {shown_lines}{total} lines)"
+        tab = self.run_tabs.add_run(os.path.basename(os.path.dirname(path)), title, spool)
+        tab.show_log()
+        tab.buffer.write(text)
+        tab.flush()
+    
+    def _on_schedule_fired(self, command_id: str, fire_time: float, done: Callable[[], None]) -> None:
+        """
+        Start a scheduled run (callback from the scheduler thread).
+        
+        Args:
+            command_id: ID of the command that is due.
+            fire_time: Scheduled fire time as a Unix timestamp.
+            done: Function to call when the run ends, freeing its slot.
+        """
+        def start():
+            command_data = self.commands.get(command_id)
+            if not command_data or not command_data['command'].strip():
+                done()
+                return
+            # Remember the firing so missed ones can be caught up after a restart
+            if command_data.get('schedule'):
+                command_data['schedule']['last_fired'] = fire_time
+            try:
+                self._start_run(command_id, scheduled=True, on_finished=done)
+            except Exception as e:
+                # The run never started, so its slot has to be freed here
+                print(f"Error starting scheduled run of {command_id}: {e}")
+                done()
+        
+        self.root.after(0, start)
+    
+    def _toggle_watch(self) -> None:
+        """Start or stop rerunning the current command when its files change."""
+        if not self.current_command_id:
+            self.watch_var.set(False)
+            return
+        command_id = self.current_command_id
+        if not self.watch_var.get():
+            self._stop_watch(command_id)
+            return
+        
+        self._save_command_data()
+        command_data = self.commands[command_id]
+        paths = self.command_executor.infer_watch_paths(command_data['command'])
+        patterns = command_data.get('watch_globs', '').split()
+        if not paths and not patterns:
+            messagebox.showwarning(
+                "Nothing to Watch",
+                "No paths were found in the command. Enter glob patterns of the files to watch."
+            )
+            self.watch_var.set(False)
+            return
         
-        # Clear output and add starting message
-        self.output_text.configure(state="normal")
-        self.output_text.delete("1.0", "end")
-        self.output_text.insert("end", f"Started command '{final_command}' at {timestamp_str}\n\n")
-        self.output_text.configure(state="disabled")
+        def on_change(changed):
+            self.root.after(0, lambda: self._on_watched_change(command_id, changed))
         
-        # Disable run button
-        self.run_button.configure(state="disabled")
+        watcher = FileWatcher(paths, patterns, on_change, ignore_paths=[self.data_manager.config_dir])
+        self.watchers[command_id] = watcher
+        watcher.start()
+        self._show_status_message(f"Watching {len(paths) + len(patterns)} path(s) for changes")
+    
+    def _stop_watch(self, command_id: str) -> None:
+        """Stop watching the files of a command."""
+        watcher = self.watchers.pop(command_id, None)
+        self.watch_tabs.pop(command_id, None)
+        if watcher is not None:
+            watcher.stop()
+    
+    def _on_watched_change(self, command_id: str, changed) -> None:
+        """
+        Rerun a watched command after a burst of file changes.
+        
+        Args:
+            command_id: ID of the watched command.
+            changed: Paths that changed.
+        """
+        if command_id not in self.watchers or command_id not in self.commands:
+            return
         
-        # Execute command asynchronously
-        def on_completion():
-            self.root.after(0, lambda: self.run_button.configure(state="normal"))
+        # A new change makes the run in progress obsolete
+        previous = self.watch_tabs.get(command_id)
+        if previous is not None and previous.running:
+            previous.stop()
         
-        self.command_executor.execute_command_async(command_data, self.config, on_completion)
+        paths = sorted(changed)
+        trigger = f"Rerun after a change to {paths[0]}"
+        if len(paths) > 1:
+            trigger += f" and {len(paths) - 1} more"
+        self.watch_tabs[command_id] = self._start_run(command_id, trigger=trigger)
     
     def _toggle_conda(self) -> None:
         """Handle conda checkbox toggle."""
@@ -786,8 +1380,11 @@ class CommandWalletWindow:
         """Handle name change."""
         if self.current_command_id:
             new_name = self.name_entry.get()
-            self.commands[self.current_command_id]['name'] = new_name
-            self._update_commands_list()
+            self.data_manager.update_command(self.commands, self.current_command_id, {'name': new_name})
+            if self.sort_mode == 'name' or self.search_entry.get().strip():
+                self._update_commands_list()
+            else:
+                self.command_list.update_item(self.current_command_id)
             self.data_manager.save_commands(self.commands)
     
     def _on_command_change(self, event) -> None:
@@ -823,11 +1420,22 @@ class CommandWalletWindow:
         if self.current_command_id:
             self._save_command_data()
     
+    def _on_run_option_change(self, value=None) -> None:
+        """Handle a change of the run options."""
+        if self.current_command_id:
+            self._save_command_data()
+    
     def _show_config_dialog(self) -> None:
         """Show configuration dialog."""
         def save_config(new_config):
             self.config = new_config
             self.data_manager.save_config(self.config)
+            self.scheduler.max_concurrent = self.config.get('max_scheduled_jobs', DEFAULT_MAX_CONCURRENT)
+            self.command_executor.admission.configure(self.config)
+            self.log_archiver.configure(self.config)
+            self.run_tabs.stall_threshold = (
+                self.config.get('stall_threshold_seconds') or DEFAULT_STALL_THRESHOLD
+            )
         
         dialog = ConfigDialog(self.root, self.config, save_config)
         dialog.show()
@@ -840,14 +1448,148 @@ class CommandWalletWindow:
         
         command_data = self.commands[self.current_command_id]
         
+        command_id = self.current_command_id
+        
         def prepare_command(cmd_data):
             return self.command_executor._prepare_command(cmd_data, self.config)
         
-        dialog = CronExportDialog(self.root, command_data, prepare_command)
+        def save_schedule(schedule):
+            # Keep state such as the last firing time
+            schedule = dict(self.commands[command_id].get('schedule') or {}, **schedule)
+            self.data_manager.update_command(self.commands, command_id, {'schedule': schedule})
+            self.data_manager.save_commands(self.commands)
+            self.scheduler.update_command(command_id, self.commands[command_id])
+            self._show_status_message("Schedule saved")
+        
+        dialog = CronExportDialog(self.root, command_data, prepare_command, save_schedule)
         dialog.show()
     
+    def _show_debug_panel(self) -> None:
+        """Show the event-loop statistics panel."""
+        panel = DebugPanel(self.root, self.instrumentation)
+        panel.show()
+    
+    def _toggle_profiling(self) -> None:
+        """Start a CPU profile, or stop the one started from the menu and show it."""
+        if self._menu_profile == 'interval':
+            self._finish_profile('interval')
+        elif self.profiler.start_profile('interval'):
+            self._menu_profile = 'interval'
+            self.debug_menu.entryconfigure(self._profiling_menu_index, label="Stop Profiling")
+            self._show_status_message("Profiling started")
+        elif self._menu_profile == 'run':
+            self._show_status_message("A run is being profiled until it finishes")
+        else:
+            self._show_status_message("A session profile is being captured")
+    
+    def _finish_profile(self, label: str) -> None:
+        """
+        Stop a CPU profile started from the Debug menu and show its summary.
+        
+        Args:
+            label: Label of the profile to stop; nothing happens if the
+                running profile is another one.
+        """
+        if self._menu_profile != label:
+            return
+        self._menu_profile = None
+        path = self.profiler.stop_profile()
+        self.debug_menu.entryconfigure(self._profiling_menu_index, label="Start Profiling")
+        if path is not None:
+            self._show_last_profile()
+    
+    def _profile_list_refresh(self) -> None:
+        """Profile one rebuild of the command list."""
+        with self.profiler.profile('list-refresh'):
+            self._update_commands_list()
+        self._show_last_profile()
+    
+    def _profile_sorting(self) -> None:
+        """Profile sorting the command list in every order, then restore the current one."""
+        current = self.sort_mode
+        with self.profiler.profile('sort'):
+            for sort_mode in ('name', 'date', 'frecency'):
+                self._update_commands_list(sort_by=sort_mode)
+        self._update_commands_list(sort_by=current)
+        self._show_last_profile()
+    
+    def _show_last_profile(self) -> None:
+        """Show the summary of the profile written last."""
+        path = self.profiler.last_profile_path
+        if path is None:
+            return
+        self._show_status_message(f"Profile saved to {path}")
+        ReportWindow(self.root, f"Profile - {os.path.basename(path)}", summarize_profile(path)).show()
+    
+    def _arm_run_profile(self) -> None:
+        """Profile the GUI work of the next run, from its start until it finishes."""
+        self._profile_next_run = True
+        self._show_status_message("The next run will be profiled")
+    
+    def _toggle_memory_trace(self) -> None:
+        """Start tracing allocations, or stop tracing them."""
+        if self.profiler.tracing_memory:
+            self.profiler.stop_memory_trace()
+            self.debug_menu.entryconfigure(self._memory_menu_index, label="Start Memory Tracing")
+            self._show_status_message("Memory tracing stopped")
+        else:
+            self.profiler.start_memory_trace()
+            self.debug_menu.entryconfigure(self._memory_menu_index, label="Stop Memory Tracing")
+            self._show_status_message("Memory tracing started")
+    
+    def _show_memory_report(self) -> None:
+        """Show the top allocation sites since memory tracing started."""
+        ReportWindow(self.root, "Top Allocations", self.profiler.memory_report()).show()
+    
+    def _install_crontab(self) -> None:
+        """Install all commands marked for the crontab as one managed block."""
+        if self.current_command_id:
+            self._save_command_data()
+        
+        manager = CrontabManager(self.config.get('crontab_binary', 'crontab'))
+        
+        def prepare_command(cmd_data):
+            return self.command_executor._prepare_command(cmd_data, self.config)
+        
+        try:
+            plan = manager.plan(self.commands, prepare_command)
+        except OSError as e:
+            messagebox.showerror("Crontab Error", f"Could not read the crontab:\n{e}")
+            return
+        
+        errors = "\n".join(
+            f"- {self.commands[command_id]['name']}: {message}"
+            for command_id, message in plan['errors'].items()
+        )
+        if not (plan['added'] or plan['changed'] or plan['removed']):
+            if errors:
+                messagebox.showwarning("Crontab", f"Crontab is up to date, but some schedules were skipped:\n{errors}")
+            else:
+                self._show_status_message("Crontab is up to date")
+            return
+        
+        summary = (
+            f"{len(plan['added'])} added, {len(plan['changed'])} changed, "
+            f"{len(plan['removed'])} removed, {len(plan['unchanged'])} unchanged."
+        )
+        if errors:
+            summary += f"\n\nSkipped (invalid):\n{errors}"
+        if not messagebox.askyesno("Install Crontab", f"{summary}\n\nUpdate the crontab?"):
+            return
+        
+        try:
+            manager.write(plan['text'])
+            self._show_status_message("Crontab updated")
+        except OSError as e:
+            messagebox.showerror("Crontab Error", f"Could not write the crontab:\n{e}")
+    
     def _on_closing(self) -> None:
         """Handle application closing."""
         if self.current_command_id:
             self._save_command_data()
+        self.scheduler.stop()
+        for command_id in list(self.watchers):
+            self._stop_watch(command_id)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
         self.root.destroy()
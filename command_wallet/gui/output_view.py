@@ -0,0 +1,487 @@
+"""
+Output view module for CommandWallet.
+
+Provides the output pane of a run: a text widget mirroring the run's
+output spool, with a search bar for plain or regex matching, next/previous
+navigation, a "show only matching lines" filter and an optional gutter
+showing when each line was printed. ANSI colors in the output are shown
+with a fixed set of text tags instead of as raw escape codes.
+"""
+
+import re
+import customtkinter as ctk
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from ..core.ansi import (
+    AnsiParser, Runs, ANSI_PALETTE, FOREGROUND_TAGS, BACKGROUND_TAGS, UNDERLINE_TAG, strip_ansi
+)
+from ..core.output_spool import OutputSpool
+
+
+# Delay after the last keystroke before the output is searched, in milliseconds
+SEARCH_DELAY_MS = 250
+
+# Gutter modes: no gutter, time of day, time since the start, time since the previous line
+GUTTER_MODES = ("No times", "Clock", "Elapsed", "Delta")
+
+# Width of the time in the gutter, and what separates it from the output
+GUTTER_TIME_WIDTH = 12
+GUTTER_SEPARATOR = " │ "
+GUTTER_WIDTH = GUTTER_TIME_WIDTH + len(GUTTER_SEPARATOR)
+
+# Gap before a line, in seconds, from which its gutter time is marked as a stall
+DEFAULT_STALL_THRESHOLD = 30.0
+
+
+class OutputView:
+    """Output text widget with indexed search over the run's spool."""
+
+    def __init__(self, parent, root):
+        """
+        Initialize the output view.
+
+        Args:
+            parent: Parent widget.
+            root: Application root window (used for scheduling).
+        """
+        self.root = root
+        self.spool: Optional[OutputSpool] = None
+
+        # Spool line shown on the first widget line (moves when cleared)
+        self.base_line = 0
+        # Spool line of the next committed line written to the widget
+        self._next_line = 0
+
+        # Gutter state
+        self.gutter = GUTTER_MODES[0]
+        self.stall_threshold = DEFAULT_STALL_THRESHOLD
+        self.on_gutter_change: Optional[Callable[[str], None]] = None
+
+        # Colors at the end of the committed output
+        self.ansi = AnsiParser()
+
+        # Search state
+        self.matches: List[int] = []
+        self.match_index = -1
+        self.pattern = None
+        self.filtered = False
+        self._search_after_id = None
+
+        self.frame = ctk.CTkFrame(parent, fg_color="transparent")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+
+        self._create_search_bar()
+
+        self.text = ctk.CTkTextbox(
+            self.frame,
+            wrap="word",
+            state="disabled",
+            font=ctk.CTkFont(family="Consolas", size=11)
+        )
+        self.text.grid(row=1, column=0, sticky="nsew")
+        # Color tags first: tags created later (search highlights) take priority
+        for index, color in enumerate(ANSI_PALETTE):
+            self.text.tag_config(FOREGROUND_TAGS[index], foreground=color)
+            self.text.tag_config(BACKGROUND_TAGS[index], background=color)
+        self.text.tag_config(UNDERLINE_TAG, underline=True)
+        self.text.tag_config("search_line", background="#3a3a1a")
+        self.text.tag_config("search_match", background="#8a6d00")
+        self.text.tag_config("gutter", foreground="#7f7f7f")
+        self.text.tag_config("gutter_stall", foreground="#d08b3b")
+
+        # Start of the unfinished last line, redrawn in place by write()
+        self.text.mark_set("partial", "end-1c")
+
+    def grid(self, **kwargs) -> None:
+        """Place the view in its parent using the grid geometry manager."""
+        self.frame.grid(**kwargs)
+
+    def _create_search_bar(self) -> None:
+        """Create the search bar above the output text."""
+        bar = ctk.CTkFrame(self.frame, fg_color="transparent")
+        bar.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        bar.grid_columnconfigure(0, weight=1)
+
+        self.search_entry = ctk.CTkEntry(bar, placeholder_text="Search output...")
+        self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        self.search_entry.bind('<KeyRelease>', self._on_search_key)
+        self.search_entry.bind('<Return>', lambda e: self.next_match())
+        self.search_entry.bind('<Shift-Return>', lambda e: self.previous_match())
+
+        self.regex_var = ctk.BooleanVar()
+        ctk.CTkCheckBox(
+            bar,
+            text="Regex",
+            variable=self.regex_var,
+            command=self.search,
+            width=70
+        ).grid(row=0, column=1, padx=5)
+
+        self.case_var = ctk.BooleanVar()
+        ctk.CTkCheckBox(
+            bar,
+            text="Match case",
+            variable=self.case_var,
+            command=self.search,
+            width=100
+        ).grid(row=0, column=2, padx=5)
+
+        self.filter_var = ctk.BooleanVar()
+        ctk.CTkCheckBox(
+            bar,
+            text="Only matching",
+            variable=self.filter_var,
+            command=self._on_filter_toggle,
+            width=120
+        ).grid(row=0, column=3, padx=5)
+
+        ctk.CTkButton(bar, text="▲", width=30, command=self.previous_match).grid(row=0, column=4, padx=(5, 2))
+        ctk.CTkButton(bar, text="▼", width=30, command=self.next_match).grid(row=0, column=5, padx=(2, 5))
+
+        self.match_label = ctk.CTkLabel(bar, text="", width=90)
+        self.match_label.grid(row=0, column=6, padx=(5, 0))
+
+        self.gutter_var = ctk.StringVar(value=GUTTER_MODES[0])
+        ctk.CTkOptionMenu(
+            bar,
+            values=list(GUTTER_MODES),
+            variable=self.gutter_var,
+            command=self._on_gutter_select,
+            width=100
+        ).grid(row=0, column=7, padx=(5, 0))
+
+    def reset(self, spool: Optional[OutputSpool]) -> None:
+        """
+        Clear the view and attach the spool of a new run.
+
+        Args:
+            spool: Spool receiving the run's output, or None.
+        """
+        self.spool = spool
+        self.base_line = 0
+        self._next_line = 0
+        self.ansi.reset()
+        self._clear_widget()
+        self._reset_matches()
+        if self.filtered:
+            self.filter_var.set(False)
+            self.filtered = False
+
+    def clear(self) -> None:
+        """Clear the widget; the spool keeps the output for searching."""
+        if self.spool is not None:
+            self.base_line = self.spool.line_count()
+        self._next_line = self.base_line
+        self._clear_widget()
+        self._reset_matches()
+
+    def write(self, text: str, partial: str = '') -> None:
+        """
+        Append committed output and redraw the unfinished last line.
+
+        Args:
+            text: Committed output text (already in the spool).
+            partial: Current state of the unfinished last line.
+        """
+        first_line = self._next_line
+        self._next_line += text.count('\n')
+        if self.filtered and self.pattern is not None:
+            self._write_filtered(text, first_line)
+            return
+
+        self.text.configure(state="normal")
+        # Drop the previous partial line, then append and redraw
+        self.text.delete("partial", "end-1c")
+        self._insert_output(text, first_line, self.ansi.feed)
+        partial_length = self._insert_output(partial, None, self.ansi.preview)
+        self.text.mark_set("partial", f"end-1c-{partial_length}c")
+        self.text.see("end")
+        self.text.configure(state="disabled")
+
+    def load_from_spool(self, start: int, end: int) -> None:
+        """
+        Show a range of spool lines that was not written to the view.
+
+        The widget content from line `start` on (the unfinished line, if
+        any) is replaced by the lines read from the spool.
+
+        Args:
+            start: Index of the first spool line to show.
+            end: Index after the last spool line to show.
+        """
+        if self.spool is None:
+            return
+        start = max(start, self.base_line)
+        text = self.spool.read_text(start, end)
+        self._next_line = start + text.count('\n')
+        # The colors before the reloaded lines are unknown
+        self.ansi.reset()
+
+        if self.filtered and self.pattern is not None:
+            self._write_filtered(text, start)
+            return
+
+        self.text.configure(state="normal")
+        self.text.delete(f"{start - self.base_line + 1}.0", "end-1c")
+        self._insert_output(text, start, self.ansi.feed)
+        self.text.mark_set("partial", "end-1c")
+        self.text.see("end")
+        self.text.configure(state="disabled")
+
+    def set_gutter(self, mode: str) -> None:
+        """
+        Show or hide the gutter and redraw the output.
+
+        Args:
+            mode: One of GUTTER_MODES.
+        """
+        self.gutter = mode if mode in GUTTER_MODES else GUTTER_MODES[0]
+        self.gutter_var.set(self.gutter)
+        if self.filtered:
+            self._render_filter()
+        else:
+            self._render_full()
+        if self.matches and self.match_index >= 0:
+            self._show_current_match()
+
+    def get_text(self) -> str:
+        """Return the text currently shown in the widget."""
+        return self.text.get("1.0", "end-1c")
+
+    def search(self) -> None:
+        """Search the spool for the text in the search box."""
+        self._search_after_id = None
+        query = self.search_entry.get()
+        self._reset_matches()
+
+        if not query or self.spool is None:
+            self.pattern = None
+            if self.filtered:
+                self._render_full()
+            return
+
+        try:
+            self.matches = self.spool.search(
+                query,
+                regex=self.regex_var.get(),
+                ignore_case=not self.case_var.get(),
+                start=self.base_line
+            )
+            self.pattern = OutputSpool.compile_pattern(
+                query, self.regex_var.get(), not self.case_var.get()
+            )
+        except re.error as e:
+            self.pattern = None
+            self.match_label.configure(text="Bad regex")
+            print(f"Invalid output search pattern: {e}")
+            return
+
+        if self.filtered:
+            self._render_filter()
+
+        if self.matches:
+            self.match_index = 0
+            self._show_current_match()
+        else:
+            self.match_label.configure(text="No matches")
+
+    def next_match(self) -> None:
+        """Move to the next match, wrapping around."""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+            self.search()
+            return
+        if self.matches:
+            self.match_index = (self.match_index + 1) % len(self.matches)
+            self._show_current_match()
+
+    def previous_match(self) -> None:
+        """Move to the previous match, wrapping around."""
+        if self.matches:
+            self.match_index = (self.match_index - 1) % len(self.matches)
+            self._show_current_match()
+
+    def _on_search_key(self, event) -> None:
+        """Debounce searching while the user types."""
+        if event.keysym in ('Return', 'Shift_L', 'Shift_R'):
+            return
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(SEARCH_DELAY_MS, self.search)
+
+    def _on_gutter_select(self, mode: str) -> None:
+        """Apply the gutter mode picked in the search bar."""
+        self.set_gutter(mode)
+        if self.on_gutter_change:
+            self.on_gutter_change(self.gutter)
+
+    def _on_filter_toggle(self) -> None:
+        """Switch between the full output and only the matching lines."""
+        self.filtered = self.filter_var.get()
+        if self.filtered:
+            self._render_filter()
+        else:
+            self._render_full()
+        if self.matches and self.match_index >= 0:
+            self._show_current_match()
+
+    def _render_filter(self) -> None:
+        """Show only the matching lines, read from the spool."""
+        if self.pattern is None:
+            self._render_full()
+            return
+        self._clear_widget()
+        if self.spool is None:
+            return
+        self.text.configure(state="normal")
+        for line in self.matches:
+            for text in self.spool.read_lines(line, line + 1):
+                self._insert_output(text + '\n', line, AnsiParser().feed)
+        self.text.configure(state="disabled")
+
+    def _render_full(self) -> None:
+        """Show the full output again, read from the spool."""
+        self._clear_widget()
+        if self.spool is None:
+            return
+        text = self.spool.read_text(self.base_line)
+        self._next_line = self.base_line + text.count('\n')
+        self.ansi.reset()
+        self.text.configure(state="normal")
+        self._insert_output(text, self.base_line, self.ansi.feed)
+        self.text.mark_set("partial", "end-1c")
+        self.text.configure(state="disabled")
+
+    def _write_filtered(self, text: str, first_line: int) -> None:
+        """Append the matching lines of new output while filtering."""
+        self.text.configure(state="normal")
+        for index, line in enumerate(text.splitlines()):
+            if self.pattern.search(strip_ansi(line)):
+                self._insert_output(line + '\n', first_line + index, self.ansi.feed)
+            else:
+                # Hidden lines still change the colors
+                self.ansi.feed(line + '\n')
+        self.text.configure(state="disabled")
+
+    def _insert_output(self, text: str, first_line: Optional[int],
+                       parse: Callable[[str], Runs]) -> int:
+        """
+        Insert output at the end of the widget, behind gutter times if shown.
+
+        The colored runs of the text and all gutter times are inserted in
+        one Tk call.
+
+        Args:
+            text: Output text starting at the beginning of a line.
+            first_line: Spool line of the first line of the text, or None
+                for an unfinished line (its gutter stays blank).
+            parse: Function splitting text into colored runs.
+
+        Returns:
+            Number of characters inserted.
+        """
+        if not text:
+            return 0
+        if self.gutter == GUTTER_MODES[0]:
+            runs = self._flatten_runs(parse(text))
+            if runs:
+                self.text._textbox.insert("end", *runs)
+            return sum(len(chunk) for chunk in runs[::2])
+
+        lines = text.split('\n')
+        tail = lines.pop()
+        times: List[float] = []
+        if first_line is not None and self.spool is not None:
+            # Include the previous line's time for the first delta
+            times = self.spool.line_times(max(first_line - 1, 0), first_line + len(lines))
+            if first_line == 0:
+                times.insert(0, 0.0)
+
+        runs: List = []
+        for index, line in enumerate(lines):
+            if index + 1 < len(times):
+                runs.extend(self._gutter_time(times[index + 1], times[index]))
+            else:
+                runs.extend((' ' * GUTTER_TIME_WIDTH + GUTTER_SEPARATOR, "gutter"))
+            runs.extend(self._flatten_runs(parse(line + '\n')))
+        if tail:
+            runs.extend((' ' * GUTTER_TIME_WIDTH + GUTTER_SEPARATOR, "gutter"))
+            runs.extend(self._flatten_runs(parse(tail)))
+
+        # CTkTextbox.insert takes a single text/tags pair; the Tk widget takes many
+        self.text._textbox.insert("end", *runs)
+        return sum(len(chunk) for chunk in runs[::2])
+
+    @staticmethod
+    def _flatten_runs(runs: Runs) -> List:
+        """Turn (text, tags) runs into Tk insert arguments."""
+        return [item for run in runs for item in run]
+
+    def _gutter_time(self, time: float, previous: float) -> List[str]:
+        """
+        Format the gutter of one line.
+
+        Args:
+            time: Seconds since the start at which the line was completed.
+            previous: Same for the previous line.
+
+        Returns:
+            The gutter text and its tag, marking lines after a stall.
+        """
+        if self.gutter == "Clock":
+            moment = datetime.fromtimestamp(self.spool.start_time + time)
+            value = moment.strftime("%H:%M:%S.") + f"{moment.microsecond // 1000:03d}"
+        elif self.gutter == "Delta":
+            value = f"+{time - previous:.3f}"
+        else:
+            value = f"{time:.3f}"
+        tag = "gutter_stall" if time - previous >= self.stall_threshold else "gutter"
+        return [value.rjust(GUTTER_TIME_WIDTH)[-GUTTER_TIME_WIDTH:] + GUTTER_SEPARATOR, tag]
+
+    def _show_current_match(self) -> None:
+        """Highlight and scroll to the current match."""
+        line = self.matches[self.match_index]
+        if self.filtered:
+            widget_line = self.match_index + 1
+        else:
+            widget_line = line - self.base_line + 1
+
+        self.text.tag_remove("search_line", "1.0", "end")
+        self.text.tag_remove("search_match", "1.0", "end")
+        self.text.tag_add("search_line", f"{widget_line}.0", f"{widget_line}.end")
+
+        # Highlight the matched span within the line, after the gutter
+        column = 0 if self.gutter == GUTTER_MODES[0] else GUTTER_WIDTH
+        line_text = self.text.get(f"{widget_line}.{column}", f"{widget_line}.end")
+        match = self.pattern.search(line_text) if self.pattern is not None else None
+        if match:
+            self.text.tag_add(
+                "search_match",
+                f"{widget_line}.{column + match.start()}",
+                f"{widget_line}.{column + match.end()}"
+            )
+
+        self.text.see(f"{widget_line}.0")
+        self.match_label.configure(text=f"{self.match_index + 1}/{len(self.matches)}")
+
+    def _reset_matches(self) -> None:
+        """Forget the current search results."""
+        self.matches = []
+        self.match_index = -1
+        self.text.tag_remove("search_line", "1.0", "end")
+        self.text.tag_remove("search_match", "1.0", "end")
+        self.match_label.configure(text="")
+
+    def _replace_text(self, text: str) -> None:
+        """Replace the widget content in one call."""
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("end", text)
+        self.text.mark_set("partial", "end-1c")
+        self.text.configure(state="disabled")
+
+    def _clear_widget(self) -> None:
+        """Delete all text from the widget."""
+        self._replace_text('')
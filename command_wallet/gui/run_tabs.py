@@ -0,0 +1,326 @@
+"""
+Run tabs module for CommandWallet.
+
+Shows the output of every run in its own tab, so several commands can run
+at the same time. Each run's reader thread writes into the tab's
+OutputBuffer; a single periodic flush renders only the selected tab, and
+background tabs keep buffering until they are selected. A run that prints
+nothing for longer than the stall threshold is flagged in its header.
+"""
+
+import time
+import customtkinter as ctk
+from typing import Callable, Dict, Optional
+
+from ..core.output_stream import OutputBuffer
+from ..core.output_spool import OutputSpool
+from .output_view import OutputView, GUTTER_MODES, DEFAULT_STALL_THRESHOLD
+
+
+# Interval between two renders of the selected tab, in milliseconds
+FLUSH_INTERVAL_MS = 100
+
+# Maximum number of run tabs; the oldest finished tabs are closed first
+MAX_RUN_TABS = 10
+
+# Maximum length of a command name in a tab title
+TAB_TITLE_LENGTH = 24
+
+# Exit status badge colors
+COLOR_RUNNING = "#3b8ed0"
+COLOR_SUCCESS = "#2fa84f"
+COLOR_FAILURE = "#d64545"
+COLOR_STOPPED = "#d08b3b"
+
+
+def format_elapsed(seconds: float) -> str:
+    """
+    Format an elapsed time as ``m:ss`` or ``h:mm:ss``.
+
+    Args:
+        seconds: Elapsed time in seconds.
+
+    Returns:
+        The formatted time.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class RunTab:
+    """Output, exit status and elapsed time of one run."""
+
+    def __init__(self, parent, root, name: str, title: str, spool: Optional[OutputSpool],
+                 on_close: Callable[['RunTab'], None]):
+        """
+        Initialize the run tab.
+
+        Args:
+            parent: Tab frame to build the tab in.
+            root: Application root window (used for scheduling).
+            name: Unique name of the tab.
+            title: Description of the run shown above the output.
+            spool: Spool receiving the run's output, or None.
+            on_close: Callback invoked when the tab's close button is pressed.
+        """
+        self.name = name
+        self.buffer = OutputBuffer()
+        self.running = True
+        self.exit_code: Optional[int] = None
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        # Set by the owner of the run to stop it
+        self.on_stop: Optional[Callable[[], None]] = None
+        self.stopping = False
+
+        parent.grid_columnconfigure(0, weight=1)
+        parent.grid_rowconfigure(1, weight=1)
+
+        header = ctk.CTkFrame(parent, fg_color="transparent")
+        header.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        header.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(header, text=title, anchor="w").grid(row=0, column=0, sticky="ew")
+
+        # Shown while the run prints nothing for longer than the stall threshold
+        self.stall_label = ctk.CTkLabel(header, text="", text_color=COLOR_STOPPED)
+        self.stall_label.grid(row=0, column=1, padx=(10, 0))
+        self.stall_label.grid_remove()
+
+        self.badge = ctk.CTkLabel(
+            header,
+            text="● Running",
+            text_color=COLOR_RUNNING,
+            font=ctk.CTkFont(size=12, weight="bold")
+        )
+        self.badge.grid(row=0, column=2, padx=10)
+
+        self.elapsed_label = ctk.CTkLabel(header, text=format_elapsed(0), width=60)
+        self.elapsed_label.grid(row=0, column=3, padx=(0, 10))
+
+        self.stop_button = ctk.CTkButton(
+            header,
+            text="■ Stop",
+            width=70,
+            fg_color=COLOR_FAILURE,
+            command=self.stop
+        )
+        self.stop_button.grid(row=0, column=4, padx=(0, 10))
+
+        ctk.CTkButton(
+            header,
+            text="✕",
+            width=28,
+            command=lambda: on_close(self)
+        ).grid(row=0, column=5)
+
+        self.view = OutputView(parent, root)
+        self.view.grid(row=1, column=0, sticky="nsew")
+        self.view.reset(spool)
+
+    def elapsed(self) -> float:
+        """Return the run's elapsed time in seconds."""
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    def flush(self) -> None:
+        """Render the output buffered since the last flush."""
+        update = self.buffer.drain()
+        if update is not None:
+            reload, committed, partial = update
+            if reload is not None:
+                self.view.load_from_spool(*reload)
+            self.view.write(committed, partial)
+        self.elapsed_label.configure(text=format_elapsed(self.elapsed()))
+        self._check_stall()
+
+    def _check_stall(self) -> None:
+        """Show how long a running command has printed nothing, past the threshold."""
+        silent = time.monotonic() - self.buffer.last_output
+        if self.running and silent >= self.view.stall_threshold:
+            self.stall_label.configure(text=f"⏸ Stalled for {format_elapsed(silent)}")
+            self.stall_label.grid()
+        else:
+            self.stall_label.grid_remove()
+
+    def stop(self) -> None:
+        """Ask the owner of the run to stop it."""
+        if not self.running or self.stopping or self.on_stop is None:
+            return
+        self.stopping = True
+        self.stop_button.configure(state="disabled", text="Stopping")
+        self.on_stop()
+
+    def show_log(self) -> None:
+        """Turn the tab into a viewer of a stored log instead of a live run."""
+        self.running = False
+        self.finished = self.started
+        self.stop_button.grid_remove()
+        self.elapsed_label.grid_remove()
+        self.badge.configure(text="📄 Log", text_color="gray")
+
+    def finish(self, exit_code: Optional[int]) -> None:
+        """
+        Mark the run as finished and show its exit status.
+
+        Args:
+            exit_code: Exit code of the command, or None if it could not run.
+        """
+        self.running = False
+        self.exit_code = exit_code
+        self.finished = time.monotonic()
+        self.stop_button.grid_remove()
+        self.stall_label.grid_remove()
+
+        if self.stopping:
+            self.badge.configure(text="■ Stopped", text_color=COLOR_STOPPED)
+        elif exit_code == 0:
+            self.badge.configure(text="✓ Exit 0", text_color=COLOR_SUCCESS)
+        elif exit_code is None:
+            self.badge.configure(text="✗ Error", text_color=COLOR_FAILURE)
+        else:
+            self.badge.configure(text=f"✗ Exit {exit_code}", text_color=COLOR_FAILURE)
+
+
+class RunTabs:
+    """Tabbed output area with one tab per run."""
+
+    def __init__(self, parent, root, on_view_created: Optional[Callable[[OutputView], None]] = None,
+                 stall_threshold: float = DEFAULT_STALL_THRESHOLD):
+        """
+        Initialize the run tabs.
+
+        Args:
+            parent: Parent widget.
+            root: Application root window (used for scheduling).
+            on_view_created: Optional callback receiving the output view of
+                each new tab (e.g. to bind context menus).
+            stall_threshold: Seconds without output after which a run is
+                flagged as stalled.
+        """
+        self.root = root
+        self.on_view_created = on_view_created
+        self.stall_threshold = stall_threshold
+        # Gutter mode of new tabs: the one last picked in any tab
+        self.gutter_mode = GUTTER_MODES[0]
+        self.tabs: Dict[str, RunTab] = {}
+        self._run_counter = 0
+        self._flush_after_id = None
+
+        self.tabview = ctk.CTkTabview(parent, command=self._on_tab_change)
+
+    def grid(self, **kwargs) -> None:
+        """Place the tabs in their parent using the grid geometry manager."""
+        self.tabview.grid(**kwargs)
+
+    def add_run(self, command_name: str, title: str, spool: Optional[OutputSpool]) -> RunTab:
+        """
+        Open and select a tab for a new run.
+
+        Args:
+            command_name: Name of the command, used in the tab title.
+            title: Description of the run shown above the output.
+            spool: Spool receiving the run's output, or None.
+
+        Returns:
+            The new tab; its buffer receives the run's output.
+        """
+        self._close_old_tabs()
+
+        self._run_counter += 1
+        label = command_name.strip() or "Unnamed"
+        if len(label) > TAB_TITLE_LENGTH:
+            label = label[:TAB_TITLE_LENGTH - 1] + "…"
+        name = f"{label} #{self._run_counter}"
+
+        tab = RunTab(self.tabview.add(name), self.root, name, title, spool, self.close)
+        tab.view.stall_threshold = self.stall_threshold
+        tab.view.on_gutter_change = self._on_gutter_change
+        if self.gutter_mode != GUTTER_MODES[0]:
+            tab.view.set_gutter(self.gutter_mode)
+        self.tabs[name] = tab
+        self.tabview.set(name)
+
+        if self.on_view_created:
+            self.on_view_created(tab.view)
+
+        self._schedule_flush()
+        return tab
+
+    def finish_run(self, tab: RunTab, exit_code: Optional[int]) -> None:
+        """
+        Mark a run as finished (must be called on the Tk thread).
+
+        A tab closed while its command was running is left alone: its
+        widgets are gone.
+
+        Args:
+            tab: Tab of the run.
+            exit_code: Exit code of the command, or None if it could not run.
+        """
+        if self.tabs.get(tab.name) is not tab:
+            return
+        tab.finish(exit_code)
+        if tab is self.current():
+            tab.flush()
+
+    def close(self, tab: RunTab) -> None:
+        """
+        Close a run tab; a running command keeps running in the background.
+
+        Args:
+            tab: Tab to close.
+        """
+        if self.tabs.pop(tab.name, None) is not None:
+            # Output of a command still running is no longer displayed
+            tab.buffer.close()
+            self.tabview.delete(tab.name)
+            current = self.current()
+            if current is not None:
+                current.flush()
+
+    def current(self) -> Optional[RunTab]:
+        """Return the selected tab, or None if there are no tabs."""
+        if not self.tabs:
+            return None
+        return self.tabs.get(self.tabview.get())
+
+    def current_view(self) -> Optional[OutputView]:
+        """Return the output view of the selected tab, or None."""
+        tab = self.current()
+        return tab.view if tab is not None else None
+
+    def _close_old_tabs(self) -> None:
+        """Close the oldest finished tabs to make room for a new one."""
+        for tab in list(self.tabs.values()):
+            if len(self.tabs) < MAX_RUN_TABS:
+                break
+            if not tab.running:
+                self.close(tab)
+
+    def _on_tab_change(self) -> None:
+        """Render the output a tab buffered while it was in the background."""
+        tab = self.current()
+        if tab is not None:
+            tab.flush()
+
+    def _on_gutter_change(self, mode: str) -> None:
+        """Remember the gutter mode picked in a tab for the next tabs."""
+        self.gutter_mode = mode
+
+    def _schedule_flush(self) -> None:
+        """Start the periodic flush unless it is already scheduled."""
+        if self._flush_after_id is None:
+            self._flush_after_id = self.root.after(FLUSH_INTERVAL_MS, self._flush)
+
+    def _flush(self) -> None:
+        """Render the selected tab; keep flushing while any run is going."""
+        self._flush_after_id = None
+        tab = self.current()
+        if tab is not None and tab.running:
+            tab.flush()
+        if any(tab.running for tab in self.tabs.values()):
+            self._schedule_flush()
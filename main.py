@@ -5,18 +5,87 @@ CommandWallet - A modern CLI command management application.
 Main entry point for the refactored modular application.
 """
 
+import argparse
+
 from command_wallet.gui.main_window import CommandWalletWindow
 
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="CommandWallet - manage and run CLI commands")
+    parser.add_argument(
+        '--instrument',
+        action='store_true',
+        help="time Tk event handlers and event-loop lag (adds a Debug menu)"
+    )
+    parser.add_argument(
+        '--instrument-json',
+        metavar='PATH',
+        help="write the instrumentation stats to a JSON file on exit (implies --instrument)"
+    )
+    parser.add_argument(
+        '--slow-handler-ms',
+        type=float,
+        default=50.0,
+        metavar='MS',
+        help="log event handlers running longer than this (default: 50)"
+    )
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help="add a Debug menu that captures CPU profiles and allocation reports on demand"
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='PATH',
+        help="profile the whole session with cProfile and write it to a .prof file on exit"
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help="trace allocations from startup and print the top allocation sites on exit"
+    )
+    return parser.parse_args(argv)
+
+
 def main():
     """Main entry point for CommandWallet."""
+    args = parse_args()
+
+    instrumentation = None
+    if args.instrument or args.instrument_json:
+        from command_wallet.gui.instrumentation import TkInstrumentation
+        instrumentation = TkInstrumentation(slow_handler_ms=args.slow_handler_ms)
+        # Must be installed before any widget registers a callback
+        instrumentation.install()
+
+    profiler = None
+    if args.debug or args.profile or args.trace_memory:
+        from command_wallet.core.profiling import Profiler
+        profiler = Profiler()
+        if args.trace_memory:
+            profiler.start_memory_trace()
+        if args.profile:
+            profiler.start_profile()
+
     try:
-        app = CommandWalletWindow()
+        app = CommandWalletWindow(instrumentation, profiler)
         app.run()
     except KeyboardInterrupt:
         print("\nApplication interrupted by user.")
     except Exception as e:
         print(f"Error starting CommandWallet: {e}")
+    finally:
+        if instrumentation is not None:
+            instrumentation.uninstall()
+            if args.instrument_json:
+                instrumentation.dump(args.instrument_json)
+        if profiler is not None:
+            if profiler.tracing_memory:
+                print(profiler.memory_report())
+                profiler.stop_memory_trace()
+            if args.profile and profiler.stop_profile(args.profile):
+                print(f"Profile written to {args.profile}")
 
 
 if __name__ == "__main__":